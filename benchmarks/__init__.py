@@ -0,0 +1,4 @@
+"""
+Bancs d'essai de performance
+À lancer depuis la racine du projet : python -m benchmarks.<module>
+"""
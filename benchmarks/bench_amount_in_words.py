@@ -0,0 +1,88 @@
+"""
+Banc d'essai de la conversion des montants en lettres
+Compare l'ancien LaserPrinter._number_to_french (tables reconstruites à
+chaque appel) au module utils.amount_in_words (tables précalculées + cache)
+
+Usage: python -m benchmarks.bench_amount_in_words --amounts 200000
+(vérifications par propriétés : tests/test_amount_in_words.py)
+"""
+import argparse
+import random
+import time
+
+from utils.amount_in_words import number_to_french, number_to_malagasy
+
+
+def legacy_number_to_french(n):
+    """Copie de l'ancien algorithme (limité à 999 999)"""
+    if n == 0: return "zéro"
+    units = ["", "un", "deux", "trois", "quatre", "cinq", "six", "sept", "huit", "neuf"]
+    teens = ["dix", "onze", "douze", "treize", "quatorze", "quinze", "seize", "dix-sept", "dix-huit", "dix-neuf"]
+    tens = ["", "", "vingt", "trente", "quarante", "cinquante", "soixante", "soixante", "quatre-vingt", "quatre-vingt"]
+
+    def convert_below_100(n):
+        if n < 10: return units[n]
+        elif n < 20: return teens[n - 10]
+        elif n < 70:
+            u, t = n % 10, n // 10
+            if u == 0: return tens[t]
+            return f"{tens[t]} et un" if u == 1 else f"{tens[t]}-{units[u]}"
+        elif n < 80: return f"soixante-{teens[n - 70]}"
+        elif n < 100:
+            u = n % 10
+            if n == 80: return "quatre-vingts"
+            return f"quatre-vingt-{units[u]}"
+        return ""
+
+    def convert_below_1000(n):
+        if n < 100: return convert_below_100(n)
+        h, r = n // 100, n % 100
+        res = "cent" if h == 1 else f"{units[h]} cent"
+        if r == 0: return res + ("s" if h > 1 else "")
+        return f"{res} {convert_below_100(r)}"
+
+    if n < 1000: return convert_below_1000(n)
+    if n < 1000000:
+        th, r = n // 1000, n % 1000
+        res = "mille" if th == 1 else f"{convert_below_1000(th)} mille"
+        return f"{res} {convert_below_1000(r)}" if r > 0 else res
+    return "nombre trop grand"
+
+
+def generate_amounts(count, seed=42):
+    """Montants réalistes : beaucoup de répétitions, arrondis à la centaine"""
+    rng = random.Random(seed)
+    common = [rng.randint(1, 5000) * 100 for _ in range(300)]
+    return [rng.choice(common) if rng.random() < 0.8 else rng.randint(1, 999_999)
+            for _ in range(count)]
+
+
+def run(label, func, amounts):
+    started = time.perf_counter()
+    for amount in amounts:
+        func(amount)
+    duration = time.perf_counter() - started
+    print(f"{label:>28}: {duration * 1000:8.1f} ms ({len(amounts) / duration:,.0f} conversions/s)")
+    return duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--amounts', type=int, default=200000)
+    args = parser.parse_args()
+
+    amounts = generate_amounts(args.amounts)
+    legacy = run('ancien algorithme', legacy_number_to_french, amounts)
+
+    number_to_french.cache_clear()
+    cold = run('module (cache vide)', number_to_french, amounts)
+    warm = run('module (cache chaud)', number_to_french, amounts)
+    run('module malgache', number_to_malagasy, amounts)
+
+    info = number_to_french.cache_info()
+    print(f"Gain: x{legacy / cold:.1f} à froid, x{legacy / warm:.1f} à chaud "
+          f"(cache: {info.hits} hits, {info.misses} misses)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Banc d'essai des langages d'impression laser (texte filtré, PCL, PostScript)
+Mesure de bout en bout, à travers le faux lp (benchmarks/fake_lp.py), le
+temps par reçu : mise en page, rendu, envoi au spouleur et, pour le texte,
+la conversion texte -> PDF que CUPS ferait (FAKE_LP_FILTERS). Le rendu seul
+(sans spouleur) est mesuré à part.
+
+Le faux filtre est en Python : chaque appel du faux lp recharge reportlab,
+ce que le vrai texttopdf ne paie pas. Ce chargement (coût fixe) et la
+conversion (coût par reçu) sont relevés par le faux lp (FAKE_LP_TIMINGS) et
+affichés séparément ; la comparaison se fait hors chargement. La
+rastérisation faite par CUPS n'est pas simulée non plus : les écarts
+affichés sont indicatifs, à confirmer sur le serveur d'impression.
+
+Usage: python -m benchmarks.bench_laser_output --receipts 20 --items 30
+       python -m benchmarks.bench_laser_output --spool data/spool_bench
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_spooler import FAKE_LP, make_receipt
+from models.laser_printer import LaserPrinter
+from models.print_spooler import LpSpooler
+
+OUTPUTS = ('text', 'pcl', 'postscript')
+
+
+def render_only(printer, receipts, repeat=5):
+    """Durée médiane (ms) de production du document complet, sans spouleur"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = 0
+        for data in receipts:
+            for chunk in printer.render_document(data):
+                size += len(chunk)
+        timings.append((time.perf_counter() - started) * 1000 / len(receipts))
+    return statistics.median(timings), size // len(receipts)
+
+
+def end_to_end(printer, receipts, timings_path):
+    """Durées (ms) par reçu imprimé avec print_receipt et temps du filtre relevés par le faux lp"""
+    timings_path.write_text('')
+    timings = []
+    for data in receipts:
+        started = time.perf_counter()
+        ok, message = printer.print_receipt(data)
+        assert ok, message
+        timings.append((time.perf_counter() - started) * 1000)
+    filters = [json.loads(line) for line in timings_path.read_text().splitlines() if line]
+    return timings, filters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--receipts', type=int, default=20)
+    parser.add_argument('--items', type=int, default=30)
+    parser.add_argument('--paper', default='A6', help="Format papier (A6, A5, A4)")
+    parser.add_argument('--no-filters', action='store_true',
+                        help="Ne pas simuler la conversion texte -> PDF de CUPS")
+    parser.add_argument('--spool', help="Dossier où le faux lp écrit les documents (à inspecter)")
+    args = parser.parse_args()
+
+    if not args.no_filters:
+        os.environ['FAKE_LP_FILTERS'] = '1'
+    if args.spool:
+        os.environ['FAKE_LP_SPOOL'] = args.spool
+
+    receipts = [make_receipt(i, args.items) for i in range(1, args.receipts + 1)]
+    spooler = LpSpooler('Bench_Printer', command=FAKE_LP)
+
+    print(f"{args.receipts} reçus de {args.items} articles, format {args.paper}")
+    print(f"{'langage':<12} {'rendu ms':>9} {'octets':>8} {'médiane ms':>11} {'max ms':>8} "
+          f"{'chargement':>11} {'conversion':>11} {'hors chgt':>10}")
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='bench_laser_') as workdir:
+        timings_path = Path(workdir) / 'filters.jsonl'
+        os.environ['FAKE_LP_TIMINGS'] = str(timings_path)
+        for output in OUTPUTS:
+            printer = LaserPrinter({'laser_printer_name': 'Bench_Printer', 'laser_output': output,
+                                    'laser_paper_format': args.paper}, spooler=spooler)
+            render_ms, size = render_only(printer, receipts)
+            timings, filters = end_to_end(printer, receipts, timings_path)
+            import_ms = statistics.median(f['import_ms'] for f in filters) if filters else 0.0
+            filter_ms = statistics.median(f['filter_ms'] for f in filters) if filters else 0.0
+            # Sans le chargement de reportlab : ce qu'un filtre déjà chargé coûterait
+            results[output] = statistics.median(timings) - import_ms
+            print(f"{output:<12} {render_ms:9.2f} {size:8,} {statistics.median(timings):11.1f} "
+                  f"{max(timings):8.1f} {import_ms:11.1f} {filter_ms:11.1f} {results[output]:10.1f}")
+    spooler.shutdown()
+
+    # Écarts en ms plutôt qu'un rapport : seul l'ordre de grandeur est significatif ici
+    print("Écart par reçu avec le texte filtré, hors chargement du filtre (indicatif) :")
+    for output in OUTPUTS[1:]:
+        print(f"  {output:<12} {results[output] - results['text']:+8.1f} ms")
+
+if __name__ == '__main__':
+    main()
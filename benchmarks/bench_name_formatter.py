@@ -0,0 +1,106 @@
+"""
+Banc d'essai du formatage des noms de clients
+Compare l'ancienne détection (recherche de sous-chaînes mot-clé par mot-clé)
+à l'expression compilée + cache de NameFormatter, sur des noms synthétiques
+
+Usage: python -m benchmarks.bench_name_formatter --names 100000
+"""
+import argparse
+import random
+import time
+
+from utils.name_formatter import NameFormatter
+
+
+SURNAMES = [
+    'RAKOTO', 'RASOA', 'RABE', 'RANDRIANASOLO', 'RANDRIANASOLONGO', 'RAZAFINDRAKOTO',
+    'ANDRIAMANANTENA', 'RASOANIRINA', 'RAHARISON', 'RAKOTONIRINA', 'RAVELOSON',
+    'RAMANANTSOA', 'RAZANAMASY', 'ANDRIANARISOA', 'RAHOLISOA', 'RAFANOMEZANTSOA',
+]
+FIRST_NAMES = ['Jean', 'Marie', 'Hanta', 'Paul', 'Voahangy', 'Tiana', 'Hery', 'Lova',
+               'Fara', 'Mamy', 'Nirina', 'Solo', 'Onja', 'Rija']
+ORG_PREFIXES = ['EPP', 'CEG', 'Lycée', 'École', 'Association', 'ONG', 'SARL', 'Pharmacie',
+                'Église', 'Centre', 'Boutique', 'Magasin', 'Clinique']
+PLACES = ['Ambohipo', 'Ampefiloha', 'Miarinarivo', 'Antsirabe', 'Toamasina', 'Mahajanga',
+          'Fianarantsoa', 'Analakely', 'Isotry', 'Besarety']
+
+
+def generate_names(count, seed=42, org_ratio=0.25, distinct=5000):
+    """
+    Noms de clients réalistes : peu de noms distincts, beaucoup de répétitions
+    Retourne une liste de (nom, est_organisation)
+    """
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(distinct):
+        if rng.random() < org_ratio:
+            pool.append((f"{rng.choice(ORG_PREFIXES)} {rng.choice(PLACES)}", True))
+        else:
+            parts = [rng.choice(SURNAMES)] + rng.sample(FIRST_NAMES, rng.randint(1, 3))
+            name = ' '.join(parts)
+            pool.append((name.lower() if rng.random() < 0.3 else name, False))
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def legacy_is_organization(name):
+    """Ancienne détection : sous-chaîne pour chaque mot-clé"""
+    name_upper = name.upper()
+    for keyword in NameFormatter.ORGANIZATION_KEYWORDS:
+        if keyword in name_upper:
+            return True
+    return False
+
+
+def legacy_format_client_name(name):
+    """Ancien point d'entrée (sans cache, recherche linéaire des acronymes)"""
+    name = name.strip()
+    if legacy_is_organization(name):
+        words = []
+        for word in ' '.join(name.split()).split():
+            if word.upper() in NameFormatter.ORGANIZATION_KEYWORDS:
+                words.append(word.upper())
+            else:
+                words.append(word.capitalize())
+        return ' '.join(words)
+    return NameFormatter.format_person_name(name)
+
+
+def run(label, func, names):
+    started = time.perf_counter()
+    for name in names:
+        func(name)
+    duration = time.perf_counter() - started
+    print(f"{label:>30}: {duration * 1000:8.1f} ms ({len(names) / duration:,.0f} noms/s)")
+    return duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--names', type=int, default=100000)
+    parser.add_argument('--distinct', type=int, default=5000)
+    args = parser.parse_args()
+
+    samples = generate_names(args.names, distinct=args.distinct)
+    names = [name for name, _ in samples]
+
+    # Exactitude de la détection
+    for label, detector in (('ancienne détection', legacy_is_organization),
+                            ('détection compilée', NameFormatter.is_organization)):
+        false_pos = sum(1 for name, is_org in samples if detector(name) and not is_org)
+        false_neg = sum(1 for name, is_org in samples if not detector(name) and is_org)
+        print(f"{label:>30}: {false_pos} faux positifs, {false_neg} faux négatifs")
+
+    print()
+    run('ancienne détection', legacy_is_organization, names)
+    run('détection compilée', NameFormatter.is_organization, names)
+    legacy = run('ancien formatage', legacy_format_client_name, names)
+
+    NameFormatter.format_client_name.cache_clear()
+    cached = run('formatage avec cache', NameFormatter.format_client_name, names)
+
+    info = NameFormatter.format_client_name.cache_info()
+    print(f"Gain: x{legacy / cached:.1f} (cache: {info.hits} hits, {info.misses} misses)")
+
+
+if __name__ == '__main__':
+    main()
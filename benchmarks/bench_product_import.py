@@ -0,0 +1,74 @@
+"""
+Banc d'essai de l'import catalogue produits
+Génère un fichier CSV synthétique puis mesure l'import dans une base temporaire
+
+Usage: python -m benchmarks.bench_product_import --rows 100000
+"""
+import argparse
+import csv
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from models.database import Database
+from models.product_importer import ProductImporter
+
+
+WORDS = [
+    'Riz', 'Huile', 'Sucre', 'Savon', 'Cahier', 'Stylo', 'Farine', 'Sel', 'Café',
+    'Lait', 'Bougie', 'Allumettes', 'Piles', 'Ampoule', 'Clou', 'Ciment', 'Tôle',
+    'Peinture', 'Seau', 'Corde', 'Biscuit', 'Thé', 'Vinaigre', 'Sardine', 'Pâtes',
+]
+VARIANTS = ['Blanc', 'Rouge', 'Gros', 'Petit', 'Premium', 'Local', 'Importé', 'Vrac']
+UNITS = ['1kg', '5kg', '25kg', '50cl', '1L', '5L', 'x10', 'x100', 'unité', 'paquet']
+
+
+def generate_catalog(path, rows, seed=42, invalid_ratio=0.01):
+    """Écrire un catalogue CSV (séparateur ';', prix à la française)"""
+    rng = random.Random(seed)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(['Désignation', 'Prix unitaire'])
+        for i in range(rows):
+            name = f"{rng.choice(WORDS)} {rng.choice(VARIANTS)} {rng.choice(UNITS)} #{i}"
+            price = f"{rng.randint(1, 2000) * 100:,}".replace(',', ' ')
+            if rng.random() < invalid_ratio:
+                price = 'N/A'
+            writer.writerow([name, price])
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--keep', action='store_true', help="Conserver le fichier généré")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix='bench_import_'))
+    catalog = workdir / 'catalogue.csv'
+
+    started = time.perf_counter()
+    generate_catalog(catalog, args.rows)
+    print(f"Catalogue généré: {catalog} ({args.rows} lignes, "
+          f"{time.perf_counter() - started:.2f} s)")
+
+    db = Database(workdir / 'bench.db')
+    importer = ProductImporter(db, chunk_size=args.chunk_size)
+
+    # Premier passage : insertions ; second passage : mises à jour (UPSERT)
+    for label in ('insertion', 'mise à jour'):
+        report = importer.import_file(catalog)
+        rate = (report['imported'] + report['rejected']) / report['duration']
+        print(f"{label:>12}: {report['imported']} importés, {report['rejected']} rejetés "
+              f"en {report['duration']:.2f} s ({rate:,.0f} lignes/s)")
+
+    if not args.keep:
+        for path in workdir.iterdir():
+            path.unlink()
+        workdir.rmdir()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Banc d'essai du spouleur laser (travaux par seconde)
+Compare, à travers le faux lp (benchmarks/fake_lp.py) :
+- l'ancien chemin : fichier temporaire + lp par reçu
+- LpSpooler : contenu envoyé par stdin, un travail par reçu
+- LpSpooler.submit_batch : tous les reçus en un seul travail
+
+Usage: python -m benchmarks.bench_spooler --receipts 50 --items 30
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from models.laser_printer import LaserPrinter
+from models.print_spooler import LpSpooler
+
+
+FAKE_LP = [sys.executable, '-m', 'benchmarks.fake_lp']
+
+
+def make_receipt(number, items):
+    lines = [
+        {'name': f"Article {i}", 'quantity': 1 + i % 5, 'unit_price': 1500,
+         'total': (1 + i % 5) * 1500}
+        for i in range(items)
+    ]
+    return {
+        'receipt_number': f"FACT-{number:05d}",
+        'date': '2025-01-15',
+        'client_name': 'RAKOTO Jean',
+        'client_contact': '034 00 000 00',
+        'items': lines,
+        'total': sum(line['total'] for line in lines),
+        'payment_method': 'Espèces',
+    }
+
+
+def legacy_print(printer, data):
+    """Reproduction du chemin d'origine (NamedTemporaryFile + lp + unlink)"""
+    content = printer._format_receipt_with_pagination(data).strip()
+    with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".txt") as tmp:
+        tmp.write(content)
+        path = tmp.name
+    cmd = FAKE_LP + ['-d', printer.printer_name]
+    for key, value in printer._print_options().items():
+        cmd += ['-o', key if value is True else f"{key}={value}"]
+    result = subprocess.run(cmd + [path], capture_output=True, text=True, timeout=10)
+    os.unlink(path)
+    return result.returncode == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--receipts', type=int, default=50)
+    parser.add_argument('--items', type=int, default=30)
+    args = parser.parse_args()
+
+    receipts = [make_receipt(i, args.items) for i in range(1, args.receipts + 1)]
+    spooler = LpSpooler('Bench_Printer', command=FAKE_LP)
+    printer = LaserPrinter({'laser_printer_name': 'Bench_Printer'}, spooler=spooler)
+
+    def report(label, elapsed, jobs):
+        print(f"{label:<28} {elapsed:6.2f} s  {args.receipts / elapsed:8.1f} reçus/s  "
+              f"({jobs} travaux)")
+
+    started = time.perf_counter()
+    assert all(legacy_print(printer, data) for data in receipts)
+    report("fichier temporaire + lp", time.perf_counter() - started, args.receipts)
+
+    started = time.perf_counter()
+    assert all(printer.print_receipt(data)[0] for data in receipts)
+    report("stdin (1 travail/reçu)", time.perf_counter() - started, args.receipts)
+
+    started = time.perf_counter()
+    job = printer.submit_receipts(receipts).result()
+    assert job.ok, job.message
+    report("stdin groupé", time.perf_counter() - started, 1)
+
+    spooler.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Banc d'essai des relevés de compte de fin de mois
+Remplit une base temporaire (clients + reçus sur un mois) puis compare la
+génération séquentielle et la génération parallèle de tous les relevés
+
+Usage: python -m benchmarks.bench_statements --clients 5000 --receipts-per-client 8
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from models.database import Database
+from utils.name_formatter import client_name_key, format_client_name
+from utils.statement_generator import StatementGenerator
+
+
+SURNAMES = ['RAKOTO', 'RABE', 'RANDRIA', 'RAZAFY', 'ANDRIAMANANA', 'RAHARISON', 'RAVELO',
+            'RASOLO', 'RAMANANTSOA', 'RAKOTONIRINA']
+FIRST_NAMES = ['Jean', 'Marie', 'Hanta', 'Paul', 'Voahangy', 'Tiana', 'Hery', 'Lova']
+
+
+def populate(db, clients, receipts_per_client, year, month, seed=42):
+    """Insérer clients et reçus en masse (une transaction)"""
+    rng = random.Random(seed)
+    date_from, date_to = StatementGenerator.month_bounds(year, month)
+    last_day = int(date_to[-2:])
+
+    conn = db.get_connection()
+    try:
+        with conn:
+            client_rows = []
+            for i in range(clients):
+                name = format_client_name(f"{rng.choice(SURNAMES)}{i} {rng.choice(FIRST_NAMES)}")
+                client_rows.append((i + 1, name, client_name_key(name), f"034 {i:06d}"))
+            conn.executemany('''
+                INSERT INTO clients (id, name, name_key, contact) VALUES (?, ?, ?, ?)
+            ''', client_rows)
+
+            receipt_rows = []
+            number = 0
+            for client_id, name, _, contact in client_rows:
+                # Volume variable : quelques gros clients, beaucoup de petits
+                count = max(1, int(rng.expovariate(1 / receipts_per_client)))
+                for _ in range(count):
+                    number += 1
+                    day = rng.randint(1, last_day)
+                    receipt_rows.append((
+                        f"FACT-{number:07d}", f"{year:04d}-{month:02d}-{day:02d}", name, contact,
+                        json.dumps([{'name': 'Article', 'quantity': 1, 'unit_price': 1000,
+                                     'total': 1000}]),
+                        rng.randint(1, 500) * 1000, 'Espèces', client_id
+                    ))
+            conn.executemany('''
+                INSERT INTO receipts (receipt_number, date, client_name, client_contact,
+                                      items, total, payment_method, client_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', receipt_rows)
+    finally:
+        conn.close()
+
+    return date_from, date_to, len(receipt_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=5000)
+    parser.add_argument('--receipts-per-client', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--skip-sequential', action='store_true')
+    parser.add_argument('--keep', action='store_true', help="Conserver la base et les PDF")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix='bench_statements_'))
+    db = Database(workdir / 'bench.db')
+
+    started = time.perf_counter()
+    date_from, date_to, receipts = populate(db, args.clients, args.receipts_per_client, 2026, 1)
+    print(f"Base remplie: {args.clients} clients, {receipts} reçus "
+          f"({time.perf_counter() - started:.2f} s)")
+
+    generator = StatementGenerator(db)
+    runs = [('séquentiel', 1)] if not args.skip_sequential else []
+    if args.workers != 1:
+        runs.append((f"{args.workers} processus", args.workers))
+
+    durations = {}
+    for label, workers in runs:
+        output_dir = workdir / f"statements_{workers}"
+        report = generator.generate_all(date_from, date_to, output_dir, workers=workers)
+        durations[workers] = report['duration']
+        size = sum(p.stat().st_size for p in output_dir.iterdir())
+        print(f"{label:>14}: {report['statements']} relevés en {report['duration']:.2f} s "
+              f"({report['statements'] / report['duration']:,.0f} relevés/s, "
+              f"{size / 1024 / 1024:.1f} Mo, {len(report['errors'])} erreurs)")
+
+    if 1 in durations and args.workers in durations and args.workers != 1:
+        print(f"Gain parallèle: x{durations[1] / durations[args.workers]:.1f}")
+
+    if args.keep:
+        print(f"Résultats conservés dans {workdir}")
+    else:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
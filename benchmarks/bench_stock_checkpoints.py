@@ -0,0 +1,115 @@
+"""
+Banc d'essai du stock à une date passée
+Remplit un journal de mouvements de taille croissante puis compare le rejeu
+complet du journal aux requêtes appuyées sur les points de contrôle
+(quotidiens ou mensuels), en vérifiant que les quantités sont identiques
+
+Usage: python -m benchmarks.bench_stock_checkpoints --products 500 --movements 50000 200000
+"""
+import argparse
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from models.database import Database
+from models.stock_manager import StockManager
+
+
+def populate(db, products, movements, start, days, seed=42):
+    """Insérer produits et mouvements en masse (une transaction)"""
+    rng = random.Random(seed)
+    conn = db.get_connection()
+    try:
+        with conn:
+            conn.executemany('''
+                INSERT INTO products (id, name, unit_price) VALUES (?, ?, ?)
+            ''', [(i + 1, f"Article {i + 1:05d}", rng.randint(1, 200) * 100)
+                  for i in range(products)])
+
+            rows = []
+            for _ in range(movements):
+                moment = start + timedelta(seconds=rng.randrange(days * 86400))
+                if rng.random() < 0.2:
+                    rows.append((rng.randint(1, products), 'purchase', rng.randint(10, 100),
+                                 moment.isoformat()))
+                else:
+                    rows.append((rng.randint(1, products), 'sale', -rng.randint(1, 5),
+                                 moment.isoformat()))
+            conn.executemany('''
+                INSERT INTO stock_movements (product_id, kind, quantity, created_at)
+                VALUES (?, ?, ?, ?)
+            ''', rows)
+    finally:
+        conn.close()
+
+
+def stock_by_replay(db, as_of):
+    """Ancienne approche : sommer tout le journal jusqu'à la date"""
+    conn = db.get_connection()
+    try:
+        return dict(conn.execute('''
+            SELECT p.id, COALESCE(SUM(m.quantity), 0)
+            FROM products p
+            LEFT JOIN stock_movements m ON m.product_id = p.id AND m.created_at <= ?
+            GROUP BY p.id
+        ''', (StockManager._as_moment(as_of),)))
+    finally:
+        conn.close()
+
+
+def timed(func, dates):
+    started = time.perf_counter()
+    results = [func(as_of) for as_of in dates]
+    return (time.perf_counter() - started) / len(dates) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, default=500)
+    parser.add_argument('--movements', type=int, nargs='+', default=[20000, 100000, 400000])
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--keep', action='store_true', help="Conserver les bases")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix='bench_stock_'))
+    start = datetime(2024, 1, 1)
+    rng = random.Random(7)
+    dates = [(start + timedelta(days=rng.randrange(args.days))).date()
+             for _ in range(args.queries)]
+
+    print(f"{'mouvements':>10} | {'rejeu complet':>14} | {'mensuel':>19} | {'quotidien':>19}")
+    for movements in args.movements:
+        db = Database(workdir / f"stock_{movements}.db")
+        populate(db, args.products, movements, start, args.days)
+        manager = StockManager(db)
+        replay_ms, expected = timed(lambda as_of: stock_by_replay(db, as_of), dates)
+
+        cells = []
+        for period in ('monthly', 'daily'):
+            started = time.perf_counter()
+            manager.rebuild_checkpoints(period)
+            build = time.perf_counter() - started
+
+            query_ms, results = timed(
+                lambda as_of: {row[0]: row[2] for row in manager.stock_at(as_of)}, dates)
+            for as_of, got, want in zip(dates, results, expected):
+                diff = [pid for pid in want if abs(got.get(pid, 0) - want[pid]) > 1e-9]
+                if diff:
+                    raise SystemExit(f"Écart {period} au {as_of}: produits {diff[:5]}")
+            cells.append(f"{query_ms:7.1f} ms ({build:4.1f} s)")
+
+        print(f"{movements:>10} | {replay_ms:11.1f} ms | {cells[0]:>19} | {cells[1]:>19}")
+
+    print("(latence moyenne par requête ; entre parenthèses : construction des points)")
+    if args.keep:
+        print(f"Bases conservées dans {workdir}")
+    else:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
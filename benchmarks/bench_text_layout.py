@@ -0,0 +1,156 @@
+"""
+Banc d'essai de la mise en page texte (utils.text_layout)
+Compare l'ancien side_by_side / f-string par ligne (len(), tranches et
+concaténations) aux colonnes précalculées, en lignes par seconde, sur des
+textes ASCII, accentués (français/malgache) et avec emoji / caractères larges
+
+Usage: python -m benchmarks.bench_text_layout --lines 100000
+       python -m benchmarks.bench_text_layout --check
+"""
+import argparse
+import random
+import time
+
+from utils.text_layout import TextLayout, display_width
+
+WIDTH = 40
+
+WORDS = {
+    'ascii': ['Savon', 'Riz', 'Huile', 'Sucre', 'Farine', 'Cahier', 'Stylo', 'Bic', 'Lot', '500g'],
+    'accents': ['Café', 'Crème', 'Pâtes', 'Thé', 'Épices', 'Mofo', 'Vary', 'Tsiñy', 'Kôpy', 'Fanampiñana'],
+    'wide': ['☕', '🧾', '漢字', 'テスト', '👍🏽', '🇲🇬', 'Café', 'Riz', 'Savon', 'Lot'],
+}
+
+
+def generate_rows(kind, count, seed=42):
+    rng = random.Random(seed)
+    words = WORDS[kind]
+    return [(' '.join(rng.choice(words) for _ in range(rng.randint(1, 6))),
+             rng.randint(1, 99), rng.randint(1, 5000) * 100)
+            for _ in range(count)]
+
+
+def legacy_side_by_side(left, right, width=WIDTH):
+    """Copie de l'ancien LaserPrinter.side_by_side"""
+    left, right = str(left).strip(), str(right).strip()
+    total_len = len(left) + len(right)
+    if total_len >= width:
+        excess = total_len - width + 1
+        if len(right) > len(left): right = right[:-excess]
+        else: left = left[:-excess]
+    spaces = width - len(left) - len(right)
+    return left + (" " * spaces) + right + "\n"
+
+
+def legacy_item_row(name, quantity, unit_price):
+    """Copie de l'ancien LaserPrinter._get_item_row"""
+    name = name[:17]
+    qty = str(quantity)
+    price = f"{unit_price:,.0f}"
+    total = f"{quantity * unit_price:,.0f}"
+    return f"{name:<18} {qty:>4} {price:>8} {total:>8}\n"
+
+
+def one_pass(func, rows):
+    started = time.perf_counter()
+    out = [None] * len(rows)
+    for index, row in enumerate(rows):
+        out[index] = func(*row)
+    ''.join(out)
+    return time.perf_counter() - started
+
+
+def run(entries, rows, repeat=5):
+    """
+    Meilleure de repeat passes par fonction ; les fonctions sont alternées à
+    chaque passe pour que les variations de charge de la machine les touchent
+    toutes de la même façon
+    """
+    durations = {label: float('inf') for label, _ in entries}
+    for _ in range(repeat):
+        for label, func in entries:
+            durations[label] = min(durations[label], one_pass(func, rows))
+    for label, duration in durations.items():
+        print(f"{label:>38}: {duration * 1000:8.1f} ms ({len(rows) / duration:,.0f} lignes/s)")
+    return durations
+
+
+# ========== VÉRIFICATIONS ==========
+
+def check(samples, seed=7):
+    """Largeur affichée exacte, troncature sans coupure de caractère, césure et colonnes"""
+    layout = TextLayout(WIDTH)
+    thermal = TextLayout(32, codepage='cp437')
+    columns = layout.columns((18, 'left', 17), (4, 'right', None), (8, 'right', None), (8, 'right', None))
+    failures = []
+
+    for kind in WORDS:
+        for left, quantity, price in generate_rows(kind, samples, seed):
+            right = f"{price:,.0f} Ar"
+            line = layout.side_by_side(left, right)
+            if display_width(line) != WIDTH:
+                failures.append(f"side_by_side {kind}: {line!r} ({display_width(line)} colonnes)")
+            if display_width(left) + display_width(right) < WIDTH and not (
+                    line.startswith(left) and line.endswith(right)):
+                failures.append(f"texte tronqué sans raison {kind}: {line!r}")
+            printed = thermal.side_by_side(left, right)
+            try:
+                printed.encode('cp437')
+            except UnicodeEncodeError:
+                failures.append(f"thermique, caractère hors CP437 {kind}: {printed!r}")
+            if len(printed) != 32:
+                failures.append(f"thermique {kind}: {printed!r}")
+            row = columns.row(left, quantity, f"{price:,.0f}", f"{quantity * price:,.0f}")
+            if row != columns.row(left, str(quantity), f"{price:,.0f}", f"{quantity * price:,.0f}"):
+                failures.append(f"chemin rapide différent {kind}: {row!r}")
+            if display_width(row) < columns.width:
+                failures.append(f"colonnes {kind}: {row!r}")
+            if kind == 'ascii' and row + "\n" != legacy_item_row(left, quantity, price):
+                failures.append(f"différence avec l'ancienne ligne article: {row!r}")
+            for wrapped in layout.wrap(left * 3, 12):
+                if display_width(wrapped) > 12:
+                    failures.append(f"césure {kind}: {wrapped!r}")
+
+    print(f"{samples * len(WORDS)} lignes vérifiées, {len(failures)} échec(s)")
+    for failure in failures[:20]:
+        print(f"  - {failure}")
+    return not failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lines', type=int, default=100000)
+    parser.add_argument('--check', action='store_true',
+                        help="Vérifier les largeurs au lieu de mesurer")
+    parser.add_argument('--samples', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5, help="Passes par mesure (la meilleure est gardée)")
+    args = parser.parse_args()
+
+    if args.check:
+        raise SystemExit(0 if check(args.samples) else 1)
+
+    layout = TextLayout(WIDTH)
+    thermal = TextLayout(WIDTH, codepage='cp437')
+    columns = layout.columns((18, 'left', 17), (4, 'right', None), (8, 'right', None), (8, 'right', None))
+
+    for kind in WORDS:
+        rows = generate_rows(kind, args.lines)
+        print(f"-- {kind}")
+        durations = run([
+            ('ancien side_by_side', lambda name, qty, price: legacy_side_by_side(name, f"{price:,.0f}")),
+            ('TextLayout.side_by_side', lambda name, qty, price: layout.side_by_side(name, f"{price:,.0f}")),
+            ('TextLayout.side_by_side (CP437)',
+             lambda name, qty, price: thermal.side_by_side(name, f"{price:,.0f}")),
+            # Appel par une lambda des deux côtés ; mêmes conversions (str(quantité), montants formatés)
+            ('ancienne ligne article', lambda name, qty, price: legacy_item_row(name, qty, price)),
+            ('ColumnModel.row', lambda name, qty, price: columns.row(
+                name, str(qty), f"{price:,.0f}", f"{qty * price:,.0f}")),
+        ], rows, args.repeat)
+        # L'ancien code ne mesurait rien : seul l'ASCII est comparable à largeur égale
+        print(f"{'nouveau / ancien':>38}: side_by_side "
+              f"x{durations['ancien side_by_side'] / durations['TextLayout.side_by_side']:.2f}, "
+              f"ligne article x{durations['ancienne ligne article'] / durations['ColumnModel.row']:.2f} "
+              f"(>= 1 : au moins aussi rapide)")
+
+if __name__ == '__main__':
+    main()
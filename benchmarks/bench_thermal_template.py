@@ -0,0 +1,152 @@
+"""
+Banc d'essai du rendu ESC/POS des tickets thermiques
+Compare l'ancienne impression ligne par ligne (Dummy.text / set, un encodage
+par appel) au modèle compilé de models.thermal_template (un seul encodage)
+
+Usage: python -m benchmarks.bench_thermal_template --lines 200
+       python -m benchmarks.bench_thermal_template --check
+"""
+import argparse
+import random
+import statistics
+import time
+
+from models.thermal_template import DEFAULT_TEMPLATE, PAPER_COLUMNS, compile_template
+
+SETTINGS = {
+    'company_name': 'MAGASIN Ly',
+    'company_address': 'PAV No: 28 TSENEA\nMIARINARIVO 117',
+    'company_phone': '033 01 830 14',
+    'currency': 'Ar',
+    'amount_words_language': 'fr',
+    'thermal_paper_width': '80',
+    'thermal_template': '',
+}
+
+
+def sample_receipt(item_count, seed=42):
+    rng = random.Random(seed)
+    items = []
+    for i in range(item_count):
+        quantity = rng.randint(1, 24)
+        unit_price = rng.randint(1, 500) * 100
+        items.append({'name': f"Article {i + 1} - Savon de Marseille {rng.randint(100, 999)} g",
+                      'quantity': quantity, 'unit_price': unit_price, 'total': quantity * unit_price})
+    return {
+        'receipt_number': 'R-2026-000042', 'date': '2026-10-19',
+        'client_name': 'Épicerie Rakotomalala',
+        'client_contact': '034 11 222 33\nLot II M 45 Analakely\nAntananarivo',
+        'items': items, 'total': sum(item['total'] for item in items),
+        'payment_method': 'Espèces',
+    }
+
+
+def legacy_render(receipt_data, settings):
+    """Articles et total imprimés comme l'ancien ThermalPrinter.print_receipt"""
+    from escpos.printer import Dummy
+
+    printer = Dummy()
+    currency = settings.get('currency', 'Ar')
+    for i, item in enumerate(receipt_data['items'], 1):
+        printer.set(width=2, height=2)
+        printer.text(f"{i}. {item['name'][:20]}\n")
+        printer.set(width=1, height=1)
+        printer.text(f"   {item['quantity']:.0f} x {item['unit_price']:,.0f} {currency} = "
+                     f"{item['total']:,.0f} {currency}\n")
+    printer.text("=" * 48 + "\n")
+    printer.text(f"{receipt_data['total']:,.0f} {currency}\n")
+    printer.cut()
+    return printer.output
+
+
+def measure(func, repeat):
+    func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1], timings[-1]
+
+
+# ========== VÉRIFICATIONS ==========
+
+def check(item_count):
+    """Largeur des lignes, codes de taille refermés, cache et erreurs de modèle"""
+    failures = []
+    receipt = sample_receipt(item_count)
+
+    for width_mm, columns in PAPER_COLUMNS.items():
+        settings = dict(SETTINGS, thermal_paper_width=str(width_mm))
+        output = compile_template(settings)(receipt)
+        if not output.startswith(b'\x1bt\x00') or not output.endswith(b'\x1dV\x00'):
+            failures.append(f"{width_mm} mm : début/fin ESC/POS inattendus")
+        if output.count(b'\x1d!\x11') != output.count(b'\x1d!\x00'):
+            failures.append(f"{width_mm} mm : double taille non refermée")
+        if output.count(b'\x1bE\x01') != output.count(b'\x1bE\x00'):
+            failures.append(f"{width_mm} mm : gras non refermé")
+        for line in output.split(b'\n'):
+            size = 2 if b'\x1d!\x11' in line else 1
+            for code in (b'\x1bt\x00', b'\x1d!\x11', b'\x1d!\x00', b'\x1bE\x01', b'\x1bE\x00'):
+                line = line.replace(code, b'')
+            if len(line) * size > columns and b'\x1dV' not in line:
+                failures.append(f"{width_mm} mm : ligne trop longue ({len(line)} x{size}) {line!r}")
+                break
+        if compile_template(dict(settings)) is not compile_template(settings):
+            failures.append(f"{width_mm} mm : modèle recompilé pour des paramètres identiques")
+        if compile_template(dict(settings, receipt_counter='42')) is not compile_template(settings):
+            failures.append(f"{width_mm} mm : modèle recompilé après une vente (receipt_counter)")
+
+    for template in ('{"item": [{"text": "{inconnu}"}]}', '{"corps": []}', '{"footer": ['):
+        try:
+            compile_template(dict(SETTINGS, thermal_template=template))
+            failures.append(f"modèle accepté à tort : {template}")
+        except ValueError:
+            pass
+
+    print(f"{len(PAPER_COLUMNS)} largeurs vérifiées, {len(failures)} échec(s)")
+    for failure in failures[:20]:
+        print(f"  - {failure}")
+    return not failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lines', type=int, default=200,
+                        help="Lignes imprimées visées (deux lignes par article)")
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--target-ms', type=float, default=1.0)
+    parser.add_argument('--check', action='store_true',
+                        help="Vérifier le rendu au lieu de mesurer")
+    args = parser.parse_args()
+
+    item_count = max(1, (args.lines - 20) // len(DEFAULT_TEMPLATE['item']))
+    if args.check:
+        raise SystemExit(0 if check(item_count) else 1)
+
+    receipt = sample_receipt(item_count)
+    settings = dict(SETTINGS)
+
+    started = time.perf_counter()
+    render = compile_template(settings)
+    compile_ms = (time.perf_counter() - started) * 1000
+    output = render(receipt)
+
+    legacy_median, _, legacy_max = measure(lambda: legacy_render(receipt, settings), args.repeat)
+    median, p95, worst = measure(lambda: render(receipt), args.repeat)
+    cached, _, _ = measure(lambda: compile_template(settings)(receipt), args.repeat)
+
+    line_count = output.count(b'\n')
+    print(f"Ticket : {item_count} articles, {line_count} lignes, {len(output):,} octets")
+    print(f"{'compilation du modèle':>28}: {compile_ms:8.3f} ms")
+    print(f"{'ancien rendu (escpos Dummy)':>28}: {legacy_median:8.3f} ms (max {legacy_max:.3f})")
+    print(f"{'modèle compilé':>28}: {median:8.3f} ms (95 % {p95:.3f}, max {worst:.3f})")
+    print(f"{'avec recherche du cache':>28}: {cached:8.3f} ms")
+    # Objectif tenu sur 95 % des tickets (le max reflète surtout la charge de la machine)
+    print(f"Gain: x{legacy_median / median:.1f} — objectif {args.target_ms} ms "
+          f"{'atteint' if p95 <= args.target_ms else 'NON atteint'} (95e centile)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Générateur de données synthétiques pour les bancs d'essai
+Remplit une base receipts.db avec N produits et M reçus réalistes :
+- popularité des produits en loi de Zipf (quelques best-sellers, une longue traîne)
+- nombre de lignes par reçu : surtout 1 à 5, quelques factures de gros (50+)
+- dates réparties sur l'année écoulée, clients récurrents
+
+Usage: python -m benchmarks.datagen --db /tmp/bench.db --products 2000 --receipts 20000
+"""
+import argparse
+import bisect
+import itertools
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from models.database import Database
+from utils.name_formatter import format_client_name
+
+
+WORDS = [
+    'Riz', 'Huile', 'Sucre', 'Savon', 'Cahier', 'Stylo', 'Farine', 'Sel', 'Café',
+    'Lait', 'Bougie', 'Allumettes', 'Piles', 'Ampoule', 'Clou', 'Ciment', 'Tôle',
+    'Peinture', 'Seau', 'Corde', 'Biscuit', 'Thé', 'Vinaigre', 'Sardine', 'Pâtes',
+]
+VARIANTS = ['Blanc', 'Rouge', 'Gros', 'Petit', 'Premium', 'Local', 'Importé', 'Vrac']
+UNITS = ['1kg', '5kg', '25kg', '50cl', '1L', '5L', 'x10', 'x100', 'unité', 'paquet']
+SURNAMES = ['RAKOTO', 'RABE', 'RANDRIA', 'RAZAFY', 'ANDRIAMANANA', 'RAHARISON', 'RAVELO',
+            'RASOLO', 'RAMANANTSOA', 'RAKOTONIRINA']
+FIRST_NAMES = ['Jean', 'Marie', 'Hanta', 'Paul', 'Voahangy', 'Tiana', 'Hery', 'Lova']
+ORGANIZATIONS = ['EPP Ambohipo', 'CEG Miarinarivo', 'Lycée Analakely', 'Pharmacie Isotry',
+                 'Association Fanilo', 'SARL Tsara', 'Église Besarety']
+PAYMENTS = ['Espèces'] * 8 + ['Mobile Money', 'Chèque']
+
+
+def generate_products(count, rng):
+    """Liste de (nom, prix) distincts"""
+    return [(f"{rng.choice(WORDS)} {rng.choice(VARIANTS)} {rng.choice(UNITS)} #{i}",
+             rng.randint(1, 2000) * 100)
+            for i in range(count)]
+
+
+def generate_clients(count, rng):
+    clients = []
+    for i in range(count):
+        if rng.random() < 0.15:
+            name = f"{rng.choice(ORGANIZATIONS)} {i}"
+        else:
+            name = f"{rng.choice(SURNAMES)}{i} {rng.choice(FIRST_NAMES)}"
+        clients.append((format_client_name(name), f"034 {rng.randint(0, 999999):06d}"))
+    return clients
+
+
+def line_count(rng):
+    """Lignes par reçu : détail (1-5) le plus souvent, factures de gros parfois"""
+    if rng.random() < 0.03:
+        return rng.randint(30, 120)
+    return min(1 + int(rng.expovariate(1 / 2.5)), 25)
+
+
+def populate(db, products, receipts, clients=None, seed=42, days=365, batch_size=5000):
+    """
+    Insérer produits et reçus en masse (transactions par lots)
+    Les cumuls produits et le répertoire clients sont recalculés à la fin,
+    comme le ferait une base ayant vécu ces ventes.
+    Retourne un résumé (compteurs, durée).
+    """
+    rng = random.Random(seed)
+    started = time.perf_counter()
+
+    catalog = generate_products(products, rng)
+    client_pool = generate_clients(clients or max(receipts // 20, 10), rng)
+
+    # Loi de Zipf (s = 1.1) : tirage par dichotomie sur les poids cumulés
+    cumulative = list(itertools.accumulate(1 / (rank ** 1.1) for rank in range(1, products + 1)))
+    total_weight = cumulative[-1]
+
+    def pick_product():
+        return catalog[bisect.bisect_left(cumulative, rng.random() * total_weight)]
+
+    end = datetime.now()
+    start = end - timedelta(days=days)
+    moments = sorted(start + timedelta(seconds=rng.randrange(days * 86400))
+                     for _ in range(receipts))
+
+    conn = db.get_connection()
+    try:
+        with conn:
+            conn.executemany('''
+                INSERT OR IGNORE INTO products (name, unit_price, last_used) VALUES (?, ?, ?)
+            ''', [(name, price, end.isoformat()) for name, price in catalog])
+
+        lines_written = 0
+        usage = {}
+        for offset in range(0, receipts, batch_size):
+            rows = []
+            for number, moment in enumerate(moments[offset:offset + batch_size], offset + 1):
+                items = []
+                for _ in range(line_count(rng)):
+                    name, price = pick_product()
+                    quantity = rng.choice((1, 1, 1, 2, 2, 3, 5, 10))
+                    usage[name] = usage.get(name, 0) + 1
+                    items.append({'name': name, 'quantity': quantity, 'unit_price': price,
+                                  'total': quantity * price})
+                lines_written += len(items)
+
+                client_name, contact = (rng.choice(client_pool) if rng.random() < 0.7
+                                        else ('Client', ''))
+                rows.append((
+                    f"FACT-{number:07d}", moment.strftime('%Y-%m-%d'), client_name, contact,
+                    json.dumps(items), sum(item['total'] for item in items),
+                    rng.choice(PAYMENTS), '', moment.isoformat(sep=' ', timespec='seconds'),
+                ))
+            with conn:
+                conn.executemany('''
+                    INSERT INTO receipts (receipt_number, date, client_name, client_contact,
+                                          items, total, payment_method, notes, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+
+        with conn:
+            conn.executemany('UPDATE products SET count = ? WHERE name = ?',
+                             [(count, name) for name, count in usage.items()])
+            conn.execute("UPDATE settings SET value = ? WHERE key = 'receipt_counter'",
+                         (str(receipts + 1),))
+    finally:
+        conn.close()
+
+    db.rebuild_sales_totals()
+    db.backfill_clients()
+
+    return {
+        'products': products,
+        'receipts': receipts,
+        'lines': lines_written,
+        'clients': len(client_pool),
+        'duration': time.perf_counter() - started,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', required=True, help="Base à créer ou compléter")
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--receipts', type=int, default=20000)
+    parser.add_argument('--clients', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    summary = populate(Database(args.db), args.products, args.receipts, args.clients, args.seed)
+    print(f"{summary['products']} produits, {summary['receipts']} reçus "
+          f"({summary['lines']} lignes), {summary['clients']} clients "
+          f"en {summary['duration']:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
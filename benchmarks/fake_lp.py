@@ -0,0 +1,98 @@
+"""
+Remplaçant de la commande `lp` pour les essais sans imprimante ni CUPS
+Accepte les mêmes options (-d, -t, -o), lit le document sur stdin ou dans
+les fichiers passés en argument et répond comme lp ("request id is ...").
+
+Variables d'environnement :
+- FAKE_LP_SPOOL : dossier où écrire les documents reçus (sinon ils sont ignorés)
+- FAKE_LP_DELAY : délai simulé de traitement en secondes
+- FAKE_LP_FAIL : si défini, échoue avec ce message
+- FAKE_LP_FILTERS : si défini, les documents non « raw » sont convertis en PDF
+  (reportlab, Courier) comme le ferait le filtre texttopdf de CUPS ; les
+  documents envoyés avec -o raw sont transmis tels quels
+- FAKE_LP_TIMINGS : fichier où ajouter, une ligne JSON par travail, le temps
+  de chargement de reportlab (import_ms, payé par chaque appel du faux lp
+  mais pas par le vrai filtre CUPS) et celui de la conversion (filter_ms)
+
+Usage (paramètre laser_lp_command) : python -m benchmarks.fake_lp
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+
+def text_to_pdf(data, cpi=12, lpi=8):
+    """Équivalent simplifié de texttopdf : une page par saut de page, Courier à cpi/lpi"""
+    from io import BytesIO
+    from reportlab.lib.pagesizes import A6
+    from reportlab.pdfgen import canvas
+
+    output = BytesIO()
+    pdf = canvas.Canvas(output, pagesize=A6)
+    width, height = A6
+    size = 72 / cpi / 0.6
+    for page in data.decode('utf-8', errors='replace').split('\f'):
+        pdf.setFont('Courier', size)
+        y = height - 18
+        for line in page.split('\n'):
+            pdf.drawString(14, y, line)
+            y -= 72 / lpi
+        pdf.showPage()
+    pdf.save()
+    return output.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='lp', add_help=False)
+    parser.add_argument('-d', dest='destination', default='default')
+    parser.add_argument('-t', dest='title', default='')
+    parser.add_argument('-o', dest='options', action='append', default=[])
+    parser.add_argument('files', nargs='*')
+    args = parser.parse_args(argv)
+
+    if os.environ.get('FAKE_LP_FAIL'):
+        sys.stderr.write(f"lp: {os.environ['FAKE_LP_FAIL']}\n")
+        return 1
+
+    if args.files:
+        documents = [Path(f).read_bytes() for f in args.files]
+    else:
+        documents = [sys.stdin.buffer.read()]
+
+    import_ms = filter_ms = 0.0
+    if os.environ.get('FAKE_LP_FILTERS') and 'raw' not in args.options:
+        started = time.perf_counter()
+        import reportlab.pdfgen.canvas  # noqa: F401 (coût fixe du filtre, mesuré à part)
+        import_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        documents = [text_to_pdf(data) for data in documents]
+        filter_ms = (time.perf_counter() - started) * 1000
+
+    delay = float(os.environ.get('FAKE_LP_DELAY', '0'))
+    if delay:
+        time.sleep(delay)
+
+    job_id = f"{args.destination}-{uuid.uuid4().hex[:8]}"
+    spool_dir = os.environ.get('FAKE_LP_SPOOL')
+    if spool_dir:
+        Path(spool_dir).mkdir(parents=True, exist_ok=True)
+        for i, data in enumerate(documents):
+            (Path(spool_dir) / f"{job_id}_{i}.prn").write_bytes(data)
+        (Path(spool_dir) / f"{job_id}.options").write_text('\n'.join(args.options))
+
+    timings_path = os.environ.get('FAKE_LP_TIMINGS')
+    if timings_path:
+        with open(timings_path, 'a', encoding='utf-8') as timings:
+            timings.write(json.dumps({'job': job_id, 'import_ms': import_ms,
+                                      'filter_ms': filter_ms}) + '\n')
+
+    print(f"request id is {job_id} ({len(documents)} file(s))")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
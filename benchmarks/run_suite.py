@@ -0,0 +1,206 @@
+"""
+Suite de bancs d'essai de bout en bout (résultats JSON)
+Remplit une base synthétique (benchmarks.datagen) puis mesure les chemins
+critiques de l'application : recherche produits, historique, statistiques,
+enregistrement d'un reçu, PDF, mise en page laser et rendu thermique ESC/POS
+(sur une fausse imprimante USB). Les résultats JSON de deux versions se
+comparent avec --compare.
+
+Usage: python -m benchmarks.run_suite --receipts 20000 --output resultats.json
+       python -m benchmarks.run_suite --compare avant.json --output apres.json
+"""
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.datagen import populate
+from models.database import Database
+from models.laser_printer import LaserPrinter
+from models.thermal_printer import DummyThermalPrinter
+from utils.pdf_generator import ReceiptGenerator
+
+
+def measure(func, repeat, warmup=1):
+    """Exécuter func `repeat` fois (après échauffement), statistiques en ms"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'repeat': repeat,
+        'min_ms': round(samples[0], 3),
+        'median_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        'max_ms': round(samples[-1], 3),
+    }
+
+
+def sample_receipt(db, rng, items):
+    """Reçu réaliste tiré du catalogue de la base"""
+    conn = db.get_connection()
+    try:
+        catalog = conn.execute('SELECT name, unit_price FROM products').fetchall()
+    finally:
+        conn.close()
+    lines = []
+    for name, price in rng.sample(catalog, min(items, len(catalog))):
+        quantity = rng.choice((1, 2, 3, 5))
+        lines.append({'name': name, 'quantity': quantity, 'unit_price': price,
+                      'total': quantity * price})
+    return {
+        'receipt_number': 'FACT-BENCH',
+        'date': datetime.now().strftime('%Y-%m-%d'),
+        'client_name': 'Rakoto Jean',
+        'client_contact': '034 00 000 00\nAmbohipo\nAntananarivo',
+        'items': lines,
+        'total': sum(line['total'] for line in lines),
+        'payment_method': 'Espèces',
+        'notes': '',
+    }
+
+
+def run(args, workdir):
+    db = Database(workdir / 'receipts.db')
+    generated = populate(db, args.products, args.receipts, seed=args.seed)
+    settings = db.get_all_settings()
+    rng = random.Random(args.seed)
+    repeat = args.repeat
+
+    results = {}
+
+    def bench(name, func, count=repeat, **extra):
+        results[name] = {**measure(func, count), **extra}
+        print(f"{name:>38}: médiane {results[name]['median_ms']:9.3f} ms "
+              f"(p95 {results[name]['p95_ms']:.3f} ms)", file=sys.stderr)
+
+    # Base de données
+    queries = [rng.choice(['riz', 'huile', 'Sucre Petit', 'x10', '#12', 'ciment', 'zzz'])
+               for _ in range(repeat)]
+    query_iter = iter(queries * 2)
+    bench('database.search_products', lambda: db.search_products(next(query_iter)))
+    bench('database.get_all_receipts', db.get_all_receipts, count=max(repeat // 10, 3))
+    bench('database.get_statistics', db.get_statistics)
+    bench('database.get_top_products', lambda: db.get_top_products(5))
+
+    counter = iter(range(10 ** 9))
+    small = sample_receipt(db, rng, 5)
+
+    def save_small():
+        db.save_receipt({**small, 'receipt_number': f"BENCH-{next(counter):07d}"})
+
+    bench('database.save_receipt', save_small)
+
+    # Rendus
+    wholesale = sample_receipt(db, rng, args.items)
+    for label, receipt in (('5_lignes', small), (f"{args.items}_lignes", wholesale)):
+        pdf_path = workdir / f"receipt_{label}.pdf"
+        generator = ReceiptGenerator(settings)
+        bench(f"pdf.generate_receipt.{label}",
+              lambda: generator.generate_receipt(receipt, str(pdf_path)),
+              count=max(repeat // 5, 3))
+        results[f"pdf.generate_receipt.{label}"]['bytes'] = pdf_path.stat().st_size
+
+        laser = LaserPrinter(settings)
+        bench(f"laser.format_with_pagination.{label}",
+              lambda: laser._format_receipt_with_pagination(receipt))
+
+        thermal = DummyThermalPrinter(settings)
+        bench(f"thermal.print_receipt.{label}", lambda: thermal.print_receipt(receipt))
+        results[f"thermal.print_receipt.{label}"]['bytes'] = len(thermal.output)
+
+    return {
+        'suite': 'run_suite',
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'version': git_version(),
+        'environment': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+        },
+        'parameters': {
+            'products': args.products,
+            'receipts': args.receipts,
+            'items': args.items,
+            'repeat': repeat,
+            'seed': args.seed,
+            'generated_lines': generated['lines'],
+            'generation_s': round(generated['duration'], 3),
+        },
+        'results': results,
+    }
+
+
+def git_version():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True,
+                              text=True, check=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(previous, current, threshold):
+    """Afficher les écarts de médiane ; retourne le nombre de régressions"""
+    regressions = 0
+    print(f"\nComparaison avec {previous.get('version')} ({previous.get('created_at')}):",
+          file=sys.stderr)
+    for name, result in current['results'].items():
+        before = previous.get('results', {}).get(name)
+        if not before:
+            print(f"{name:>38}: nouveau", file=sys.stderr)
+            continue
+        ratio = result['median_ms'] / before['median_ms'] if before['median_ms'] else 1.0
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  ⚠️ RÉGRESSION'
+            regressions += 1
+        elif ratio < 1 - threshold:
+            flag = '  ✅'
+        print(f"{name:>38}: {before['median_ms']:9.3f} → {result['median_ms']:9.3f} ms "
+              f"(x{ratio:.2f}){flag}", file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--receipts', type=int, default=20000)
+    parser.add_argument('--items', type=int, default=120,
+                        help="Lignes de la facture de gros mesurée")
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Fichier JSON de résultats (sinon sortie standard)")
+    parser.add_argument('--compare', help="Résultats JSON d'une version précédente")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="Écart relatif de médiane signalé comme régression")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='bench_suite_') as workdir:
+        report = run(args, Path(workdir))
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text + '\n', encoding='utf-8')
+    else:
+        print(text)
+
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        if compare(previous, report, args.threshold):
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
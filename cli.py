@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Générateur de Reçus Pro - ligne de commande
+Opérations de back-office sans interface graphique (traitements de nuit, scripts)
+
+Exemples :
+  python cli.py create ventes.jsonl --output none
+  cat ventes.csv | python cli.py create - --format csv
+  python cli.py search RAKOTO --ids | python cli.py reprint - --printer laser
+  python cli.py regenerate 12 13 14
+  python cli.py stats --json
+  python cli.py export recus.csv --from 2026-01-01 --to 2026-01-31
+
+Entrée de `create` :
+  JSONL (un reçu par ligne) ou tableau JSON :
+    {"client_name": "...", "client_contact": "...", "payment_method": "Espèces",
+     "notes": "", "items": [{"name": "Riz", "quantity": 2, "unit_price": 1500}]}
+  CSV (séparateur ; ou ,) : une ligne par article, colonnes name, quantity,
+  unit_price et optionnellement receipt_number (regroupe les lignes consécutives
+  d'un même reçu), client_name, client_contact, payment_method, notes
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Ajouter le répertoire parent au path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from models.database import Database
+from utils.pdf_generator import ReceiptGenerator
+from controllers.receipt_controller import ReceiptController
+
+RECEIPT_FIELDS = ('client_name', 'client_contact', 'payment_method', 'notes')
+
+
+# ========== LECTURE DES REÇUS ==========
+
+def _number(value):
+    if isinstance(value, (int, float)):
+        return value
+    # Espaces (y compris insécables) des milliers et virgule décimale acceptés
+    return float(''.join(str(value).split()).replace(',', '.'))
+
+
+def iter_json_receipts(stream):
+    """Reçus JSON : un par ligne (lu au fil de l'eau) ou tableau complet"""
+    first = ''
+    for first in stream:
+        if first.strip():
+            break
+    if first.lstrip().startswith('['):
+        yield from json.loads(first + stream.read())
+        return
+    if first.strip():
+        yield json.loads(first)
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_csv_receipts(stream):
+    """Reçus CSV : lignes d'articles regroupées par receipt_number consécutifs"""
+    header = stream.readline().lstrip('\ufeff')
+    delimiter = ';' if header.count(';') >= header.count(',') else ','
+    columns = [column.strip().lower() for column in next(csv.reader([header], delimiter=delimiter))]
+    missing = {'name', 'quantity', 'unit_price'} - set(columns)
+    if missing:
+        raise ValueError(f"Colonnes manquantes: {', '.join(sorted(missing))}")
+
+    current_key, receipt = None, None
+    for row in csv.reader(stream, delimiter=delimiter):
+        if not any(cell.strip() for cell in row):
+            continue
+        values = dict(zip(columns, row))
+        key = values.get('receipt_number') or None
+        if receipt is None or key is None or key != current_key:
+            if receipt:
+                yield receipt
+            receipt = {field: values.get(field, '') for field in RECEIPT_FIELDS}
+            receipt['items'] = []
+            current_key = key
+        receipt['items'].append({'name': values['name'].strip(),
+                                 'quantity': values['quantity'],
+                                 'unit_price': values['unit_price']})
+    if receipt:
+        yield receipt
+
+
+def _open_input(path):
+    if path == '-':
+        return sys.stdin
+    return open(path, encoding='utf-8-sig', newline='')
+
+
+def _read_ids(values):
+    """Identifiants en arguments ou sur l'entrée standard (-)"""
+    for value in values:
+        if value == '-':
+            for line in sys.stdin:
+                line = line.split('\t', 1)[0].strip()
+                if line:
+                    yield int(line)
+        else:
+            yield int(value)
+
+
+# ========== COMMANDES ==========
+
+def cmd_create(controller, args):
+    fmt = args.format or ('csv' if str(args.input).lower().endswith('.csv') else 'json')
+    create = {
+        'pdf': controller.save_and_generate_receipt,
+        'thermal': controller.print_thermal_receipt,
+        'laser': controller.print_laser_receipt,
+        'none': controller.save_receipt,
+    }[args.output]
+
+    created = errors = 0
+    started = time.perf_counter()
+    stream = _open_input(args.input)
+    try:
+        receipts = iter_csv_receipts(stream) if fmt == 'csv' else iter_json_receipts(stream)
+        for position, receipt in enumerate(receipts, 1):
+            controller.clear_current_items()
+            try:
+                for item in receipt.get('items', []):
+                    ok, result = controller.add_item(str(item['name']).strip(),
+                                                     _number(item['quantity']),
+                                                     _number(item['unit_price']))
+                    if not ok:
+                        raise ValueError(f"{result} ({item.get('name')})")
+                fields = {field: receipt.get(field) or '' for field in RECEIPT_FIELDS}
+                fields['payment_method'] = fields['payment_method'] or 'Espèces'
+                success, message = create(**fields)
+            except (KeyError, TypeError, ValueError) as e:
+                success, message = False, f"Reçu invalide: {e}"
+
+            if success:
+                created += 1
+                print(message, flush=args.unbuffered)
+            else:
+                errors += 1
+                controller.clear_current_items()
+                print(f"#{position}: {message}", file=sys.stderr)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+    _report_throughput(created, errors, started, 'reçus créés')
+    return 1 if errors else 0
+
+
+def cmd_reprint(controller, args):
+    ids = list(_read_ids(args.ids))
+    started = time.perf_counter()
+    errors = 0
+
+    if args.printer == 'laser':
+        # Un seul travail CUPS pour tout le lot
+        success, result = controller.reprint_laser_receipts(ids)
+        if not success:
+            print(result, file=sys.stderr)
+            return 1
+        job = result.result()
+        print(f"Travail laser {job.job_id or '-'} : {job.status} ({job.documents} reçus) {job.message}")
+        errors = 0 if job.ok else len(ids)
+    else:
+        for receipt_id in ids:
+            success, message = controller.reprint_thermal_receipt(receipt_id)
+            print(message if success else f"{receipt_id}: {message}",
+                  file=sys.stdout if success else sys.stderr)
+            errors += not success
+
+    _report_throughput(len(ids) - errors, errors, started, 'reçus réimprimés')
+    return 1 if errors else 0
+
+
+def cmd_regenerate(controller, args):
+    started = time.perf_counter()
+    done = errors = 0
+    for receipt_id in _read_ids(args.ids):
+        success, message = controller.regenerate_receipt(receipt_id)
+        if success:
+            done += 1
+            print(message)
+        else:
+            errors += 1
+            print(f"{receipt_id}: {message}", file=sys.stderr)
+    _report_throughput(done, errors, started, 'PDF régénérés')
+    return 1 if errors else 0
+
+
+def cmd_search(controller, args):
+    if args.products:
+        columns = ('name', 'unit_price', 'count', 'last_used')
+        rows = controller.search_products(args.query)
+    elif args.clients:
+        columns = ('id', 'name', 'contact', 'receipt_count')
+        rows = controller.search_clients(args.query, limit=args.limit)
+    else:
+        columns = ('id', 'receipt_number', 'date', 'client_name', 'total', 'created_at')
+        rows = controller.search_receipts(args.query)[:args.limit]
+
+    if args.ids:
+        for row in rows:
+            print(row[0])
+    elif args.json:
+        print(json.dumps([dict(zip(columns, row)) for row in rows],
+                         ensure_ascii=False, indent=2, default=str))
+    else:
+        for row in rows:
+            print('\t'.join('' if value is None else str(value) for value in row))
+    return 0
+
+
+def cmd_stats(controller, args):
+    stats = controller.get_statistics()
+    stats['top_products'] = [
+        {'name': name, 'quantity_sold': quantity, 'total_sold': total}
+        for name, quantity, total in controller.get_top_products(args.top)
+    ]
+    if args.json:
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+        return 0
+
+    currency = controller.db.get_setting('currency', 'Ar')
+    print(f"Ventes totales  : {stats['total_sales']:,.0f} {currency}")
+    print(f"Reçus           : {stats['total_receipts']}")
+    print(f"Vente moyenne   : {stats['avg_sale']:,.0f} {currency}")
+    print(f"Produits        : {stats['unique_products']}")
+    for rank, product in enumerate(stats['top_products'], 1):
+        print(f"  {rank}. {product['name']} — {product['quantity_sold'] or 0:g} vendus, "
+              f"{product['total_sold']:,.0f} {currency}")
+    return 0
+
+
+def cmd_export(controller, args):
+    started = time.perf_counter()
+    success, result = controller.export_receipts(
+        args.output, fmt=args.format, kind=args.kind, date_from=args.date_from,
+        date_to=args.date_to, incremental=args.incremental, cursor_name=args.cursor)
+    if not success:
+        print(result, file=sys.stderr)
+        return 1
+    print(result['path'])
+    _report_throughput(result['rows'], 0, started, 'lignes exportées')
+    return 0
+
+
+def _report_throughput(done, errors, started, label):
+    duration = time.perf_counter() - started
+    rate = done / duration if duration > 0 else 0
+    print(f"{done} {label} en {duration:.2f} s ({rate:,.1f}/s)" +
+          (f", {errors} erreur(s)" if errors else ''), file=sys.stderr)
+
+
+# ========== POINT D'ENTRÉE ==========
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog='\n'.join(__doc__.strip().splitlines()[2:]))
+    parser.add_argument('--db', default="data/receipts.db", help="Base de données à utiliser")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    create = commands.add_parser('create', help="Créer des reçus depuis du JSON ou du CSV")
+    create.add_argument('input', nargs='?', default='-', help="Fichier (- : entrée standard)")
+    create.add_argument('--format', choices=('json', 'csv'),
+                        help="Format de l'entrée (défaut : d'après l'extension, sinon JSON)")
+    create.add_argument('--output', choices=('pdf', 'thermal', 'laser', 'none'), default='pdf',
+                        help="PDF, impression thermique ou laser, ou enregistrement seul")
+    create.add_argument('--unbuffered', action='store_true',
+                        help="Écrire chaque reçu créé immédiatement (suivi en direct)")
+    create.set_defaults(handler=cmd_create)
+
+    reprint = commands.add_parser('reprint', help="Réimprimer des reçus (identifiants ou -)")
+    reprint.add_argument('ids', nargs='+')
+    reprint.add_argument('--printer', choices=('thermal', 'laser'), default='laser')
+    reprint.set_defaults(handler=cmd_reprint)
+
+    regenerate = commands.add_parser('regenerate', help="Régénérer les PDF de reçus (identifiants ou -)")
+    regenerate.add_argument('ids', nargs='+')
+    regenerate.set_defaults(handler=cmd_regenerate)
+
+    search = commands.add_parser('search', help="Rechercher des reçus, produits ou clients")
+    search.add_argument('query')
+    target = search.add_mutually_exclusive_group()
+    target.add_argument('--products', action='store_true')
+    target.add_argument('--clients', action='store_true')
+    search.add_argument('--limit', type=int, default=100)
+    output = search.add_mutually_exclusive_group()
+    output.add_argument('--json', action='store_true')
+    output.add_argument('--ids', action='store_true', help="Identifiants seuls (pour reprint -)")
+    search.set_defaults(handler=cmd_search)
+
+    stats = commands.add_parser('stats', help="Statistiques de vente")
+    stats.add_argument('--top', type=int, default=5)
+    stats.add_argument('--json', action='store_true')
+    stats.set_defaults(handler=cmd_stats)
+
+    export = commands.add_parser('export', help="Exporter l'historique")
+    export.add_argument('output')
+    export.add_argument('--format', choices=('csv', 'jsonl', 'columnar'), default='csv')
+    export.add_argument('--kind', choices=('receipts', 'items'), default='receipts')
+    export.add_argument('--from', dest='date_from', help="Date de début (AAAA-MM-JJ)")
+    export.add_argument('--to', dest='date_to', help="Date de fin (AAAA-MM-JJ)")
+    export.add_argument('--incremental', action='store_true')
+    export.add_argument('--cursor', default='default', help="Nom du curseur incrémental")
+    export.set_defaults(handler=cmd_export)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    db = Database(args.db)
+    # Journal des paniers privé : ne pas toucher aux ventes en attente de la caisse
+    with tempfile.TemporaryDirectory(prefix='receipts_cli_') as workdir:
+        controller = ReceiptController(db, ReceiptGenerator(db.get_all_settings()),
+                                       cart_journal_path=Path(workdir) / 'cart_journal.jsonl')
+        try:
+            return args.handler(controller, args)
+        finally:
+            controller.shutdown()
+
+
+if __name__ == "__main__":
+    # Exécutable PyInstaller : les processus des relevés (spawn) relancent ce point d'entrée
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -2,56 +2,262 @@
 Contrôleur principal de l'application
 Version avec formatage intelligent des noms et support adresse
 """
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import os
+import sqlite3
 from pathlib import Path
-from utils.name_formatter import format_client_name
+from utils import instrumentation
+from utils.instrumentation import instrument
+from utils.name_formatter import NameFormatter, format_client_name
+from models.backup_manager import BackupManager
+from models.cart import Cart
+from models.cart_journal import CartJournal
+from models.export_manager import ExportManager
+from models.stock_manager import StockManager
 
+@instrument('controller')
 class ReceiptController:
-    def __init__(self, database, pdf_generator):
+    def __init__(self, database, pdf_generator, cart_journal_path=None, exports_dir='exports'):
         self.db = database
         self.pdf_generator = pdf_generator
-        self.current_items = []
+        self.sku_map = None
+        self.backup_manager = BackupManager(database)
+        self.export_manager = ExportManager(database, exports_dir)
+        self.stock_manager = StockManager(database)
+        # Points de contrôle du stock sur la tâche de fond des sauvegardes
+        self.backup_manager.add_task(self.stock_manager.create_checkpoints)
+        self.report_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='reports')
+        NameFormatter.set_extra_keywords(database.get_setting('organization_keywords', ''))
+        
+        # Mesure des latences (désactivée par défaut, sans surcoût)
+        self._configure_instrumentation()
+        
+        # Paniers (actif + en attente), restaurés depuis le journal après un plantage
+        # (journal séparé pour les traitements en ligne de commande, voir cli.py)
+        self.cart_journal = CartJournal(cart_journal_path or 
+                                        database.db_path.parent / 'cart_journal.jsonl')
+        self._cart_listeners = []
+        self._restore_carts()
     
     def add_item(self, name, quantity, unit_price):
-        """Ajouter un article au reçu en cours"""
+        """Ajouter un article au reçu en cours (fusionné avec une ligne identique)"""
         if not name or quantity <= 0 or unit_price <= 0:
             return False, "Données invalides"
         
-        total = quantity * unit_price
+        line, _ = self.cart.add(name, quantity, unit_price)
         
-        item = {
-            'name': name,
-            'quantity': quantity,
-            'unit_price': unit_price,
-            'total': total
-        }
+        # L'apprentissage du produit est différé : il est appliqué en lot
+        # dans la transaction d'enregistrement du reçu (voir Database.save_receipt),
+        # ce qui évite un commit par article et ignore les articles retirés.
+        
+        return True, line.to_dict()
+    
+    def scan_item(self, code):
+        """
+        Ajouter un article par code-barres (douchette en émulation clavier)
+        Recherche dans la table en mémoire, sans accès à la base ; un nouveau
+        scan du même article incrémente la quantité de sa ligne.
+        Retourne (True, (ligne, index)) ou (False, message).
+        """
+        sku = self.db.normalize_sku(code)
+        if sku is None:
+            return False, "Code-barres vide"
+        
+        if self.sku_map is None:
+            self.sku_map = self.db.get_sku_map()
         
-        self.current_items.append(item)
+        product = self.sku_map.get(sku)
+        if product is None:
+            return False, f"Code-barres inconnu: {sku}"
         
-        # Apprendre le produit
-        self.db.add_or_update_product(name, unit_price)
+        _, name, unit_price = product
+        return True, self.cart.add(name, 1, unit_price)
+    
+    # ========== PANIERS ==========
+    
+    def _restore_carts(self):
+        """Rejouer le journal des paniers : rien n'est perdu si la caisse a planté"""
+        carts, labels, clients, active, sold = self.cart_journal.replay()
         
-        return True, item
+        # Plantage après l'enregistrement du reçu : la vente est faite, le panier ne revient pas
+        for cart_id, receipt_number in sold.items():
+            if self.db.receipt_number_exists(receipt_number):
+                carts.pop(cart_id, None)
+        
+        # Les paniers vides non actifs n'ont plus d'intérêt
+        self.carts = {cart_id: cart for cart_id, cart in carts.items()
+                      if cart or cart_id == active}
+        self.cart_labels = {cart_id: label for cart_id, label in labels.items()
+                            if cart_id in self.carts}
+        self.cart_clients = {cart_id: client for cart_id, client in clients.items()
+                             if cart_id in self.carts}
+        self._next_cart_id = max(self.carts, default=0) + 1
+        
+        if active not in self.carts:
+            active = self._next_cart_id
+            self._next_cart_id += 1
+            self.carts[active] = Cart()
+        self.cart_id = active
+        self.cart = self.carts[active]
+        
+        self._compact_cart_journal()
+        for cart_id, cart in self.carts.items():
+            self.cart_journal.attach(cart_id, cart)
+    
+    def _compact_cart_journal(self):
+        self.cart_journal.open(self.carts, self.cart_labels, self.cart_clients, self.cart_id)
+    
+    def _set_cart_client(self, cart_id, client_name, client_contact):
+        """Client saisi pour une vente (journalisé, restauré à la reprise ou après un plantage)"""
+        client = (client_name.strip(), client_contact.strip())
+        if any(client):
+            if self.cart_clients.get(cart_id) != client:
+                self.cart_clients[cart_id] = client
+                self.cart_journal.append(cart_id, 'meta', name=client[0], contact=client[1])
+        elif self.cart_clients.pop(cart_id, None) is not None:
+            self.cart_journal.append(cart_id, 'meta')
+    
+    def set_cart_client(self, client_name='', client_contact=''):
+        """Client de la vente en cours, journalisé au fil de la saisie"""
+        self._set_cart_client(self.cart_id, client_name, client_contact)
+    
+    def get_cart_client(self):
+        """(nom, contact) du client de la vente active, vide si aucun"""
+        return self.cart_clients.get(self.cart_id, ('', ''))
+    
+    def subscribe_cart(self, callback):
+        """Suivre le panier actif, y compris après un changement de panier"""
+        self._cart_listeners.append(callback)
+        self.cart.subscribe(callback)
+    
+    def _switch_cart(self, cart_id):
+        """Rendre un panier actif (simple échange de référence, O(1))"""
+        previous = self.cart
+        self.cart_id = cart_id
+        self.cart = self.carts[cart_id]
+        for callback in self._cart_listeners:
+            previous.unsubscribe(callback)
+            self.cart.subscribe(callback)
+        self.cart_journal.append(cart_id, 'active')
+        for callback in self._cart_listeners:
+            callback(Cart.SWITCHED, None, None)
+    
+    def park_cart(self, label='', client_name='', client_contact=''):
+        """Mettre la vente en cours en attente (avec son client) et ouvrir un panier vide"""
+        if not self.cart:
+            return False, "Aucun article à mettre en attente"
+        
+        label = label.strip() or f"Attente {datetime.now().strftime('%H:%M')}"
+        self.cart_labels[self.cart_id] = label
+        self.cart_journal.append(self.cart_id, 'label', label=label)
+        self._set_cart_client(self.cart_id, client_name, client_contact)
+        
+        cart_id = self._next_cart_id
+        self._next_cart_id += 1
+        self.carts[cart_id] = Cart()
+        self.cart_journal.attach(cart_id, self.carts[cart_id])
+        self._switch_cart(cart_id)
+        return True, label
+    
+    def resume_cart(self, cart_id, client_name='', client_contact=''):
+        """
+        Reprendre une vente en attente ; la vente en cours est mise en attente
+        si besoin, avec le client saisi (client_name, client_contact)
+        """
+        if cart_id not in self.carts or cart_id == self.cart_id:
+            return False, "Panier introuvable"
+        
+        if not self.cart:
+            self.carts.pop(self.cart_id)
+            self.cart_labels.pop(self.cart_id, None)
+            self.cart_clients.pop(self.cart_id, None)
+            self.cart_journal.append(self.cart_id, 'drop')
+        else:
+            if self.cart_id not in self.cart_labels:
+                label = f"Attente {datetime.now().strftime('%H:%M')}"
+                self.cart_labels[self.cart_id] = label
+                self.cart_journal.append(self.cart_id, 'label', label=label)
+            self._set_cart_client(self.cart_id, client_name, client_contact)
+        
+        self._switch_cart(cart_id)
+        return True, self.cart_labels.get(cart_id, '')
+    
+    def get_parked_carts(self):
+        """Ventes en attente : (id, libellé, nombre de lignes, total)"""
+        return [(cart_id, self.cart_labels.get(cart_id, ''), len(cart), cart.total)
+                for cart_id, cart in self.carts.items()
+                if cart_id != self.cart_id and cart]
+    
+    def _save_cart_receipt(self, receipt_data):
+        """
+        Enregistrer le reçu du panier actif
+        La vente est notée dans le journal (sur disque) avant le commit : après
+        un plantage, un panier dont le reçu existe déjà n'est pas restauré
+        """
+        self.cart_journal.append(self.cart_id, 'sold', number=receipt_data['receipt_number'])
+        self.cart_journal.sync()
+        try:
+            receipt_id = self.db.save_receipt(receipt_data)
+        except Exception:
+            self.cart_journal.append(self.cart_id, 'unsold')
+            raise
+        self._remember_prices(receipt_data['items'])
+        return receipt_id
+    
+    def _remember_prices(self, items):
+        """Reporter les prix appris dans la table des codes-barres en mémoire"""
+        if not self.sku_map:
+            return
+        prices = {item['name']: item['unit_price'] for item in items}
+        for sku, (product_id, name, unit_price) in self.sku_map.items():
+            if name in prices:
+                self.sku_map[sku] = (product_id, name, prices[name])
+    
+    def set_product_sku(self, product_id, sku):
+        """Associer un code-barres à un produit"""
+        try:
+            self.db.set_product_sku(product_id, sku)
+            self.sku_map = None
+            return True, self.db.normalize_sku(sku)
+        except sqlite3.IntegrityError:
+            return False, f"Le code-barres {sku} est déjà attribué à un autre produit"
+        except Exception as e:
+            return False, f"Erreur d'enregistrement du code-barres: {str(e)}"
     
     def remove_item(self, index):
         """Retirer un article"""
-        if 0 <= index < len(self.current_items):
-            removed = self.current_items.pop(index)
-            return True, removed
-        return False, None
+        removed = self.cart.remove(index)
+        if removed is None:
+            return False, None
+        return True, removed.to_dict()
     
     def get_current_items(self):
         """Obtenir les articles actuels"""
-        return self.current_items
+        return self.cart.items()
     
     def get_current_total(self):
-        """Calculer le total actuel"""
-        return sum(item['total'] for item in self.current_items)
+        """Total actuel (tenu à jour par le panier)"""
+        return self.cart.total
     
     def clear_current_items(self):
-        """Vider les articles actuels"""
-        self.current_items = []
+        """Vider les articles actuels (vente terminée ou abandonnée)"""
+        self.cart.clear()
+        self.cart_labels.pop(self.cart_id, None)
+        self.cart_clients.pop(self.cart_id, None)
+        
+        # Vente terminée : le journal repart d'un instantané des paniers restants
+        # (sinon il grossit tant qu'une vente reste en attente)
+        self._compact_cart_journal()
+    
+    def shutdown(self):
+        """Fermeture de l'application : journal des paniers écrit sur disque"""
+        self.cart_journal.close()
+        self.backup_manager.stop_scheduler()
+        if instrumentation.is_enabled():
+            instrumentation.dump()
+        if self.db.profiler:
+            self.write_query_report()
     
     def _prepare_receipt_data(self, client_name='', client_contact='', payment_method='Espèces', notes=''):
         """Préparer les données du reçu avec formatage du nom"""
@@ -63,7 +269,7 @@ class ReceiptController:
             'date': datetime.now().strftime('%Y-%m-%d'),
             'client_name': formatted_name,
             'client_contact': client_contact,  # Peut être téléphone ou adresse
-            'items': self.current_items.copy(),
+            'items': self.cart.items(),
             'total': self.get_current_total(),
             'payment_method': payment_method,
             'notes': notes
@@ -71,20 +277,20 @@ class ReceiptController:
     
     def save_and_generate_receipt(self, client_name='', client_contact='', payment_method='Espèces', notes=''):
         """Sauvegarder et générer le reçu PDF"""
-        if not self.current_items:
+        if not self.cart:
             return False, "Aucun article à facturer"
         
         receipt_data = self._prepare_receipt_data(client_name, client_contact, payment_method, notes)
         
         # Sauvegarder dans la base de données
         try:
-            self.db.save_receipt(receipt_data)
+            receipt_id = self._save_cart_receipt(receipt_data)
         except Exception as e:
             return False, f"Erreur de sauvegarde: {str(e)}"
         
         # Générer le PDF
         try:
-            output_dir = Path('exports')
+            output_dir = self.export_manager.exports_dir
             output_dir.mkdir(exist_ok=True)
             
             filename = f"{receipt_data['receipt_number']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
@@ -94,6 +300,8 @@ class ReceiptController:
             self.pdf_generator.settings = settings
             
             self.pdf_generator.generate_receipt(receipt_data, str(output_path))
+            output_path = self.export_manager.register(
+                output_path, receipt_id, receipt_data['receipt_number'])
             
             # Vider les articles actuels
             self.clear_current_items()
@@ -103,24 +311,36 @@ class ReceiptController:
         except Exception as e:
             return False, f"Erreur de génération PDF: {str(e)}"
     
+    def save_receipt(self, client_name='', client_contact='', payment_method='Espèces', notes=''):
+        """Enregistrer le reçu en cours sans PDF ni impression (traitements par lot)"""
+        if not self.cart:
+            return False, "Aucun article à facturer"
+        
+        receipt_data = self._prepare_receipt_data(client_name, client_contact, payment_method, notes)
+        try:
+            self._save_cart_receipt(receipt_data)
+        except Exception as e:
+            return False, f"Erreur de sauvegarde: {str(e)}"
+        
+        self.clear_current_items()
+        return True, receipt_data['receipt_number']
+    
     def print_thermal_receipt(self, client_name='', client_contact='', payment_method='Espèces', notes=''):
         """Imprimer directement sur l'imprimante thermique et sauvegarder dans l'historique"""
-        if not self.current_items:
+        if not self.cart:
             return False, "Aucun article à imprimer"
         
         receipt_data = self._prepare_receipt_data(client_name, client_contact, payment_method, notes)
         
         # Sauvegarder dans la base de données AVANT l'impression
         try:
-            self.db.save_receipt(receipt_data)
+            self._save_cart_receipt(receipt_data)
         except Exception as e:
             return False, f"Erreur de sauvegarde: {str(e)}"
         
         # Imprimer sur l'imprimante thermique
         try:
-            from models.thermal_printer import ThermalPrinter
-            settings = self.db.get_all_settings()
-            printer = ThermalPrinter(settings)
+            printer = self._thermal_printer()
             
             success, message = printer.print_receipt(receipt_data)
             
@@ -139,22 +359,20 @@ class ReceiptController:
     
     def print_laser_receipt(self, client_name='', client_contact='', payment_method='Espèces', notes=''):
         """Imprimer directement sur l'imprimante laser et sauvegarder dans l'historique"""
-        if not self.current_items:
+        if not self.cart:
             return False, "Aucun article à imprimer"
         
         receipt_data = self._prepare_receipt_data(client_name, client_contact, payment_method, notes)
         
         # Sauvegarder dans la base de données AVANT l'impression
         try:
-            self.db.save_receipt(receipt_data)
+            self._save_cart_receipt(receipt_data)
         except Exception as e:
             return False, f"Erreur de sauvegarde: {str(e)}"
         
         # Imprimer sur l'imprimante laser
         try:
-            from models.laser_printer import LaserPrinter
-            settings = self.db.get_all_settings()
-            printer = LaserPrinter(settings)
+            printer = self._laser_printer()
             
             success, message = printer.print_receipt(receipt_data)
             
@@ -171,12 +389,20 @@ class ReceiptController:
             self.clear_current_items()
             return False, f"Reçu sauvegardé dans l'historique mais erreur d'impression laser:\n{str(e)}\n\nDétails:\n{error_detail}"
     
+    def _thermal_printer(self):
+        """Imprimante thermique configurée (remplacée par une imprimante factice en rejeu)"""
+        from models.thermal_printer import ThermalPrinter
+        return ThermalPrinter(self.db.get_all_settings())
+    
+    def _laser_printer(self):
+        """Imprimante laser configurée (remplacée par une imprimante factice en rejeu)"""
+        from models.laser_printer import LaserPrinter
+        return LaserPrinter(self.db.get_all_settings())
+    
     def test_thermal_printer(self):
         """Tester la connexion à l'imprimante thermique"""
         try:
-            from models.thermal_printer import ThermalPrinter
-            settings = self.db.get_all_settings()
-            printer = ThermalPrinter(settings)
+            printer = self._thermal_printer()
             return printer.check_connection()
         except Exception as e:
             return False, f"Erreur: {str(e)}"
@@ -184,9 +410,7 @@ class ReceiptController:
     def test_laser_printer(self):
         """Tester la connexion à l'imprimante laser"""
         try:
-            from models.laser_printer import LaserPrinter
-            settings = self.db.get_all_settings()
-            printer = LaserPrinter(settings)
+            printer = self._laser_printer()
             return printer.check_connection()
         except Exception as e:
             return False, f"Erreur: {str(e)}"
@@ -204,6 +428,60 @@ class ReceiptController:
     def delete_product(self, product_id):
         """Supprimer un produit"""
         self.db.delete_product(product_id)
+        self.sku_map = None
+    
+    def receive_stock(self, product_id, quantity, note=''):
+        """Entrée de stock (achat / réception)"""
+        try:
+            if quantity <= 0:
+                return False, "La quantité doit être positive"
+            self.db.record_stock_movement(product_id, 'purchase', quantity, note)
+            return True, self.db.get_stock(product_id)
+        except Exception as e:
+            return False, f"Erreur d'entrée de stock: {str(e)}"
+    
+    def adjust_stock(self, product_id, counted_quantity, note='Inventaire'):
+        """Ajuster le stock sur une quantité comptée"""
+        try:
+            return True, self.db.adjust_stock(product_id, counted_quantity, note)
+        except Exception as e:
+            return False, f"Erreur d'ajustement du stock: {str(e)}"
+    
+    def set_min_stock(self, product_id, min_stock):
+        """Définir le seuil d'alerte de stock bas"""
+        self.db.set_min_stock(product_id, min_stock)
+    
+    def get_price_history(self, product_id):
+        """Historique des prix d'un produit"""
+        return self.db.get_price_history(product_id)
+    
+    def get_low_stock_products(self):
+        """Produits sous leur seuil d'alerte"""
+        return self.db.get_low_stock_products()
+    
+    def checkpoint_stock(self):
+        """Écrire les points de contrôle du stock en retard"""
+        try:
+            return True, self.stock_manager.create_checkpoints()
+        except Exception as e:
+            return False, f"Erreur des points de contrôle du stock: {str(e)}"
+    
+    def get_stock_valuation(self, as_of):
+        """Quantités et valeur du stock à une date passée"""
+        try:
+            return True, self.stock_manager.valuation_at(as_of)
+        except Exception as e:
+            return False, f"Erreur de valorisation du stock: {str(e)}"
+    
+    def import_products(self, path, progress_callback=None):
+        """Importer un catalogue produits (CSV ou Excel)"""
+        try:
+            from models.product_importer import ProductImporter
+            report = ProductImporter(self.db).import_file(path, progress_callback)
+            self.sku_map = None
+            return True, report
+        except Exception as e:
+            return False, f"Erreur d'import: {str(e)}"
     
     def get_all_receipts(self):
         """Obtenir tous les reçus"""
@@ -213,6 +491,27 @@ class ReceiptController:
         """Rechercher des reçus"""
         return self.db.search_receipts(query)
     
+    def get_receipts_by_client(self, client_id):
+        """Obtenir les reçus d'un client"""
+        return self.db.get_receipts_by_client(client_id)
+    
+    def search_clients(self, prefix, limit=10):
+        """Rechercher des clients par début de nom"""
+        return self.db.search_clients(prefix, limit)
+    
+    def export_receipts(self, output_path, fmt='csv', kind='receipts', date_from=None, 
+                        date_to=None, incremental=False, cursor_name='default'):
+        """Exporter l'historique (CSV, JSONL ou colonnaire) en flux"""
+        try:
+            from models.receipt_exporter import ReceiptExporter
+            report = ReceiptExporter(self.db).export(
+                output_path, fmt=fmt, kind=kind, date_from=date_from, date_to=date_to,
+                incremental=incremental, cursor_name=cursor_name
+            )
+            return True, report
+        except Exception as e:
+            return False, f"Erreur d'export: {str(e)}"
+    
     def get_receipt_details(self, receipt_id):
         """Obtenir les détails d'un reçu"""
         return self.db.get_receipt_by_id(receipt_id)
@@ -229,7 +528,7 @@ class ReceiptController:
             return False, "Reçu introuvable"
         
         try:
-            output_dir = Path('exports')
+            output_dir = self.export_manager.exports_dir
             output_dir.mkdir(exist_ok=True)
             
             filename = f"{receipt_data['receipt_number']}_regenere_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
@@ -240,11 +539,35 @@ class ReceiptController:
             
             self.pdf_generator.generate_receipt(receipt_data, str(output_path))
             
+            # Contenu identique à un export existant : le fichier existant est réutilisé
+            output_path = self.export_manager.register(
+                output_path, receipt_id, receipt_data['receipt_number'])
+            
             return True, str(output_path)
         
         except Exception as e:
             return False, f"Erreur: {str(e)}"
     
+    def get_receipt_pdf(self, receipt_id):
+        """Obtenir le PDF d'un reçu : fichier existant ou régénération"""
+        existing = self.export_manager.find_existing(receipt_id)
+        if existing:
+            return True, existing
+        return self.regenerate_receipt(receipt_id)
+    
+    def maintain_exports(self):
+        """
+        Indexer les nouveaux exports puis appliquer la rétention, seulement si
+        elle a été activée (les PDF sont archivés ou supprimés : jamais par défaut)
+        """
+        try:
+            self.export_manager.reindex()
+            if self.db.get_setting('exports_retention_enabled', 'false') != 'true':
+                return True, None
+            return True, self.export_manager.enforce_retention()
+        except Exception as e:
+            return False, f"Erreur de maintenance des exports: {str(e)}"
+    
     def reprint_thermal_receipt(self, receipt_id):
         """Réimprimer un reçu existant sur l'imprimante thermique"""
         receipt_data = self.db.get_receipt_by_id(receipt_id)
@@ -253,9 +576,7 @@ class ReceiptController:
             return False, "Reçu introuvable"
         
         try:
-            from models.thermal_printer import ThermalPrinter
-            settings = self.db.get_all_settings()
-            printer = ThermalPrinter(settings)
+            printer = self._thermal_printer()
             
             success, message = printer.print_receipt(receipt_data)
             
@@ -277,9 +598,7 @@ class ReceiptController:
             return False, "Reçu introuvable"
         
         try:
-            from models.laser_printer import LaserPrinter
-            settings = self.db.get_all_settings()
-            printer = LaserPrinter(settings)
+            printer = self._laser_printer()
             
             success, message = printer.print_receipt(receipt_data)
             
@@ -293,25 +612,176 @@ class ReceiptController:
             error_detail = traceback.format_exc()
             return False, f"Erreur de réimpression laser:\n{str(e)}\n\nDétails:\n{error_detail}"
     
+    def reprint_laser_receipts(self, receipt_ids, callback=None):
+        """
+        Réimprimer plusieurs reçus en un seul travail laser (en tâche de fond)
+        Retourne (True, Future[PrintJob]) ou (False, message)
+        """
+        receipts = [self.db.get_receipt_by_id(receipt_id) for receipt_id in receipt_ids]
+        receipts = [receipt for receipt in receipts if receipt]
+        
+        if not receipts:
+            return False, "Reçu introuvable"
+        
+        try:
+            printer = self._laser_printer()
+            return True, printer.submit_receipts(receipts, callback=callback)
+        except Exception as e:
+            return False, f"Erreur de réimpression laser: {str(e)}"
+    
+    def generate_client_statement(self, client_id, date_from, date_to):
+        """Générer le relevé de compte d'un client sur une période"""
+        client = self.db.get_client(client_id)
+        if not client:
+            return False, "Client introuvable"
+        
+        try:
+            from utils.statement_generator import StatementGenerator
+            generator = StatementGenerator(self.db)
+            output_dir = self.export_manager.exports_dir / "statements"
+            path = output_dir / generator.statement_filename(client, date_from, date_to)
+            return True, generator.generate_statement(client, date_from, date_to, path)
+        except Exception as e:
+            return False, f"Erreur de génération du relevé: {str(e)}"
+    
+    def generate_month_end_statements(self, year, month, workers=None, progress_callback=None):
+        """
+        Générer les relevés de tous les clients pour un mois (en tâche de fond)
+        Retourne (True, Future[rapport]) ou (False, message)
+        """
+        try:
+            from utils.statement_generator import StatementGenerator
+            generator = StatementGenerator(self.db)
+            date_from, date_to = generator.month_bounds(year, month)
+            output_dir = self.export_manager.exports_dir / "statements" / f"{year:04d}-{month:02d}"
+            return True, self.report_executor.submit(
+                generator.generate_all, date_from, date_to, output_dir, workers,
+                progress_callback=progress_callback)
+        except Exception as e:
+            return False, f"Erreur de génération des relevés: {str(e)}"
+    
     def get_statistics(self):
         """Obtenir les statistiques"""
         return self.db.get_statistics()
     
     def get_top_products(self, limit=5):
-        """Obtenir les produits les plus vendus"""
+        """Produits au plus fort chiffre d'affaires"""
         return self.db.get_top_products(limit)
     
     def save_settings(self, settings_dict):
         """Sauvegarder les paramètres"""
         for key, value in settings_dict.items():
             self.db.set_setting(key, value)
+        if 'organization_keywords' in settings_dict:
+            NameFormatter.set_extra_keywords(settings_dict['organization_keywords'])
     
     def get_settings(self):
         """Obtenir les paramètres"""
         return self.db.get_all_settings()
     
+    # ========== DIAGNOSTICS ==========
+    
+    def _configure_instrumentation(self):
+        """Journal à rotation dans data/logs/ et activation selon les paramètres"""
+        try:
+            slow_ms = float(self.db.get_setting('instrumentation_slow_ms', '500'))
+        except ValueError:
+            slow_ms = 500.0
+        instrumentation.configure(self.db.db_path.parent / 'logs' / 'performance.log', 
+                                  slow_ms=slow_ms)
+        if self.db.get_setting('instrumentation_enabled', 'false') == 'true':
+            instrumentation.enable()
+        if self.db.get_setting('sql_profiling_enabled', 'false') == 'true':
+            self.set_query_profiling(True)
+    
+    def set_instrumentation(self, enabled):
+        """Activer ou désactiver la mesure des latences (mémorisé dans les paramètres)"""
+        if enabled:
+            instrumentation.enable()
+        else:
+            instrumentation.disable()
+        self.db.set_setting('instrumentation_enabled', 'true' if enabled else 'false')
+    
+    def get_diagnostics(self, recent_limit=50):
+        """Histogrammes de latence par méthode et derniers appels"""
+        return {
+            'enabled': instrumentation.is_enabled(),
+            'sql_enabled': self.db.profiler is not None,
+            'methods': instrumentation.snapshot(),
+            'recent': instrumentation.recent(recent_limit),
+        }
+    
+    def reset_diagnostics(self):
+        instrumentation.reset()
+        if self.db.profiler:
+            self.db.disable_query_profiling()
+            self.set_query_profiling(True)
+    
+    def set_query_profiling(self, enabled):
+        """Tracer les requêtes SQL (durée, lignes, plans) des nouvelles connexions"""
+        if enabled:
+            try:
+                slow_ms = float(self.db.get_setting('sql_slow_ms', '50'))
+            except ValueError:
+                slow_ms = 50.0
+            self.db.enable_query_profiling(slow_ms=slow_ms)
+        else:
+            self.db.disable_query_profiling()
+        self.db.set_setting('sql_profiling_enabled', 'true' if enabled else 'false')
+    
+    def write_query_report(self):
+        """Rapport SQL (instructions, requêtes lentes, plans) à joindre à un ticket"""
+        if not self.db.profiler:
+            return False, "Le traçage SQL n'est pas activé"
+        path = self.db.db_path.parent / 'logs' / f"sql_report_{datetime.now():%Y%m%d_%H%M%S}.txt"
+        try:
+            return True, str(self.db.profiler.write_report(path))
+        except (OSError, sqlite3.Error) as e:
+            return False, f"Erreur du rapport SQL: {str(e)}"
+    
+    def dump_diagnostics(self):
+        """Écrire les mesures courantes dans data/logs/performance.log"""
+        try:
+            count = instrumentation.dump()
+        except OSError as e:
+            return False, f"Erreur d'écriture du journal: {str(e)}"
+        if not count:
+            return False, "Aucune mesure à écrire"
+        return True, f"{count} méthode(s) écrite(s) dans {self.db.db_path.parent / 'logs' / 'performance.log'}"
+    
+    def start_backup_schedule(self):
+        """
+        Démarrer la tâche de fond : sauvegardes automatiques si elles sont
+        activées, points de contrôle du stock dans tous les cas
+        """
+        self.backup_manager.stop_scheduler()
+        self.backup_manager.start_scheduler(
+            backups=self.db.get_setting('backup_enabled', 'true') == 'true')
+    
+    def backup_database(self, compact=False):
+        """Sauvegarder la base de données maintenant"""
+        try:
+            return True, self.backup_manager.backup_now(compact=compact)
+        except Exception as e:
+            return False, f"Erreur de sauvegarde: {str(e)}"
+    
+    def compact_database(self):
+        """Compacter la base de données (VACUUM + ANALYZE)"""
+        try:
+            return True, self.backup_manager.compact()
+        except Exception as e:
+            return False, f"Erreur de compactage: {str(e)}"
+    
+    def archive_old_receipts(self, older_than_months=None):
+        """Archiver les reçus anciens dans des bases annuelles"""
+        try:
+            return True, self.backup_manager.archive_receipts(older_than_months)
+        except Exception as e:
+            return False, f"Erreur d'archivage: {str(e)}"
+    
     def clear_all_data(self):
         """Effacer toutes les données"""
         self.db.clear_all_receipts()
         self.db.clear_all_products()
+        self.sku_map = None
         self.clear_current_items()
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""
+Enregistrement et rejeu de sessions de caisse
+- SessionRecorder : chaque appel du contrôleur qui modifie le panier, imprime
+  ou enregistre un reçu est ajouté à un fichier JSONL (une ligne par appel)
+- replay_session : rejoue le fichier sur un contrôleur, sans interface Tk,
+  avec les durées par opération (profilage reproductible sur un serveur)
+- HeadlessController : impressions vers des imprimantes factices
+  (ESC/POS en mémoire, spouleur laser qui consomme puis jette le contenu),
+  PDF écrits dans un dossier d'exports privé
+"""
+import functools
+import json
+import time
+
+from controllers.receipt_controller import ReceiptController
+from models.laser_printer import LaserPrinter
+from models.print_spooler import NullSpooler
+
+# Opérations enregistrées (les lectures pures sont rejouées pour leur coût)
+RECORDED_METHODS = (
+    'add_item', 'scan_item', 'remove_item', 'clear_current_items',
+    'park_cart', 'resume_cart', 'search_products', 'search_clients',
+    'save_and_generate_receipt', 'print_thermal_receipt', 'print_laser_receipt',
+)
+
+
+class SessionRecorder:
+    def __init__(self, controller, path):
+        self.controller = controller
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+        self._started = time.monotonic()
+        for name in RECORDED_METHODS:
+            setattr(controller, name, self._wrap(name))
+
+    def _wrap(self, name):
+        # Méthode relue sur la classe à chaque appel (instrumentation activable en cours de route)
+        @functools.wraps(getattr(type(self.controller), name))
+        def recorded(*args, **kwargs):
+            record = {'t': round(time.monotonic() - self._started, 3), 'op': name,
+                      'args': list(args), 'kwargs': kwargs}
+            if name == 'resume_cart' and args:
+                # Les numéros de panier changent d'une base à l'autre : on garde le libellé
+                record['label'] = self.controller.cart_labels.get(args[0], '')
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._file.flush()
+            return getattr(type(self.controller), name)(self.controller, *args, **kwargs)
+        return recorded
+
+    def close(self):
+        for name in RECORDED_METHODS:
+            self.controller.__dict__.pop(name, None)
+        self._file.close()
+
+
+class HeadlessController(ReceiptController):
+    """
+    Contrôleur sans matériel : impressions produites en mémoire
+    cart_journal_path : journal des paniers privé, celui de la caisse
+    (ventes en attente) n'est ni relu ni réécrit par le rejeu
+    exports_dir : dossier des PDF rejoués, jamais le exports/ de la caisse
+    (reindex y rattacherait les faux PDF aux vrais reçus par leur numéro)
+    """
+
+    def __init__(self, database, pdf_generator, cart_journal_path, exports_dir):
+        super().__init__(database, pdf_generator, cart_journal_path=cart_journal_path,
+                         exports_dir=exports_dir)
+        self.thermal_bytes = 0
+        self.laser_spooler = NullSpooler()
+
+    def maintain_exports(self):
+        """Pas d'index ni de rétention : les exports du rejeu sont temporaires"""
+        return True, None
+
+    def _thermal_printer(self):
+        from models.thermal_printer import DummyThermalPrinter
+        return DummyThermalPrinter(self.db.get_all_settings(), on_output=self._count_thermal)
+
+    def _count_thermal(self, output):
+        self.thermal_bytes += len(output)
+
+    def _laser_printer(self):
+        return LaserPrinter(self.db.get_all_settings(), spooler=self.laser_spooler)
+
+
+def load_session(path):
+    with open(path, encoding='utf-8') as session:
+        return [json.loads(line) for line in session if line.strip()]
+
+
+def replay_session(controller, records, repeat=1):
+    """
+    Rejouer une session enregistrée, le plus vite possible
+    Retourne {opération: {'count', 'failures', 'total_ms', 'max_ms'}} et la durée totale
+    """
+    stats = {}
+    started = time.perf_counter()
+
+    for _ in range(repeat):
+        for record in records:
+            op = record['op']
+            args = list(record.get('args', []))
+            if op == 'resume_cart' and record.get('label'):
+                args[:1] = [next((cart_id for cart_id, label in controller.cart_labels.items()
+                                  if label == record['label']), args[0] if args else None)]
+
+            begin = time.perf_counter()
+            result = getattr(controller, op)(*args, **record.get('kwargs', {}))
+            elapsed = (time.perf_counter() - begin) * 1000
+
+            entry = stats.setdefault(op, {'count': 0, 'failures': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            entry['count'] += 1
+            entry['total_ms'] += elapsed
+            entry['max_ms'] = max(entry['max_ms'], elapsed)
+            if isinstance(result, tuple) and result and result[0] is False:
+                entry['failures'] += 1
+
+    return stats, time.perf_counter() - started
+
+
+def format_replay_report(stats, duration):
+    lines = [f"{'opération':<28} {'appels':>7} {'échecs':>7} {'moy ms':>9} {'max ms':>9} {'total ms':>10}"]
+    for op, entry in sorted(stats.items(), key=lambda item: item[1]['total_ms'], reverse=True):
+        lines.append(f"{op:<28} {entry['count']:>7} {entry['failures']:>7} "
+                     f"{entry['total_ms'] / entry['count']:>9.2f} {entry['max_ms']:>9.2f} "
+                     f"{entry['total_ms']:>10.1f}")
+    lines.append(f"Durée totale : {duration:.2f} s")
+    return '\n'.join(lines)
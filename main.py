@@ -2,9 +2,20 @@
 """
 Générateur de Reçus Pro
 Application desktop pour générer des reçus thermiques
+
+Options de diagnostic :
+  --profile             cProfile pendant toute la session (stats écrites à la fermeture)
+  --trace-memory        tracemalloc : principales allocations et pic écrits à la fermeture
+  --record FICHIER      enregistrer les opérations de caisse de la session (JSONL)
+  --replay FICHIER      rejouer une session enregistrée sans interface ni imprimante
 """
 
+import argparse
+import multiprocessing
+import sqlite3
 import sys
+import tempfile
+from datetime import datetime
 from pathlib import Path
 
 # Ajouter le répertoire parent au path
@@ -13,29 +24,177 @@ sys.path.insert(0, str(Path(__file__).parent))
 from models.database import Database
 from utils.pdf_generator import ReceiptGenerator
 from controllers.receipt_controller import ReceiptController
-from views.main_window import MainWindow
 
-def main():
-    """Point d'entrée principal de l'application"""
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Générateur de Reçus Pro")
+    parser.add_argument('--db', default="data/receipts.db", help="Base de données à utiliser")
+    parser.add_argument('--profile', nargs='?', const='', metavar='FICHIER',
+                        help="Profiler la session avec cProfile (.prof + résumé .txt)")
+    parser.add_argument('--trace-memory', nargs='?', const='', metavar='FICHIER',
+                        help="Suivre les allocations avec tracemalloc")
+    parser.add_argument('--record', metavar='FICHIER',
+                        help="Enregistrer les opérations de caisse (pour --replay)")
+    parser.add_argument('--replay', metavar='FICHIER',
+                        help="Rejouer une session enregistrée, sans interface, sur une copie "
+                             "temporaire de --db (la base n'est pas modifiée)")
+    parser.add_argument('--repeat', type=int, default=1, help="Nombre de rejeux de la session")
+    return parser.parse_args(argv)
+
+
+def run_app(args):
+    """Lancer l'application graphique"""
     print("🚀 Démarrage de l'application...")
-    
+
     # Initialiser la base de données
-    db = Database("data/receipts.db")
+    db = Database(args.db)
     print("✅ Base de données initialisée")
-    
+
     # Initialiser le générateur PDF
     settings = db.get_all_settings()
     pdf_generator = ReceiptGenerator(settings)
     print("✅ Générateur PDF initialisé")
-    
+
     # Initialiser le contrôleur
     controller = ReceiptController(db, pdf_generator)
     print("✅ Contrôleur initialisé")
-    
+
+    recorder = None
+    if args.record:
+        from controllers.session_replay import SessionRecorder
+        recorder = SessionRecorder(controller, args.record)
+        print(f"⏺️ Enregistrement de la session dans {args.record}")
+
+    # Sauvegardes automatiques et points de contrôle du stock en tâche de fond
+    # (au lancement, puis à chaque début de période tant que la caisse reste ouverte)
+    controller.start_backup_schedule()
+
+    # Index et rétention du dossier exports/
+    controller.maintain_exports()
+
     # Créer et lancer l'interface
+    from views.main_window import MainWindow
     print("✅ Lancement de l'interface graphique...")
     app = MainWindow(controller)
     app.run()
 
+    if recorder:
+        recorder.close()
+    controller.shutdown()
+
+
+def run_replay(args):
+    """Rejouer une session sans Tk : impressions en mémoire, durées par opération"""
+    from controllers.session_replay import (HeadlessController, format_replay_report,
+                                            load_session, replay_session)
+
+    source = Path(args.db)
+    if not source.exists():
+        print(f"❌ Base introuvable : {source}")
+        return
+
+    # Copie de travail : les ventes rejouées ne touchent ni la base, ni le journal des
+    # paniers, ni le dossier exports/
+    with tempfile.TemporaryDirectory(prefix='receipts_replay_') as workdir:
+        copy_path = Path(workdir) / source.name
+        original, copy = sqlite3.connect(source), sqlite3.connect(copy_path)
+        try:
+            original.backup(copy)
+        finally:
+            copy.close()
+            original.close()
+
+        db = Database(copy_path)
+        controller = HeadlessController(db, ReceiptGenerator(db.get_all_settings()),
+                                        cart_journal_path=Path(workdir) / 'cart_journal.jsonl',
+                                        exports_dir=Path(workdir) / 'exports')
+        records = load_session(args.replay)
+        print(f"▶️ Rejeu de {len(records)} opérations x{args.repeat} sur une copie de {source}")
+
+        try:
+            stats, duration = replay_session(controller, records, repeat=args.repeat)
+        finally:
+            controller.shutdown()
+
+    print(format_replay_report(stats, duration))
+    print(f"Impressions : {controller.thermal_bytes} octets ESC/POS, "
+          f"{controller.laser_spooler.jobs} travaux laser ({controller.laser_spooler.bytes_sent} octets)")
+
+
+def _output_path(requested, logs_dir, prefix, suffix):
+    if requested:
+        return Path(requested)
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    return logs_dir / f"{prefix}_{datetime.now():%Y%m%d_%H%M%S}{suffix}"
+
+
+def main(argv=None):
+    """Point d'entrée principal de l'application"""
+    args = parse_args(argv)
+    logs_dir = Path(args.db).parent / 'logs'
+    run = run_replay if args.replay else run_app
+
+    profiler = None
+    if args.profile is not None:
+        import cProfile
+        profiler = cProfile.Profile()
+    if args.trace_memory is not None:
+        import tracemalloc
+        tracemalloc.start(25)
+
+    try:
+        if profiler:
+            profiler.runcall(run, args)
+        else:
+            run(args)
+    finally:
+        # Mémoire d'abord : l'écriture du profil alloue elle-même beaucoup
+        if args.trace_memory is not None:
+            _write_memory_report(_output_path(args.trace_memory, logs_dir, 'memory', '.txt'))
+        if profiler:
+            _write_profile(profiler, _output_path(args.profile, logs_dir, 'profile', '.prof'))
+
+
+def _write_profile(profiler, path):
+    """Stats brutes (.prof, pour snakeviz/pstats) et résumé lisible (.txt)"""
+    import pstats
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(path)
+    summary = path.with_suffix('.txt')
+    with open(summary, 'w', encoding='utf-8') as out:
+        stats = pstats.Stats(profiler, stream=out).strip_dirs()
+        stats.sort_stats('cumulative').print_stats(40)
+        stats.sort_stats('tottime').print_stats(25)
+    print(f"📊 Profil écrit : {path} ({summary.name})")
+
+
+def _write_memory_report(path):
+    """Principales allocations encore vivantes (par ligne et par pile) et pic mémoire"""
+    import tracemalloc
+
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "*/cProfile.py"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ))
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    lines = [f"Mémoire suivie : {current / 1024:,.0f} Kio, pic {peak / 1024:,.0f} Kio", "",
+             "== Allocations par ligne =="]
+    lines += [str(stat) for stat in snapshot.statistics('lineno')[:30]]
+    lines += ["", "== Piles des 5 plus grosses allocations =="]
+    for stat in snapshot.statistics('traceback')[:5]:
+        lines.append(f"{stat.count} blocs, {stat.size / 1024:,.1f} Kio")
+        lines += [f"    {line}" for line in stat.traceback.format(limit=8)]
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    print(f"🧠 Rapport mémoire écrit : {path}")
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Exécutable PyInstaller : les processus des relevés (spawn) relancent ce point d'entrée
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,269 @@
+"""
+Sauvegarde, compactage et archivage de la base receipts.db
+- Sauvegardes à chaud via l'API backup de SQLite (par petits pas, sans bloquer la caisse)
+- Planification en tâche de fond avec rotation des fichiers ; la même tâche
+  exécute les travaux de maintenance enregistrés (points de contrôle du stock)
+- Compactage (VACUUM / VACUUM INTO) et ANALYZE
+- Archivage des anciens reçus dans des bases annuelles (data/archives/receipts_AAAA.db)
+"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, date
+from pathlib import Path
+
+
+class BackupManager:
+    # Réveil de la tâche de fond pour les travaux de maintenance (secondes)
+    TASK_INTERVAL = 3600
+    
+    def __init__(self, database, backup_dir=None):
+        self.db = database
+        self.backup_dir = Path(backup_dir) if backup_dir else self.db.db_path.parent / 'backups'
+        self._lock = threading.Lock()
+        self._stop_event = None
+        self._thread = None
+        self._tasks = []
+    
+    # ========== SAUVEGARDES ==========
+    
+    def backup_now(self, compact=False, pages_per_step=64):
+        """
+        Créer une sauvegarde horodatée puis appliquer la rotation
+
+        compact=False : API backup de SQLite, copie par lots de pages en
+        relâchant le verrou entre chaque lot (les écritures de la caisse passent).
+        compact=True : VACUUM INTO, copie défragmentée (plus petite).
+        """
+        with self._lock:
+            self.backup_dir.mkdir(parents=True, exist_ok=True)
+            stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            target = self.backup_dir / f"{self.db.db_path.stem}_{stamp}.db"
+            suffix = 1
+            while target.exists():
+                target = self.backup_dir / f"{self.db.db_path.stem}_{stamp}_{suffix}.db"
+                suffix += 1
+            tmp_target = target.with_suffix('.db.part')
+            if tmp_target.exists():
+                tmp_target.unlink()
+            
+            started = time.perf_counter()
+            source = self.db.get_connection()
+            try:
+                if compact:
+                    source.execute('VACUUM INTO ?', (str(tmp_target),))
+                else:
+                    dest = sqlite3.connect(tmp_target)
+                    try:
+                        source.backup(dest, pages=pages_per_step, sleep=0.005)
+                    finally:
+                        dest.close()
+            finally:
+                source.close()
+            
+            os.replace(tmp_target, target)
+            self.db.set_setting('last_backup_at', datetime.now().isoformat())
+            self.rotate_backups()
+            
+            return {
+                'path': str(target),
+                'size': target.stat().st_size,
+                'duration': time.perf_counter() - started,
+            }
+    
+    def list_backups(self):
+        """Lister les sauvegardes, de la plus récente à la plus ancienne"""
+        if not self.backup_dir.exists():
+            return []
+        pattern = f"{self.db.db_path.stem}_*.db"
+        return sorted(self.backup_dir.glob(pattern), reverse=True)
+    
+    def rotate_backups(self, keep=None):
+        """Supprimer les sauvegardes au-delà des `keep` plus récentes"""
+        if keep is None:
+            keep = int(self.db.get_setting('backup_keep', '7'))
+        removed = []
+        for path in self.list_backups()[max(keep, 1):]:
+            path.unlink()
+            removed.append(str(path))
+        return removed
+    
+    # ========== PLANIFICATION ==========
+    
+    def add_task(self, task):
+        """
+        Travail de maintenance exécuté par la tâche de fond, au démarrage puis
+        à chaque réveil (au plus TASK_INTERVAL) ; il ne fait rien s'il n'est pas dû
+        """
+        self._tasks.append(task)
+    
+    def start_scheduler(self, interval_hours=None, backups=True):
+        """Démarrer la tâche de fond : sauvegardes périodiques (si backups) et maintenance"""
+        if self._thread and self._thread.is_alive():
+            return
+        if interval_hours is None:
+            interval_hours = float(self.db.get_setting('backup_interval_hours', '24'))
+        
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._scheduler_loop,
+            args=(interval_hours * 3600 if backups else None, self._stop_event),
+            name='backup-scheduler',
+            daemon=True
+        )
+        self._thread.start()
+    
+    def stop_scheduler(self):
+        """Arrêter les sauvegardes périodiques"""
+        if self._stop_event:
+            self._stop_event.set()
+        self._thread = None
+    
+    def _scheduler_loop(self, interval, stop_event):
+        # Rattraper une sauvegarde manquée (application fermée au moment prévu)
+        if interval is not None:
+            next_backup = time.monotonic() + max(interval - self._seconds_since_last_backup(), 0)
+        
+        while True:
+            for task in self._tasks:
+                try:
+                    task()
+                except Exception as e:
+                    print(f"Erreur de maintenance automatique: {e}")
+            
+            wait = self.TASK_INTERVAL
+            if interval is not None:
+                if time.monotonic() >= next_backup:
+                    try:
+                        self.backup_now()
+                    except Exception as e:
+                        print(f"Erreur de sauvegarde automatique: {e}")
+                    next_backup = time.monotonic() + interval
+                wait = min(wait, max(next_backup - time.monotonic(), 0))
+            
+            if stop_event.wait(wait):
+                return
+    
+    def _seconds_since_last_backup(self):
+        last = self.db.get_setting('last_backup_at', '')
+        try:
+            return (datetime.now() - datetime.fromisoformat(last)).total_seconds()
+        except ValueError:
+            return float('inf')
+    
+    # ========== MAINTENANCE ==========
+    
+    def compact(self):
+        """Compacter la base (VACUUM) et rafraîchir les statistiques (ANALYZE)"""
+        with self._lock:
+            size_before = self.db.db_path.stat().st_size
+            started = time.perf_counter()
+            
+            conn = self.db.get_connection()
+            try:
+                conn.execute('VACUUM')
+                conn.execute('ANALYZE')
+                conn.execute('PRAGMA optimize')
+            finally:
+                conn.close()
+            
+            return {
+                'size_before': size_before,
+                'size_after': self.db.db_path.stat().st_size,
+                'duration': time.perf_counter() - started,
+            }
+    
+    # ========== ARCHIVAGE ==========
+    
+    def archive_receipts(self, older_than_months=None):
+        """
+        Déplacer les reçus de plus de N mois dans des bases d'archive annuelles
+
+        Les archives restent lues par l'historique, les statistiques, les
+        exports et la réindexation des PDF (voir Database.attach_archives). SQLite n'attache
+        que Database.MAX_ATTACHED_ARCHIVES archives à la fois : une année qui
+        créerait une archive de plus reste dans la base courante (refused).
+        Seuls les reçus retrouvés dans l'archive sont supprimés de la base
+        courante ; les autres sont comptés dans kept.
+        """
+        if older_than_months is None:
+            older_than_months = int(self.db.get_setting('archive_after_months', '24'))
+        
+        cutoff = self._months_ago(older_than_months).isoformat()
+        
+        with self._lock:
+            conn = self.db.get_connection()
+            try:
+                years = [row[0] for row in conn.execute('''
+                    SELECT DISTINCT substr(date, 1, 4) FROM receipts WHERE date < ?
+                    ORDER BY 1 DESC
+                ''', (cutoff,))]
+                
+                existing = {path.stem.rsplit('_', 1)[-1] for path in self.db.get_archive_paths()}
+                room = self.db.MAX_ATTACHED_ARCHIVES - len(existing)
+                archived_years, refused = [], []
+                for year in years:
+                    if year in existing:
+                        archived_years.append(year)
+                    elif room > 0:
+                        archived_years.append(year)
+                        room -= 1
+                    else:
+                        refused.append(year)
+                
+                moved = kept = 0
+                for year in archived_years:
+                    year_moved, year_kept = self._archive_year(conn, year, cutoff)
+                    moved += year_moved
+                    kept += year_kept
+            finally:
+                conn.close()
+        
+        return {'cutoff': cutoff, 'years': archived_years, 'archived': moved,
+                'kept': kept, 'refused': refused}
+    
+    def _archive_year(self, conn, year, cutoff):
+        """
+        Déplacer les reçus d'une année dans son archive (une transaction)
+        Retourne (déplacés, restés) : un reçu déjà présent dans l'archive sous
+        le même id avec un autre numéro n'est pas supprimé de la base courante.
+        """
+        archive_path = self.db.get_archive_path(year)
+        archive_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        conn.execute('ATTACH DATABASE ? AS archive', (str(archive_path),))
+        try:
+            self.db.ensure_archive_schema(conn, 'archive')
+            columns = ', '.join(self.db.ARCHIVE_COLUMNS)
+            with conn:
+                conn.execute(f'''
+                    INSERT OR IGNORE INTO archive.receipts ({columns})
+                    SELECT {columns} FROM main.receipts
+                    WHERE date < ? AND substr(date, 1, 4) = ?
+                ''', (cutoff, year))
+                # Supprimer uniquement ce que l'archive contient vraiment
+                moved = conn.execute('''
+                    DELETE FROM main.receipts
+                    WHERE date < ? AND substr(date, 1, 4) = ?
+                      AND EXISTS (
+                          SELECT 1 FROM archive.receipts AS a
+                          WHERE a.id = main.receipts.id
+                            AND a.receipt_number = main.receipts.receipt_number
+                      )
+                ''', (cutoff, year)).rowcount
+                kept = conn.execute('''
+                    SELECT COUNT(*) FROM main.receipts
+                    WHERE date < ? AND substr(date, 1, 4) = ?
+                ''', (cutoff, year)).fetchone()[0]
+        finally:
+            conn.execute('DETACH DATABASE archive')
+        
+        return moved, kept
+    
+    @staticmethod
+    def _months_ago(months, today=None):
+        """Premier jour du mois situé `months` mois avant aujourd'hui"""
+        today = today or date.today()
+        index = today.year * 12 + (today.month - 1) - months
+        return date(index // 12, index % 12 + 1, 1)
@@ -0,0 +1,118 @@
+"""
+Panier du reçu en cours
+- Lignes compactes (__slots__), fusion des lignes identiques (même produit, même prix)
+- Total tenu à jour à chaque opération, sans re-sommer les lignes
+- Événements fins (ajout, mise à jour, retrait, vidage) pour que l'interface
+  ne redessine que la ligne concernée
+"""
+
+
+class CartLine:
+    __slots__ = ('name', 'quantity', 'unit_price', 'total')
+
+    def __init__(self, name, quantity, unit_price):
+        self.name = name
+        self.quantity = quantity
+        self.unit_price = unit_price
+        self.total = quantity * unit_price
+
+    def to_dict(self):
+        """Format des articles enregistrés dans les reçus (JSON, PDF, impression)"""
+        return {
+            'name': self.name,
+            'quantity': self.quantity,
+            'unit_price': self.unit_price,
+            'total': self.total,
+        }
+
+
+class Cart:
+    # Événements transmis aux abonnés : callback(événement, index, ligne)
+    ADDED, UPDATED, REMOVED, CLEARED = 'added', 'updated', 'removed', 'cleared'
+    # Émis par le contrôleur quand un autre panier devient actif
+    SWITCHED = 'switched'
+
+    def __init__(self):
+        self.lines = []
+        self.total = 0.0
+        self._by_key = {}
+        self._listeners = []
+
+    # ========== ABONNEMENTS ==========
+
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, event, index=None, line=None):
+        for callback in self._listeners:
+            callback(event, index, line)
+
+    # ========== OPÉRATIONS ==========
+
+    def add(self, name, quantity, unit_price):
+        """
+        Ajouter un article ; une ligne du même produit au même prix est fusionnée
+        Retourne (ligne, index)
+        """
+        line = self._by_key.get((name, unit_price))
+        if line is not None:
+            index = self.lines.index(line)
+            self.set_quantity(index, line.quantity + quantity)
+            return line, index
+
+        line = CartLine(name, quantity, unit_price)
+        self.lines.append(line)
+        self._by_key[(name, unit_price)] = line
+        self.total += line.total
+        index = len(self.lines) - 1
+        self._notify(self.ADDED, index, line)
+        return line, index
+
+    def set_quantity(self, index, quantity):
+        """Changer la quantité d'une ligne (total de ligne et du panier ajustés)"""
+        line = self.lines[index]
+        previous = line.total
+        line.quantity = quantity
+        line.total = quantity * line.unit_price
+        self.total += line.total - previous
+        self._notify(self.UPDATED, index, line)
+        return line
+
+    def remove(self, index):
+        """Retirer une ligne, None si l'index est invalide"""
+        if not 0 <= index < len(self.lines):
+            return None
+        line = self.lines.pop(index)
+        del self._by_key[(line.name, line.unit_price)]
+        # Panier vide : repartir d'un zéro exact (pas de résidu d'arrondi)
+        self.total = self.total - line.total if self.lines else 0.0
+        self._notify(self.REMOVED, index, line)
+        return line
+
+    def clear(self):
+        self.lines = []
+        self._by_key = {}
+        self.total = 0.0
+        self._notify(self.CLEARED)
+
+    # ========== LECTURE ==========
+
+    def items(self):
+        """Articles au format dictionnaire (copie indépendante du panier)"""
+        return [line.to_dict() for line in self.lines]
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __bool__(self):
+        return bool(self.lines)
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __getitem__(self, index):
+        return self.lines[index]
@@ -0,0 +1,166 @@
+"""
+Journal des paniers en cours (reprise après plantage)
+- Chaque opération (ajout, quantité, retrait, vidage, mise en attente, client
+  de la vente) est ajoutée en fin de fichier, une ligne JSON par opération
+- Une vente est notée (numéro du reçu) avant l'enregistrement du reçu : au
+  rejeu, le contrôleur écarte les paniers dont le reçu existe déjà
+- Écriture immédiate dans le cache système (survit à un plantage de
+  l'application), fsync groupé toutes les `fsync_interval` secondes
+  (survit à une coupure de courant, au pire la dernière fraction de seconde perdue)
+- Au démarrage le journal est rejoué puis réécrit en instantané compact
+"""
+import json
+import os
+import threading
+from functools import partial
+from pathlib import Path
+
+from models.cart import Cart
+
+
+class CartJournal:
+    def __init__(self, path, fsync_interval=0.5):
+        self.path = Path(path)
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._dirty = False
+        self._timer = None
+        self._lock = threading.Lock()
+
+    # ========== REJEU ==========
+
+    def replay(self):
+        """
+        Reconstruire les paniers depuis le journal
+        Retourne (paniers {id: Cart}, libellés {id: texte},
+        clients {id: (nom, contact)}, id du panier actif,
+        ventes en cours d'enregistrement {id: numéro de reçu})
+        Une dernière ligne tronquée (plantage pendant l'écriture) est ignorée.
+        """
+        carts, labels, clients, active, sold = {}, {}, {}, None, {}
+        if not self.path.exists():
+            return carts, labels, clients, active, sold
+
+        with open(self.path, encoding='utf-8') as journal:
+            for raw in journal:
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    continue
+                cart_id = record.get('c')
+                op = record.get('op')
+                cart = carts.setdefault(cart_id, Cart()) if op != 'drop' else None
+                try:
+                    if op == 'add':
+                        cart.add(record['name'], record['q'], record['p'])
+                    elif op == 'set':
+                        cart.set_quantity(record['i'], record['q'])
+                    elif op == 'remove':
+                        cart.remove(record['i'])
+                    elif op == 'clear':
+                        cart.clear()
+                    elif op == 'label':
+                        labels[cart_id] = record.get('label', '')
+                    elif op == 'unlabel':
+                        labels.pop(cart_id, None)
+                    elif op == 'meta':
+                        if record.get('name') or record.get('contact'):
+                            clients[cart_id] = (record.get('name', ''), record.get('contact', ''))
+                        else:
+                            clients.pop(cart_id, None)
+                    elif op == 'active':
+                        active = cart_id
+                    elif op == 'sold':
+                        sold[cart_id] = record['number']
+                    elif op == 'unsold':
+                        sold.pop(cart_id, None)
+                    elif op == 'drop':
+                        carts.pop(cart_id, None)
+                        labels.pop(cart_id, None)
+                        clients.pop(cart_id, None)
+                        sold.pop(cart_id, None)
+                except (KeyError, IndexError, TypeError):
+                    continue
+
+        return carts, labels, clients, active, sold
+
+    # ========== ÉCRITURE ==========
+
+    def open(self, carts, labels, clients, active):
+        """Réécrire le journal en instantané compact puis l'ouvrir en ajout"""
+        with self._lock:
+            if self._file:
+                self._file.close()
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as snapshot:
+                for cart_id, cart in carts.items():
+                    if cart_id in labels:
+                        snapshot.write(self._encode(cart_id, 'label', label=labels[cart_id]))
+                    if cart_id in clients:
+                        name, contact = clients[cart_id]
+                        snapshot.write(self._encode(cart_id, 'meta', name=name, contact=contact))
+                    for line in cart:
+                        snapshot.write(self._encode(cart_id, 'add', name=line.name,
+                                                    q=line.quantity, p=line.unit_price))
+                if active is not None:
+                    snapshot.write(self._encode(active, 'active'))
+                snapshot.flush()
+                os.fsync(snapshot.fileno())
+            os.replace(tmp_path, self.path)
+
+            self._file = open(self.path, 'a', encoding='utf-8')
+            self._dirty = False
+
+    def attach(self, cart_id, cart):
+        """Journaliser les événements d'un panier"""
+        listener = partial(self._on_cart_event, cart_id)
+        cart.subscribe(listener)
+        return listener
+
+    def _on_cart_event(self, cart_id, event, index, line):
+        if event == Cart.ADDED:
+            self.append(cart_id, 'add', name=line.name, q=line.quantity, p=line.unit_price)
+        elif event == Cart.UPDATED:
+            self.append(cart_id, 'set', i=index, q=line.quantity)
+        elif event == Cart.REMOVED:
+            self.append(cart_id, 'remove', i=index)
+        elif event == Cart.CLEARED:
+            self.append(cart_id, 'clear')
+
+    def append(self, cart_id, op, **fields):
+        """Ajouter une opération en fin de journal (fsync différé et groupé)"""
+        with self._lock:
+            if not self._file:
+                return
+            self._file.write(self._encode(cart_id, op, **fields))
+            self._file.flush()
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(self.fsync_interval, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def sync(self):
+        """Forcer l'écriture sur disque des opérations en attente"""
+        with self._lock:
+            self._timer = None
+            if self._file and self._dirty:
+                os.fsync(self._file.fileno())
+                self._dirty = False
+
+    def close(self):
+        self.sync()
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    @staticmethod
+    def _encode(cart_id, op, **fields):
+        return json.dumps({'c': cart_id, 'op': op, **fields}, ensure_ascii=False,
+                          separators=(',', ':')) + '\n'
@@ -7,16 +7,53 @@ import json
 from datetime import datetime
 from pathlib import Path
 
+from utils.name_formatter import client_name_key, fold_name
+from utils.instrumentation import instrument
+from models.query_profiler import QueryProfiler
+
+@instrument('database')
 class Database:
+    # Colonnes conservées dans les bases d'archive annuelles
+    ARCHIVE_COLUMNS = ('id', 'receipt_number', 'date', 'client_name', 'client_contact',
+                       'items', 'total', 'payment_method', 'notes', 'created_at', 'client_id')
+    
+    # Noms génériques qui ne créent pas de fiche client
+    ANONYMOUS_CLIENT_KEYS = ('', 'CLIENT')
+    
+    # Types de mouvements du journal de stock
+    MOVEMENT_KINDS = ('purchase', 'sale', 'adjustment')
+    
+    # Limite SQLite par défaut : 10 bases attachées
+    MAX_ATTACHED_ARCHIVES = 9
+    
+    # Horodatage local au format de datetime.now().isoformat() (comparable en texte)
+    SQL_NOW = "strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')"
+    
     def __init__(self, db_path="data/receipts.db"):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(exist_ok=True)
+        self.archive_dir = self.db_path.parent / 'archives'
+        self.profiler = None
         self.init_database()
     
     def get_connection(self):
-        """Obtenir une connexion à la base de données"""
+        """Obtenir une connexion à la base de données (tracée si le profilage est actif)"""
+        if self.profiler:
+            return self.profiler.connect()
         return sqlite3.connect(self.db_path)
     
+    def enable_query_profiling(self, slow_ms=50, explain_interval=60):
+        """Tracer toutes les requêtes des nouvelles connexions (voir QueryProfiler)"""
+        if self.profiler is None:
+            self.profiler = QueryProfiler(self.db_path, attach=self.attach_archives, 
+                                          slow_ms=slow_ms, explain_interval=explain_interval)
+        return self.profiler
+    
+    def disable_query_profiling(self):
+        """Revenir aux connexions simples, retourne le profileur (et ses mesures)"""
+        profiler, self.profiler = self.profiler, None
+        return profiler
+    
     def init_database(self):
         """Initialiser les tables de la base de données"""
         conn = self.get_connection()
@@ -35,6 +72,159 @@ class Database:
             )
         ''')
         
+        # Stock : quantité en main maintenue à chaque mouvement, seuil d'alerte
+        cursor.execute("PRAGMA table_info(products)")
+        product_columns = [col[1] for col in cursor.fetchall()]
+        if 'stock_on_hand' not in product_columns:
+            cursor.execute('ALTER TABLE products ADD COLUMN stock_on_hand REAL DEFAULT 0')
+        if 'min_stock' not in product_columns:
+            cursor.execute('ALTER TABLE products ADD COLUMN min_stock REAL DEFAULT 0')
+        
+        # Cumuls de ventes tenant compte des quantités (total_sold = chiffre d'affaires)
+        # Les anciens cumuls additionnaient les prix unitaires : recalcul depuis les reçus
+        rebuild_sales_totals = 'quantity_sold' not in product_columns
+        if rebuild_sales_totals:
+            cursor.execute('ALTER TABLE products ADD COLUMN quantity_sold REAL DEFAULT 0')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_products_total_sold ON products(total_sold DESC)
+        ''')
+        
+        # Code-barres / référence (unique, facultatif)
+        if 'sku' not in product_columns:
+            cursor.execute('ALTER TABLE products ADD COLUMN sku TEXT')
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_products_sku ON products(sku)
+            WHERE sku IS NOT NULL
+        ''')
+        
+        # Historique des prix : une ligne par changement, datée de son entrée en vigueur
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS price_history (
+                product_id INTEGER NOT NULL,
+                effective_from TEXT NOT NULL,
+                unit_price REAL NOT NULL,
+                PRIMARY KEY (product_id, effective_from)
+            ) WITHOUT ROWID
+        ''')
+        
+        # Alimenté par triggers : ventes, import de catalogue et saisie manuelle
+        # passent tous par la table products
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_products_price_insert
+            AFTER INSERT ON products
+            BEGIN
+                INSERT OR REPLACE INTO price_history (product_id, effective_from, unit_price)
+                VALUES (NEW.id, {self.SQL_NOW}, NEW.unit_price);
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_products_price_update
+            AFTER UPDATE OF unit_price ON products
+            WHEN NEW.unit_price IS NOT OLD.unit_price
+            BEGIN
+                INSERT OR REPLACE INTO price_history (product_id, effective_from, unit_price)
+                VALUES (NEW.id, {self.SQL_NOW}, NEW.unit_price);
+            END
+        ''')
+        
+        # Produits antérieurs à l'historique : prix actuel depuis leur création
+        # (created_at = CURRENT_TIMESTAMP, en UTC : ramené à l'heure locale comme SQL_NOW)
+        cursor.execute('''
+            INSERT OR IGNORE INTO price_history (product_id, effective_from, unit_price)
+            SELECT id, strftime('%Y-%m-%dT%H:%M:%f', COALESCE(created_at, '1970-01-01 00:00:00'),
+                                'localtime'), unit_price
+            FROM products
+            WHERE id NOT IN (SELECT product_id FROM price_history)
+        ''')
+        # Lignes déjà reprises telles quelles (heure UTC, sans millisecondes) : heure locale
+        cursor.execute('''
+            UPDATE OR IGNORE price_history
+            SET effective_from = (
+                SELECT strftime('%Y-%m-%dT%H:%M:%f', p.created_at, 'localtime')
+                FROM products p WHERE p.id = price_history.product_id
+            )
+            WHERE effective_from = (
+                SELECT REPLACE(p.created_at, ' ', 'T')
+                FROM products p WHERE p.id = price_history.product_id
+            )
+        ''')
+        
+        # Journal des mouvements de stock (achats, ventes, ajustements)
+        # created_at en heure locale, comme price_history et les points de contrôle
+        stock_movements_sql = f'''
+            CREATE TABLE {{table}} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                product_id INTEGER NOT NULL,
+                kind TEXT NOT NULL CHECK (kind IN ('purchase', 'sale', 'adjustment')),
+                quantity REAL NOT NULL,
+                receipt_id INTEGER,
+                note TEXT,
+                created_at TEXT DEFAULT ({self.SQL_NOW})
+            )
+        '''
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'stock_movements'")
+        row = cursor.fetchone()
+        
+        if row is None:
+            cursor.execute(stock_movements_sql.format(table='stock_movements'))
+        elif 'CURRENT_TIMESTAMP' in row[0]:
+            # Ancien défaut en UTC : recréer la table avec le défaut local
+            cursor.execute(stock_movements_sql.format(table='stock_movements_new'))
+            
+            # Lignes datées par l'ancien défaut (UTC, sans « T ») ramenées à l'heure locale
+            cursor.execute('''
+                INSERT INTO stock_movements_new
+                SELECT id, product_id, kind, quantity, receipt_id, note,
+                       CASE WHEN created_at LIKE '____-__-__ __:__:__%'
+                            THEN strftime('%Y-%m-%dT%H:%M:%f', created_at, 'localtime')
+                            ELSE created_at END
+                FROM stock_movements
+            ''')
+            
+            # Supprimer l'ancienne table (index et trigger recréés plus bas)
+            cursor.execute('DROP TABLE stock_movements')
+            cursor.execute('ALTER TABLE stock_movements_new RENAME TO stock_movements')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_stock_movements_product 
+            ON stock_movements(product_id, created_at)
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_stock_movements_created ON stock_movements(created_at)
+        ''')
+        
+        # Points de contrôle du stock : quantité de chaque produit à une date
+        # (mouvements antérieurs à checkpoint_at inclus)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS stock_checkpoints (
+                product_id INTEGER NOT NULL,
+                checkpoint_at TEXT NOT NULL,
+                quantity REAL NOT NULL,
+                unit_price REAL,
+                PRIMARY KEY (product_id, checkpoint_at)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_stock_checkpoints_at ON stock_checkpoints(checkpoint_at)
+        ''')
+        
+        # Le stock en main suit le journal : jamais besoin de le re-sommer
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_stock_movements_insert
+            AFTER INSERT ON stock_movements
+            BEGIN
+                UPDATE products SET stock_on_hand = stock_on_hand + NEW.quantity
+                WHERE id = NEW.product_id;
+            END
+        ''')
+        
+        # Alertes de stock bas : index partiel, seuls les produits concernés y figurent
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_products_low_stock 
+            ON products(stock_on_hand) 
+            WHERE min_stock > 0 AND stock_on_hand <= min_stock
+        ''')
+        
         # Table des reçus - MISE À JOUR
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS receipts (
@@ -84,6 +274,50 @@ class Database:
             cursor.execute('DROP TABLE receipts')
             cursor.execute('ALTER TABLE receipts_new RENAME TO receipts')
         
+        # Index pour les filtres par période (exports, rapports)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_receipts_date ON receipts(date)')
+        
+        # Historique trié par date de création sans tri temporaire (get_all_receipts)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_receipts_created_at ON receipts(created_at)')
+        
+        # Répertoire clients (clé normalisée indexée pour la recherche par préfixe)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS clients (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                name_key TEXT UNIQUE NOT NULL,
+                contact TEXT,
+                receipt_count INTEGER DEFAULT 0,
+                last_used TEXT,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Lien reçu → client (ajouté aux bases existantes puis rempli depuis l'historique)
+        cursor.execute("PRAGMA table_info(receipts)")
+        if 'client_id' not in [col[1] for col in cursor.fetchall()]:
+            cursor.execute('ALTER TABLE receipts ADD COLUMN client_id INTEGER')
+            self._backfill_clients(cursor)
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_receipts_client ON receipts(client_id, created_at)
+        ''')
+        
+        # Index des fichiers exportés (PDF)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS exports (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                receipt_id INTEGER,
+                receipt_number TEXT,
+                path TEXT UNIQUE NOT NULL,
+                size INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                archived_in TEXT,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_exports_receipt ON exports(receipt_id, created_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_exports_sha256 ON exports(sha256)')
+        
         # Table des paramètres
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS settings (
@@ -105,11 +339,33 @@ class Database:
             'company_cif': '0189577 DGI-M du 03/06/2025',
             'receipt_counter': '1',
             'currency': 'Ar',
+            'amount_words_language': 'fr',
             'paper_width': '58',
+            'thermal_paper_width': '80',
+            'thermal_template': '',
             'receipt_type': 'Grossiste - Détaillants/ Vente à l\'utilisateur',
+            'organization_keywords': '',
             'laser_printer_name': 'HP_LaserJet_1022n',
             'laser_paper_format': 'A6',
+            'laser_name_lines': '2',
+            'laser_output': 'text',
             'laser_enabled': 'true',
+            'laser_spooler': 'lp',
+            'laser_lp_command': 'lp',
+            'cups_server': 'localhost:631',
+            'backup_enabled': 'true',
+            'backup_interval_hours': '24',
+            'backup_keep': '7',
+            'archive_after_months': '24',
+            'exports_retention_enabled': 'false',
+            'exports_max_age_days': '180',
+            'exports_max_size_mb': '500',
+            'exports_compress': 'true',
+            'stock_checkpoint_period': 'monthly',
+            'instrumentation_enabled': 'false',
+            'instrumentation_slow_ms': '500',
+            'sql_profiling_enabled': 'false',
+            'sql_slow_ms': '50',
         }
         
         for key, value in default_settings.items():
@@ -119,32 +375,169 @@ class Database:
         
         conn.commit()
         conn.close()
+        
+        if rebuild_sales_totals:
+            self.rebuild_sales_totals()
     
     # ========== PRODUITS ==========
     
     def add_or_update_product(self, name, unit_price):
         """Ajouter ou mettre à jour un produit"""
+        self.learn_products([(name, unit_price)])
+    
+    def learn_products(self, items):
+        """Apprendre un lot de produits (nom, prix) en une seule transaction"""
         conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT id, count, total_sold FROM products WHERE name = ?', (name,))
-        result = cursor.fetchone()
-        
-        if result:
-            product_id, count, total_sold = result
-            cursor.execute('''
-                UPDATE products 
-                SET unit_price = ?, count = ?, total_sold = ?, last_used = ?
-                WHERE id = ?
-            ''', (unit_price, count + 1, total_sold + unit_price, datetime.now().isoformat(), product_id))
-        else:
-            cursor.execute('''
-                INSERT INTO products (name, unit_price, count, total_sold, last_used)
-                VALUES (?, ?, 1, ?, ?)
-            ''', (name, unit_price, unit_price, datetime.now().isoformat()))
+        try:
+            with conn:
+                self._upsert_learned_products(conn.cursor(), items)
+        finally:
+            conn.close()
+    
+    def _upsert_learned_products(self, cursor, items):
+        """
+        Appliquer l'apprentissage des produits dans la transaction en cours.
+        Les lignes d'un même produit sont regroupées en mémoire puis
+        écrites en un seul INSERT ... ON CONFLICT DO UPDATE par produit.
+        Les cumuls (quantité vendue, chiffre d'affaires) suivent les totaux
+        de ligne ; un couple (nom, prix) compte pour une unité.
+        """
+        learned = self._sales_by_product(items)
+        if not learned:
+            return
         
-        conn.commit()
+        now = datetime.now().isoformat()
+        cursor.executemany('''
+            INSERT INTO products (name, unit_price, count, quantity_sold, total_sold, last_used)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                unit_price = excluded.unit_price,
+                count = count + excluded.count,
+                quantity_sold = quantity_sold + excluded.quantity_sold,
+                total_sold = total_sold + excluded.total_sold,
+                last_used = excluded.last_used
+        ''', [
+            (name, unit_price, count, quantity_sold, total_sold, now)
+            for name, (count, quantity_sold, total_sold, unit_price) in learned.items()
+        ])
+    
+    @staticmethod
+    def _sales_by_product(items):
+        """Lignes regroupées par produit : {nom: (lignes, quantité, montant, dernier prix)}"""
+        learned = {}
+        for item in items:
+            if isinstance(item, dict):
+                name, unit_price = item['name'], item['unit_price']
+                quantity = item.get('quantity', 1)
+                line_total = item.get('total', quantity * unit_price)
+            else:
+                name, unit_price = item
+                quantity, line_total = 1, unit_price
+            
+            count, quantity_sold, total_sold, _ = learned.get(name, (0, 0, 0, unit_price))
+            learned[name] = (count + 1, quantity_sold + quantity, total_sold + line_total,
+                             unit_price)
+        return learned
+    
+    def _unlearn_sales(self, cursor, items):
+        """Retirer des cumuls de ventes (quantité, chiffre d'affaires) les lignes d'un reçu annulé"""
+        cursor.executemany('''
+            UPDATE products
+            SET quantity_sold = MAX(quantity_sold - ?, 0), total_sold = MAX(total_sold - ?, 0)
+            WHERE name = ?
+        ''', [
+            (quantity_sold, total_sold, name)
+            for name, (_, quantity_sold, total_sold, _) in self._sales_by_product(items).items()
+        ])
+    
+    def rebuild_sales_totals(self):
+        """
+        Recalculer quantité vendue et chiffre d'affaires de chaque produit
+        depuis les lignes des reçus (base courante et archives)
+        """
+        conn = self.get_connection()
+        try:
+            select = '''
+                SELECT json_extract(item.value, '$.name') AS name,
+                       json_extract(item.value, '$.quantity') AS quantity,
+                       COALESCE(json_extract(item.value, '$.total'),
+                                json_extract(item.value, '$.quantity')
+                                * json_extract(item.value, '$.unit_price')) AS line_total
+                FROM {schema}.receipts, json_each({schema}.receipts.items) AS item
+            '''
+            schemas = ['main'] + self.attach_archives(conn)
+            lines = ' UNION ALL '.join(select.format(schema=schema) for schema in schemas)
+            
+            with conn:
+                conn.execute('UPDATE products SET quantity_sold = 0, total_sold = 0')
+                conn.execute(f'''
+                    UPDATE products
+                    SET quantity_sold = sales.quantity, total_sold = sales.revenue
+                    FROM (
+                        SELECT name, SUM(quantity) AS quantity, SUM(line_total) AS revenue
+                        FROM ({lines})
+                        GROUP BY name
+                    ) AS sales
+                    WHERE sales.name = products.name
+                ''')
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def normalize_sku(sku):
+        """Code-barres nettoyé (espaces retirés, majuscules), None si vide"""
+        sku = ''.join(str(sku or '').split()).upper()
+        return sku or None
+    
+    def set_product_sku(self, product_id, sku):
+        """
+        Associer un code-barres à un produit (vide = retirer le code)
+        sqlite3.IntegrityError si le code appartient déjà à un autre produit
+        """
+        conn = self.get_connection()
+        try:
+            with conn:
+                conn.execute('UPDATE products SET sku = ? WHERE id = ?',
+                             (self.normalize_sku(sku), product_id))
+        finally:
+            conn.close()
+    
+    def get_sku_map(self):
+        """Table code-barres → (id, nom, prix) de tous les produits codés"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT sku, id, name, unit_price FROM products WHERE sku IS NOT NULL')
+        results = {sku: (product_id, name, unit_price)
+                   for sku, product_id, name, unit_price in cursor}
         conn.close()
+        return results
+    
+    def get_price_history(self, product_id):
+        """Prix successifs d'un produit : (date d'effet, prix), du plus récent au plus ancien"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT effective_from, unit_price FROM price_history
+            WHERE product_id = ?
+            ORDER BY effective_from DESC
+        ''', (product_id,))
+        results = cursor.fetchall()
+        conn.close()
+        return results
+    
+    def get_price_at(self, product_id, moment):
+        """Prix en vigueur à un instant (ISO), None si le produit n'existait pas"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT unit_price FROM price_history
+            WHERE product_id = ? AND effective_from <= ?
+            ORDER BY effective_from DESC
+            LIMIT 1
+        ''', (product_id, moment))
+        row = cursor.fetchone()
+        conn.close()
+        return row[0] if row else None
     
     def search_products(self, query):
         """Rechercher des produits"""
@@ -166,7 +559,7 @@ class Database:
         conn = self.get_connection()
         cursor = conn.cursor()
         cursor.execute('''
-            SELECT id, name, unit_price, count, total_sold, last_used
+            SELECT id, name, unit_price, count, total_sold, last_used, stock_on_hand, min_stock, sku
             FROM products
             ORDER BY count DESC
         ''')
@@ -175,65 +568,218 @@ class Database:
         return results
     
     def delete_product(self, product_id):
-        """Supprimer un produit"""
+        """Supprimer un produit (et son journal de stock)"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.execute('DELETE FROM stock_movements WHERE product_id = ?', (product_id,))
+        cursor.execute('DELETE FROM stock_checkpoints WHERE product_id = ?', (product_id,))
+        cursor.execute('DELETE FROM price_history WHERE product_id = ?', (product_id,))
         cursor.execute('DELETE FROM products WHERE id = ?', (product_id,))
         conn.commit()
         conn.close()
     
+    # ========== STOCK ==========
+    
+    def record_stock_movement(self, product_id, kind, quantity, note='', receipt_id=None):
+        """
+        Enregistrer un mouvement de stock (quantité signée : + entrée, - sortie)
+        Le trigger trg_stock_movements_insert met à jour products.stock_on_hand
+        """
+        if kind not in self.MOVEMENT_KINDS:
+            raise ValueError(f"Type de mouvement inconnu: {kind}")
+        
+        conn = self.get_connection()
+        try:
+            with conn:
+                conn.execute('''
+                    INSERT INTO stock_movements (product_id, kind, quantity, receipt_id, note, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (product_id, kind, quantity, receipt_id, note, datetime.now().isoformat()))
+        finally:
+            conn.close()
+    
+    def adjust_stock(self, product_id, counted_quantity, note='Inventaire'):
+        """Aligner le stock sur une quantité comptée (mouvement d'ajustement)"""
+        conn = self.get_connection()
+        try:
+            with conn:
+                row = conn.execute('SELECT stock_on_hand FROM products WHERE id = ?',
+                                   (product_id,)).fetchone()
+                if row is None:
+                    raise ValueError("Produit introuvable")
+                delta = counted_quantity - (row[0] or 0)
+                if delta:
+                    conn.execute('''
+                        INSERT INTO stock_movements (product_id, kind, quantity, note, created_at)
+                        VALUES (?, 'adjustment', ?, ?, ?)
+                    ''', (product_id, delta, note, datetime.now().isoformat()))
+        finally:
+            conn.close()
+        return delta
+    
+    def set_min_stock(self, product_id, min_stock):
+        """Définir le seuil d'alerte de stock bas d'un produit"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('UPDATE products SET min_stock = ? WHERE id = ?', (min_stock, product_id))
+        conn.commit()
+        conn.close()
+    
+    def get_stock(self, product_id):
+        """Stock en main d'un produit (lecture directe, sans sommer le journal)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT stock_on_hand FROM products WHERE id = ?', (product_id,))
+        result = cursor.fetchone()
+        conn.close()
+        return result[0] if result else None
+    
+    def get_low_stock_products(self):
+        """Produits sous leur seuil d'alerte (index partiel idx_products_low_stock)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, name, stock_on_hand, min_stock
+            FROM products
+            WHERE min_stock > 0 AND stock_on_hand <= min_stock
+            ORDER BY stock_on_hand
+        ''')
+        results = cursor.fetchall()
+        conn.close()
+        return results
+    
+    def get_stock_movements(self, product_id, limit=100):
+        """Derniers mouvements de stock d'un produit"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT kind, quantity, receipt_id, note, created_at
+            FROM stock_movements
+            WHERE product_id = ?
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        ''', (product_id, limit))
+        results = cursor.fetchall()
+        conn.close()
+        return results
+    
+    def _record_sales(self, cursor, receipt_id, items, sign=-1, kind='sale', note=''):
+        """
+        Mouvements de stock d'un reçu dans la transaction en cours
+        Les lignes d'un même produit sont regroupées (un mouvement par produit)
+        """
+        quantities = {}
+        for item in items:
+            quantities[item['name']] = quantities.get(item['name'], 0) + item['quantity']
+        
+        now = datetime.now().isoformat()
+        cursor.executemany('''
+            INSERT INTO stock_movements (product_id, kind, quantity, receipt_id, note, created_at)
+            SELECT id, ?, ?, ?, ?, ? FROM products WHERE name = ?
+        ''', [(kind, sign * quantity, receipt_id, note, now, name)
+              for name, quantity in quantities.items()])
+    
     # ========== REÇUS ==========
     
     def save_receipt(self, receipt_data):
-        """Enregistrer un reçu"""
+        """
+        Enregistrer un reçu
+        Le reçu, l'apprentissage des produits et le compteur sont écrits
+        dans une seule transaction (un seul commit par reçu).
+        """
         conn = self.get_connection()
-        cursor = conn.cursor()
         
         items_json = json.dumps(receipt_data['items'])
         
-        cursor.execute('''
-            INSERT INTO receipts 
-            (receipt_number, date, client_name, client_contact, items, total, payment_method, notes)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            receipt_data['receipt_number'],
-            receipt_data['date'],
-            receipt_data.get('client_name', ''),
-            receipt_data.get('client_contact', ''),
-            items_json,
-            receipt_data['total'],
-            receipt_data.get('payment_method', 'Espèces'),
-            receipt_data.get('notes', '')
-        ))
-        
-        conn.commit()
-        conn.close()
+        try:
+            with conn:
+                cursor = conn.cursor()
+                
+                # Fiche client (créée ou mise à jour)
+                client_id = self._upsert_client(
+                    cursor,
+                    receipt_data.get('client_name', ''),
+                    receipt_data.get('client_contact', ''),
+                    receipt_data['date']
+                )
+                
+                cursor.execute('''
+                    INSERT INTO receipts 
+                    (receipt_number, date, client_name, client_contact, items, total, payment_method, notes, client_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    receipt_data['receipt_number'],
+                    receipt_data['date'],
+                    receipt_data.get('client_name', ''),
+                    receipt_data.get('client_contact', ''),
+                    items_json,
+                    receipt_data['total'],
+                    receipt_data.get('payment_method', 'Espèces'),
+                    receipt_data.get('notes', ''),
+                    client_id
+                ))
+                receipt_id = cursor.lastrowid
+                
+                # Apprendre les produits du reçu
+                self._upsert_learned_products(cursor, receipt_data['items'])
+                
+                # Sortie de stock des articles vendus
+                self._record_sales(cursor, receipt_id, receipt_data['items'])
+                
+                # Incrémenter le compteur de reçus
+                cursor.execute('''
+                    UPDATE settings SET value = CAST(value AS INTEGER) + 1
+                    WHERE key = 'receipt_counter'
+                ''')
+        finally:
+            conn.close()
         
-        self.increment_receipt_counter()
+        return receipt_id
     
     def get_all_receipts(self):
-        """Obtenir tous les reçus"""
+        """Obtenir tous les reçus (base courante et archives annuelles)"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute('''
+        
+        select = '''
             SELECT id, receipt_number, date, client_name, total, created_at
-            FROM receipts
-            ORDER BY created_at DESC
-        ''')
+            FROM {schema}.receipts
+        '''
+        schemas = ['main'] + self.attach_archives(conn)
+        sql = ' UNION ALL '.join(select.format(schema=schema) for schema in schemas)
+        
+        cursor.execute(sql + ' ORDER BY created_at DESC')
         results = cursor.fetchall()
         conn.close()
         return results
     
+    def receipt_number_exists(self, receipt_number):
+        """Un reçu porte-t-il déjà ce numéro (base courante : les reçus récents) ?"""
+        conn = self.get_connection()
+        try:
+            return conn.execute('SELECT 1 FROM receipts WHERE receipt_number = ?',
+                                (receipt_number,)).fetchone() is not None
+        finally:
+            conn.close()
+    
     def get_receipt_by_id(self, receipt_id):
-        """Obtenir un reçu par ID"""
+        """Obtenir un reçu par ID (y compris dans les archives)"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute('''
+        query = '''
             SELECT receipt_number, date, client_name, client_contact, items, total, payment_method, notes
-            FROM receipts
+            FROM {schema}.receipts
             WHERE id = ?
-        ''', (receipt_id,))
+        '''
+        cursor.execute(query.format(schema='main'), (receipt_id,))
         result = cursor.fetchone()
+        
+        if not result:
+            for alias in self.attach_archives(conn):
+                cursor.execute(query.format(schema=alias), (receipt_id,))
+                result = cursor.fetchone()
+                if result:
+                    break
         conn.close()
         
         if result:
@@ -250,26 +796,288 @@ class Database:
         return None
     
     def search_receipts(self, query):
-        """Rechercher des reçus"""
+        """Rechercher des reçus (base courante et archives annuelles)"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute('''
+        
+        select = '''
             SELECT id, receipt_number, date, client_name, total, created_at
-            FROM receipts
+            FROM {schema}.receipts
             WHERE receipt_number LIKE ? OR client_name LIKE ?
-            ORDER BY created_at DESC
-        ''', (f'%{query}%', f'%{query}%'))
+        '''
+        schemas = ['main'] + self.attach_archives(conn)
+        sql = ' UNION ALL '.join(select.format(schema=schema) for schema in schemas)
+        
+        cursor.execute(sql + ' ORDER BY created_at DESC', 
+                       (f'%{query}%', f'%{query}%') * len(schemas))
+        results = cursor.fetchall()
+        conn.close()
+        return results
+    
+    def get_receipts_by_client(self, client_id):
+        """Reçus d'un client via l'index client_id (base courante et archives)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        select = '''
+            SELECT id, receipt_number, date, client_name, total, created_at
+            FROM {schema}.receipts
+            WHERE client_id = ?
+        '''
+        schemas = ['main'] + self.attach_archives(conn)
+        sql = ' UNION ALL '.join(select.format(schema=schema) for schema in schemas)
+        
+        cursor.execute(sql + ' ORDER BY created_at DESC', (client_id,) * len(schemas))
         results = cursor.fetchall()
         conn.close()
         return results
     
     def delete_receipt(self, receipt_id):
-        """Supprimer un reçu"""
+        """
+        Supprimer un reçu, de la base courante ou de son archive annuelle
+        (articles remis en stock, cumuls de ventes des produits corrigés)
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            query = 'SELECT receipt_number, items FROM {schema}.receipts WHERE id = ?'
+            
+            # Archives attachées hors transaction, seulement si le reçu n'est pas dans la base
+            schema = 'main'
+            cursor.execute(query.format(schema=schema), (receipt_id,))
+            row = cursor.fetchone()
+            if not row:
+                for schema in self.attach_archives(conn):
+                    cursor.execute(query.format(schema=schema), (receipt_id,))
+                    row = cursor.fetchone()
+                    if row:
+                        break
+            if not row:
+                return
+            
+            with conn:
+                items = json.loads(row[1])
+                self._record_sales(cursor, receipt_id, items, sign=1,
+                                   kind='adjustment', note=f"Annulation {row[0]}")
+                self._unlearn_sales(cursor, items)
+                cursor.execute(f'DELETE FROM {schema}.receipts WHERE id = ?', (receipt_id,))
+        finally:
+            conn.close()
+    
+    # ========== CLIENTS ==========
+    
+    def _upsert_client(self, cursor, name, contact='', used_at=None):
+        """
+        Créer ou mettre à jour la fiche d'un client dans la transaction en cours
+        Le nom arrive déjà formaté (contrôleur) et est enregistré tel quel
+        Retourne l'id du client (None pour un nom vide ou générique)
+        """
+        key = client_name_key(name)
+        if key in self.ANONYMOUS_CLIENT_KEYS:
+            return None
+        
+        cursor.execute('''
+            INSERT INTO clients (name, name_key, contact, receipt_count, last_used)
+            VALUES (?, ?, ?, 1, ?)
+            ON CONFLICT(name_key) DO UPDATE SET
+                name = excluded.name,
+                contact = CASE WHEN excluded.contact != '' THEN excluded.contact ELSE contact END,
+                receipt_count = receipt_count + 1,
+                last_used = excluded.last_used
+        ''', (' '.join(name.split()), key, (contact or '').strip(),
+              used_at or datetime.now().isoformat()))
+        
+        cursor.execute('SELECT id FROM clients WHERE name_key = ?', (key,))
+        return cursor.fetchone()[0]
+    
+    def _backfill_clients(self, cursor, schema='main'):
+        """
+        Construire le répertoire clients depuis l'historique des reçus
+        Les reçus sont parcourus dans l'ordre : le dernier nom et le dernier
+        contact non vide de chaque client sont conservés.
+        """
+        cursor.execute(f'''
+            SELECT id, client_name, client_contact, date FROM {schema}.receipts
+            WHERE client_id IS NULL
+            ORDER BY id
+        ''')
+        
+        clients, links = {}, []
+        for receipt_id, name, contact, date in cursor.fetchall():
+            key = client_name_key(name)
+            if key in self.ANONYMOUS_CLIENT_KEYS:
+                continue
+            _, last_contact, count, _ = clients.get(key, ('', '', 0, ''))
+            contact = (contact or '').strip() or last_contact
+            clients[key] = (' '.join(name.split()), contact, count + 1, date)
+            links.append((key, receipt_id))
+        
+        if not clients:
+            return 0
+        
+        cursor.executemany('''
+            INSERT INTO main.clients (name, name_key, contact, receipt_count, last_used)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(name_key) DO UPDATE SET
+                receipt_count = receipt_count + excluded.receipt_count
+        ''', [(name, key, contact, count, date)
+              for key, (name, contact, count, date) in clients.items()])
+        
+        cursor.executemany(f'''
+            UPDATE {schema}.receipts SET client_id = (SELECT id FROM main.clients WHERE name_key = ?)
+            WHERE id = ?
+        ''', links)
+        return len(clients)
+    
+    def backfill_clients(self):
+        """Rattacher à un client les reçus qui n'en ont pas encore"""
+        conn = self.get_connection()
+        try:
+            with conn:
+                return self._backfill_clients(conn.cursor())
+        finally:
+            conn.close()
+    
+    def search_clients(self, prefix, limit=10):
+        """
+        Rechercher des clients par début de nom (insensible à la casse et aux accents)
+        Plage sur name_key : la recherche utilise l'index unique
+        """
+        key = fold_name(prefix)
+        if not key:
+            return []
+        
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute('DELETE FROM receipts WHERE id = ?', (receipt_id,))
-        conn.commit()
+        cursor.execute('''
+            SELECT id, name, contact, receipt_count
+            FROM clients
+            WHERE name_key >= ? AND name_key < ?
+            ORDER BY receipt_count DESC, last_used DESC
+            LIMIT ?
+        ''', (key, key + '\U0010ffff', limit))
+        results = cursor.fetchall()
+        conn.close()
+        return results
+    
+    def get_client(self, client_id):
+        """Obtenir la fiche d'un client"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, name, contact, receipt_count, last_used
+            FROM clients WHERE id = ?
+        ''', (client_id,))
+        result = cursor.fetchone()
+        conn.close()
+        
+        if result:
+            return dict(zip(('id', 'name', 'contact', 'receipt_count', 'last_used'), result))
+        return None
+    
+    def iter_client_receipts(self, client_id, date_from=None, date_to=None, fetch_size=500):
+        """
+        Parcourir en flux les reçus d'un client sur une période (index client_id)
+        Tuples (id, receipt_number, date, total, payment_method) triés par date
+        """
+        conditions, params = ['client_id = ?'], [client_id]
+        if date_from:
+            conditions.append('date >= ?')
+            params.append(date_from)
+        if date_to:
+            conditions.append('date <= ?')
+            params.append(date_to)
+        
+        conn = self.get_connection()
+        try:
+            select = f'''
+                SELECT id, receipt_number, date, total, payment_method
+                FROM {{schema}}.receipts
+                WHERE {' AND '.join(conditions)}
+            '''
+            schemas = ['main'] + self.attach_archives(conn)
+            sql = ' UNION ALL '.join(select.format(schema=schema) for schema in schemas)
+            
+            cursor = conn.cursor()
+            cursor.execute(sql + ' ORDER BY date, id', params * len(schemas))
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+    
+    def get_clients_with_receipts(self, date_from, date_to):
+        """Clients ayant au moins un reçu sur la période (index date, base courante et archives)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        select = '''
+            SELECT client_id FROM {schema}.receipts
+            WHERE date >= ? AND date <= ? AND client_id IS NOT NULL
+        '''
+        schemas = ['main'] + self.attach_archives(conn)
+        sql = ' UNION ALL '.join(select.format(schema=schema) for schema in schemas)
+        
+        cursor.execute(f'''
+            SELECT id, name, contact FROM clients
+            WHERE id IN ({sql})
+            ORDER BY name_key
+        ''', (date_from, date_to) * len(schemas))
+        results = cursor.fetchall()
         conn.close()
+        return results
+    
+    # ========== ARCHIVES ==========
+    
+    def get_archive_path(self, year):
+        """Chemin de la base d'archive d'une année"""
+        return self.archive_dir / f"receipts_{year}.db"
+    
+    def get_archive_paths(self):
+        """Bases d'archive existantes, de la plus récente à la plus ancienne"""
+        if not self.archive_dir.exists():
+            return []
+        return sorted(self.archive_dir.glob('receipts_*.db'), reverse=True)
+    
+    def ensure_archive_schema(self, conn, alias):
+        """Créer la table des reçus dans une base d'archive attachée"""
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {alias}.receipts (
+                id INTEGER PRIMARY KEY,
+                receipt_number TEXT UNIQUE NOT NULL,
+                date TEXT NOT NULL,
+                client_name TEXT,
+                client_contact TEXT,
+                items TEXT NOT NULL,
+                total REAL NOT NULL,
+                payment_method TEXT,
+                notes TEXT,
+                created_at TEXT,
+                client_id INTEGER
+            )
+        ''')
+        
+        # Archives créées avant le répertoire clients
+        columns = [col[1] for col in conn.execute(f'PRAGMA {alias}.table_info(receipts)')]
+        if 'client_id' not in columns:
+            conn.execute(f'ALTER TABLE {alias}.receipts ADD COLUMN client_id INTEGER')
+            with conn:
+                self._backfill_clients(conn.cursor(), alias)
+        conn.execute(f'''
+            CREATE INDEX IF NOT EXISTS {alias}.idx_receipts_client ON receipts(client_id)
+        ''')
+    
+    def attach_archives(self, conn):
+        """Attacher les archives les plus récentes à une connexion, retourne les alias"""
+        aliases = []
+        for i, path in enumerate(self.get_archive_paths()[:self.MAX_ATTACHED_ARCHIVES]):
+            alias = f"archive_{i}"
+            conn.execute('ATTACH DATABASE ? AS ' + alias, (str(path),))
+            self.ensure_archive_schema(conn, alias)
+            aliases.append(alias)
+        return aliases
     
     # ========== PARAMÈTRES ==========
     
@@ -314,15 +1122,16 @@ class Database:
     # ========== STATISTIQUES ==========
     
     def get_statistics(self):
-        """Obtenir les statistiques"""
+        """Obtenir les statistiques (reçus de la base courante et des archives)"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT SUM(total) FROM receipts')
-        total_sales = cursor.fetchone()[0] or 0
-        
-        cursor.execute('SELECT COUNT(*) FROM receipts')
-        total_receipts = cursor.fetchone()[0] or 0
+        schemas = ['main'] + self.attach_archives(conn)
+        sql = ' UNION ALL '.join(f'SELECT total FROM {schema}.receipts' for schema in schemas)
+        cursor.execute(f'SELECT SUM(total), COUNT(*) FROM ({sql})')
+        total_sales, total_receipts = cursor.fetchone()
+        total_sales = total_sales or 0
+        total_receipts = total_receipts or 0
         
         avg_sale = total_sales / total_receipts if total_receipts > 0 else 0
         
@@ -339,11 +1148,12 @@ class Database:
         }
     
     def get_top_products(self, limit=5):
-        """Obtenir les produits les plus vendus"""
+        """Produits au plus fort chiffre d'affaires : (nom, quantité vendue, total)"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        # Parcours de idx_products_total_sold : seules les premières lignes sont lues
         cursor.execute('''
-            SELECT name, count, total_sold
+            SELECT name, quantity_sold, total_sold
             FROM products
             ORDER BY total_sold DESC
             LIMIT ?
@@ -353,17 +1163,21 @@ class Database:
         return results
     
     def clear_all_receipts(self):
-        """Effacer tous les reçus"""
+        """Effacer tous les reçus et récupérer l'espace disque"""
         conn = self.get_connection()
         cursor = conn.cursor()
         cursor.execute('DELETE FROM receipts')
         conn.commit()
+        cursor.execute('VACUUM')
         conn.close()
     
     def clear_all_products(self):
         """Effacer tous les produits"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.execute('DELETE FROM stock_movements')
+        cursor.execute('DELETE FROM stock_checkpoints')
+        cursor.execute('DELETE FROM price_history')
         cursor.execute('DELETE FROM products')
         conn.commit()
         conn.close()
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""
+Gestion du cycle de vie du dossier exports/
+- Index en base de chaque fichier généré (reçu, chemin, taille, empreinte SHA-256)
+- Dédoublonnage des régénérations au contenu identique
+- Rétention par âge et par taille, avec archivage mensuel en ZIP
+"""
+import hashlib
+import zipfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+class ExportManager:
+    def __init__(self, database, exports_dir='exports'):
+        self.db = database
+        self.exports_dir = Path(exports_dir)
+        self.archive_dir = self.exports_dir / 'archives'
+    
+    # ========== INDEX ==========
+    
+    def register(self, path, receipt_id=None, receipt_number=None, created_at=None):
+        """
+        Indexer un fichier exporté
+
+        Si un fichier au contenu identique est déjà indexé et présent sur le disque,
+        le nouveau fichier est supprimé et le chemin existant est retourné.
+        """
+        path = Path(path)
+        size = path.stat().st_size
+        digest = self._hash_file(path)
+        
+        conn = self.db.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, path FROM exports
+                WHERE sha256 = ? AND size = ? AND archived_in IS NULL AND path != ?
+                ORDER BY created_at
+            ''', (digest, size, str(path)))
+            
+            for export_id, existing in cursor.fetchall():
+                if Path(existing).exists():
+                    path.unlink()
+                    return existing
+                cursor.execute('DELETE FROM exports WHERE id = ?', (export_id,))
+            
+            cursor.execute('''
+                INSERT INTO exports (receipt_id, receipt_number, path, size, sha256, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    size = excluded.size, sha256 = excluded.sha256, archived_in = NULL
+            ''', (receipt_id, receipt_number, str(path), size, digest,
+                  created_at or datetime.fromtimestamp(path.stat().st_mtime).isoformat()))
+            conn.commit()
+        finally:
+            conn.close()
+        
+        return str(path)
+    
+    def find_existing(self, receipt_id):
+        """Dernier PDF encore présent sur le disque pour un reçu (ou None)"""
+        conn = self.db.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, path FROM exports
+                WHERE receipt_id = ? AND archived_in IS NULL
+                ORDER BY created_at DESC
+            ''', (receipt_id,))
+            
+            for export_id, path in cursor.fetchall():
+                if Path(path).exists():
+                    return path
+                # Fichier supprimé à la main : nettoyer l'index
+                cursor.execute('DELETE FROM exports WHERE id = ?', (export_id,))
+            conn.commit()
+        finally:
+            conn.close()
+        return None
+    
+    def reindex(self):
+        """
+        Indexer les PDF présents dans exports/ mais absents de l'index
+        (rattachés par numéro aux reçus de la base courante et des archives)
+        """
+        if not self.exports_dir.exists():
+            return 0
+        
+        conn = self.db.get_connection()
+        try:
+            known = {row[0] for row in conn.execute('SELECT path FROM exports')}
+            schemas = ['main'] + self.db.attach_archives(conn)
+            numbers = dict(conn.execute(' UNION ALL '.join(
+                f'SELECT receipt_number, id FROM {schema}.receipts' for schema in schemas)))
+        finally:
+            conn.close()
+        
+        added = 0
+        for path in sorted(self.exports_dir.glob('*.pdf')):
+            if str(path) in known:
+                continue
+            receipt_number = path.name.split('_')[0]
+            self.register(path, numbers.get(receipt_number), receipt_number,
+                          self._created_at_from_name(path))
+            added += 1
+        return added
+    
+    # ========== RÉTENTION ==========
+    
+    def enforce_retention(self, max_age_days=None, max_total_mb=None, compress=None):
+        """
+        Appliquer la politique de rétention des exports
+
+        Les fichiers plus vieux que max_age_days, puis les plus anciens tant que
+        le total dépasse max_total_mb, sont déplacés dans une archive ZIP
+        mensuelle (compress=True) ou supprimés.
+        """
+        if max_age_days is None:
+            max_age_days = int(self.db.get_setting('exports_max_age_days', '180'))
+        if max_total_mb is None:
+            max_total_mb = float(self.db.get_setting('exports_max_size_mb', '500'))
+        if compress is None:
+            compress = self.db.get_setting('exports_compress', 'true') == 'true'
+        
+        cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+        max_bytes = max_total_mb * 1024 * 1024
+        
+        conn = self.db.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, path, size, created_at FROM exports
+                WHERE archived_in IS NULL
+                ORDER BY created_at
+            ''')
+            live = cursor.fetchall()
+            total = sum(row[2] for row in live)
+            
+            retired = []
+            for export_id, path, size, created_at in live:
+                if created_at >= cutoff and total <= max_bytes:
+                    break
+                retired.append((export_id, path, created_at))
+                total -= size
+            
+            archived = deleted = 0
+            for export_id, path, created_at in retired:
+                source = Path(path)
+                if compress and source.exists():
+                    zip_path = self._archive_file(source, created_at)
+                    cursor.execute('UPDATE exports SET archived_in = ? WHERE id = ?',
+                                   (str(zip_path), export_id))
+                    archived += 1
+                else:
+                    cursor.execute('DELETE FROM exports WHERE id = ?', (export_id,))
+                    deleted += 1
+                if source.exists():
+                    source.unlink()
+            
+            conn.commit()
+        finally:
+            conn.close()
+        
+        return {'archived': archived, 'deleted': deleted, 'remaining_bytes': total}
+    
+    def _archive_file(self, source, created_at):
+        """Ajouter un fichier à l'archive ZIP de son mois"""
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        zip_path = self.archive_dir / f"exports_{created_at[:7]}.zip"
+        
+        with zipfile.ZipFile(zip_path, 'a', compression=zipfile.ZIP_DEFLATED) as archive:
+            if source.name not in archive.namelist():
+                archive.write(source, arcname=source.name)
+        return zip_path
+    
+    def get_total_size(self):
+        """Taille totale des exports non archivés (octets)"""
+        conn = self.db.get_connection()
+        try:
+            return conn.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM exports WHERE archived_in IS NULL'
+            ).fetchone()[0]
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def _created_at_from_name(path):
+        """Horodatage contenu dans le nom (FACT-00007_regenere_20260107_075338.pdf)"""
+        try:
+            stamp = '_'.join(path.stem.split('_')[-2:])
+            return datetime.strptime(stamp, '%Y%m%d_%H%M%S').isoformat()
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def _hash_file(path, chunk_size=65536):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
@@ -1,69 +1,64 @@
-import subprocess
-import tempfile
+import re
 from datetime import datetime
-import os
 from utils.name_formatter import format_client_name
+from utils.amount_in_words import amount_in_words, number_to_french
+from models.laser_renderers import create_renderer
+from models.print_spooler import create_spooler
+from utils.instrumentation import instrument
+from utils.text_layout import PageBuffer, TextLayout, display_width
 
+# Formats papier (mm) et densité calibrée sur l'A6 d'origine : 40 colonnes x 40 lignes
+MEDIA_SIZES_MM = {'A6': (105, 148), 'A5': (148, 210), 'A4': (210, 297)}
+COLUMNS_PER_MM = 40 / 105
+LINES_PER_MM = 40 / 148
+
+
+def media_size_mm(paper_format):
+    """(largeur, hauteur) en mm pour A6/A5/A4 ou Custom.LxHmm (A6 par défaut)"""
+    size = MEDIA_SIZES_MM.get(str(paper_format).upper())
+    if size is None:
+        match = re.fullmatch(r'Custom\.(\d+(?:\.\d+)?)x(\d+(?:\.\d+)?)mm', str(paper_format))
+        size = (float(match.group(1)), float(match.group(2))) if match else MEDIA_SIZES_MM['A6']
+    return size
+
+
+def media_geometry(paper_format):
+    """(colonnes, lignes par page) du format"""
+    width_mm, height_mm = media_size_mm(paper_format)
+    return int(width_mm * COLUMNS_PER_MM), int(height_mm * LINES_PER_MM)
+
+
+@instrument('printer', extra=('_format_receipt_with_pagination',))
 class LaserPrinter:
-    def __init__(self, settings):
+    def __init__(self, settings, spooler=None):
         self.settings = settings
         self.printer_name = settings.get('laser_printer_name', 'HP_LaserJet_1022n')
         self.paper_format = settings.get('laser_paper_format', 'Custom.105x148mm')
-        self.line_width = 40 
-        self.max_lines_per_page = 40
-        
-        # Tes quotas d'articles par page
-        self.items_first_page = 14
-        self.items_middle_page = 20
-        self.items_last_page = 14
+        self.spooler = spooler or create_spooler(settings)
+        # A6 = 40 x 40, A5 = 56 x 56, A4 = 80 x 80
+        self.line_width, self.max_lines_per_page = media_geometry(self.paper_format)
+        self.layout = TextLayout(self.line_width)
+        # Description (coupée une colonne avant la suivante), Qté, P.U, Montant
+        self.name_width = max(1, self.line_width - 23)
+        self.item_columns = self.layout.columns((self.name_width + 1, 'left', self.name_width),
+                                                (4, 'right', None), (8, 'right', None),
+                                                (8, 'right', None))
+        # Désignation trop longue : suite sur les lignes suivantes (1 = tronquée comme avant)
+        self.max_name_lines = max(1, int(settings.get('laser_name_lines', '2') or 1))
+        # PCL / PostScript envoyés bruts (laser_output), sinon texte filtré par CUPS
+        self.renderer = create_renderer(settings, *media_size_mm(self.paper_format),
+                                        max(self.line_width, self.item_columns.width),
+                                        self.max_lines_per_page)
 
     def _number_to_french(self, n):
         """Convertit un nombre en lettres françaises"""
-        if n == 0: return "zéro"
-        units = ["", "un", "deux", "trois", "quatre", "cinq", "six", "sept", "huit", "neuf"]
-        teens = ["dix", "onze", "douze", "treize", "quatorze", "quinze", "seize", "dix-sept", "dix-huit", "dix-neuf"]
-        tens = ["", "", "vingt", "trente", "quarante", "cinquante", "soixante", "soixante", "quatre-vingt", "quatre-vingt"]
-        
-        def convert_below_100(n):
-            if n < 10: return units[n]
-            elif n < 20: return teens[n - 10]
-            elif n < 70:
-                u, t = n % 10, n // 10
-                if u == 0: return tens[t]
-                return f"{tens[t]} et un" if u == 1 else f"{tens[t]}-{units[u]}"
-            elif n < 80: return f"soixante-{teens[n - 70]}"
-            elif n < 100:
-                u = n % 10
-                if n == 80: return "quatre-vingts"
-                return f"quatre-vingt-{units[u]}"
-            return ""
-
-        def convert_below_1000(n):
-            if n < 100: return convert_below_100(n)
-            h, r = n // 100, n % 100
-            res = "cent" if h == 1 else f"{units[h]} cent"
-            if r == 0: return res + ("s" if h > 1 else "")
-            return f"{res} {convert_below_100(r)}"
-
-        if n < 1000: return convert_below_1000(n)
-        if n < 1000000:
-            th, r = n // 1000, n % 1000
-            res = "mille" if th == 1 else f"{convert_below_1000(th)} mille"
-            return f"{res} {convert_below_1000(r)}" if r > 0 else res
-        return "nombre trop grand"
+        return number_to_french(n)
 
     def _sep(self, char='='):
         return char * self.line_width + "\n"
 
     def side_by_side(self, left, right):
-        left, right = str(left).strip(), str(right).strip()
-        total_len = len(left) + len(right)
-        if total_len >= self.line_width:
-            excess = total_len - self.line_width + 1
-            if len(right) > len(left): right = right[:-excess]
-            else: left = left[:-excess]
-        spaces = self.line_width - len(left) - len(right)
-        return left + (" " * spaces) + right + "\n"
+        return self.layout.side_by_side(left, right) + "\n"
 
     def _build_header(self, data):
         h = []
@@ -98,109 +93,185 @@ class LaserPrinter:
         h.append(self._sep())
         return h
 
-    def _get_item_row(self, item):
-        name = item["name"][:17] 
-        qty = str(item['quantity'])
-        price = f"{item['unit_price']:,.0f}"
-        total = f"{item['total']:,.0f}"
-        return f"{name:<18} {qty:>4} {price:>8} {total:>8}\n"
+    def _name_lines(self, name):
+        """Désignation découpée sur la colonne Description (une seule ligne si elle tient)"""
+        if self.max_name_lines == 1 or display_width(name) <= self.name_width:
+            return [name]
+        return self.layout.wrap(name, self.name_width)[:self.max_name_lines] or ['']
+
+    def _item_height(self, item):
+        """Lignes occupées par un article : désignation (éventuellement sur plusieurs lignes) + interligne"""
+        return len(self._name_lines(item["name"])) + 1
+
+    def _item_lines(self, item):
+        first, *rest = self._name_lines(item["name"])
+        lines = [self.item_columns.row(first, str(item['quantity']), f"{item['unit_price']:,.0f}",
+                                       f"{item['total']:,.0f}") + "\n"]
+        lines.extend(line + "\n" for line in rest)
+        lines.append("\n")
+        return lines
 
     def _build_footer(self, data):
         currency = self.settings.get("currency", "Ar")
         total_amount = int(data['total'])
-        amount_in_words = self._number_to_french(total_amount).capitalize()
+        language = self.settings.get('amount_words_language', 'fr')
+        words = amount_in_words(total_amount, language, fallback='').capitalize()
         
         f = [self._sep()]
-        amount_str = f"{total_amount:,.0f} {currency}"
-        spaces_needed = self.line_width - len("Total") - len(amount_str)
-        f.append("Total" + (" " * spaces_needed) + amount_str + "\n")
+        f.append(self.side_by_side("Total", f"{total_amount:,.0f} {currency}"))
         
-        words_line = f"En lettre: {amount_in_words} {currency.lower()}"
-        if len(words_line) <= self.line_width:
+        words_line = f"En lettre: {words} {currency.lower()}" if words else "En lettre:"
+        if display_width(words_line) <= self.line_width:
             f.append(words_line + "\n")
         else:
             f.append("En lettre:\n")
-            words = (amount_in_words + " " + currency.lower()).split()
-            current_line = ""
-            for word in words:
-                if len(current_line) + len(word) + 1 <= self.line_width:
-                    current_line += word + " "
-                else:
-                    f.append(current_line.strip() + "\n")
-                    current_line = word + " "
-            if current_line: f.append(current_line.strip() + "\n")
+            f.extend(line + "\n" for line in self.layout.wrap(f"{words} {currency.lower()}"))
         
-        f.append("\n" + "La gérance".rjust(self.line_width) + "\n")
-        f.append("................".rjust(self.line_width) + "\n")
-        f.append("\n" + self._sep())
-        f.append("Merci pour votre achat!".center(self.line_width) + "\n")
-        f.append("Mankasitraka Tompoko!".center(self.line_width) + "\n")
+        f.append("\n")
+        f.append(self.layout.fit("La gérance", 'right') + "\n")
+        f.append(self.layout.fit("................", 'right') + "\n")
+        f.append("\n")
+        f.append(self._sep())
+        f.append(self.layout.fit("Merci pour votre achat!", 'center') + "\n")
+        f.append(self.layout.fit("Mankasitraka Tompoko!", 'center') + "\n")
         return f
 
-    def _format_receipt_with_pagination(self, data):
+    def _paginate(self, heights, first_capacity, capacity, footer_height):
+        """
+        Découpage en une passe sur les hauteurs réelles des articles
+        Retourne les bornes [début, fin) des articles de chaque page, la
+        dernière portant le pied. Chaque page est remplie au maximum ; si le
+        pied ne tient pas après le dernier article, seul ce dernier passe avec
+        lui sur une nouvelle page, et s'il ne tient toujours pas (ou s'il n'y
+        a qu'un article sur la page), le pied prend une page à lui seul.
+        Aucune page ne dépasse sa capacité (sauf article plus haut qu'une page).
+        """
+        breaks = []
+        start, used, room = 0, 0, first_capacity
+        for index, height in enumerate(heights):
+            # Première page réduite par l'en-tête : l'article passe à la suivante
+            if used + height > room and (index > start or room < capacity):
+                breaks.append((start, index))
+                start, used, room = index, 0, capacity
+            used += height
+
+        end = len(heights)
+        if used + footer_height <= room:
+            breaks.append((start, end))
+        elif end - start > 1 and heights[-1] + footer_height <= capacity:
+            breaks.append((start, end - 1))
+            breaks.append((end - 1, end))
+        else:
+            breaks.append((start, end))
+            breaks.append((end, end))
+        return breaks
+
+    @staticmethod
+    def _split_block(lines, capacity):
+        """Bloc plus haut qu'une page (format très court) : morceaux d'au plus capacity lignes"""
+        return [lines[i:i + capacity] for i in range(0, len(lines), capacity)] or [[]]
+
+    def iter_pages(self, data):
+        """
+        Pages du reçu, produites une à une (pour un envoi en flux au spouleur)
+        Seules les hauteurs sont mesurées d'avance, le texte est mis en page
+        au moment où la page est demandée. Chaque page fait exactement
+        max_lines_per_page lignes (une page plus longue serait éjectée en deux
+        par l'imprimante).
+        """
         items = data["items"]
         header = self._build_header(data)
         footer = self._build_footer(data)
-        col_header = [f"{'Description':<18} {'Qté':>4} {'P.U':>8} {'Montant':>8}\n", "-"*self.line_width + "\n"]
+        col_header = [self.item_columns.row('Description', 'Qté', 'P.U', 'Montant') + "\n", self._sep('-')]
 
-        # --- DÉCOUPAGE PAR QUOTAS ---
-        pages_items = []
-        temp_items = list(items)
+        # En-tête de colonnes et numéro de page sur chaque page
+        capacity = max(1, self.max_lines_per_page - len(col_header) - 1)
+        # En-tête ou pied plus hauts qu'une page (format très court) : pages sans article
+        *header_pages, header = self._split_block(header, capacity)
+        footer_pages = self._split_block(footer, capacity)
+        footer = footer_pages.pop() if len(footer_pages) == 1 else []
+        heights = [self._item_height(item) for item in items]
 
-        if len(temp_items) <= self.items_first_page and len(temp_items) <= self.items_last_page:
-            pages_items.append(temp_items)
-        else:
-            pages_items.append(temp_items[:self.items_first_page])
-            temp_items = temp_items[self.items_first_page:]
-            while len(temp_items) > self.items_last_page:
-                pages_items.append(temp_items[:self.items_middle_page])
-                temp_items = temp_items[self.items_middle_page:]
-            if temp_items:
-                pages_items.append(temp_items)
-
-        total_pages = len(pages_items)
-        final_output = []
-
-        for i, page_content in enumerate(pages_items):
-            page_num = i + 1
-            is_first, is_last = (page_num == 1), (page_num == total_pages)
-            
-            p_text = []
-            if is_first: p_text.extend(header)
-            p_text.extend(col_header)
-
-            for item in page_content:
-                p_text.append(self._get_item_row(item))
-                p_text.append("\n")
-
-            used = len(p_text)
-            reserved = (len(footer) if is_last else 0) + 1
-            padding = self.max_lines_per_page - used - reserved
-            if padding > 0: p_text.extend(["\n"] * padding)
-            if is_last: p_text.extend(footer)
-
-            p_text.append(f"Page: {page_num}/{total_pages}".rjust(self.line_width) + "\n")
-            final_output.append("".join(p_text))
-
-        return "\f".join(final_output)
+        # (haut de page, premier article, fin des articles, bas de page)
+        pages = [(lines, 0, 0, []) for lines in header_pages]
+        for start, end in self._paginate(heights, capacity - len(header), capacity, len(footer)):
+            pages.append((header if len(pages) == len(header_pages) else [], start, end, []))
+        pages[-1] = pages[-1][:3] + (footer,)
+        pages.extend(([], len(items), len(items), lines) for lines in footer_pages)
+        total_pages = len(pages)
+
+        for page_num, (top, start, end, bottom) in enumerate(pages, 1):
+            page = PageBuffer(self.max_lines_per_page)
+            page.extend(top)
+            page.extend(col_header)
+            for index in range(start, end):
+                page.extend(self._item_lines(items[index]))
+
+            # Pied (dernière page) et numéro collés en bas, remplissage au milieu
+            page_line = self.layout.fit(f"Page: {page_num}/{total_pages}", 'right') + "\n"
+            yield page.render(bottom + [page_line])
+
+    def iter_document(self, data):
+        """Document en flux : pages séparées par un saut de page, fin de document sans blancs"""
+        previous = None
+        for page in self.iter_pages(data):
+            if previous is not None:
+                yield previous
+                yield "\f"
+            previous = page
+        if previous is not None:
+            yield previous.rstrip()
+
+    def _format_receipt_with_pagination(self, data):
+        return "\f".join(self.iter_pages(data))
+
+    def render_document(self, data):
+        """Document à envoyer au spouleur : PCL/PostScript en octets ou texte, en flux"""
+        if self.renderer:
+            return self.renderer.render(self.iter_pages(data))
+        return self.iter_document(data)
+
+    def _print_options(self):
+        """Options CUPS du travail (paramètres exacts du code d'origine pour le texte)"""
+        if self.renderer:
+            return self.renderer.options()
+        return {
+            'media': self.paper_format,
+            'cpi': 12, 'lpi': 8,
+            'page-left': 5, 'page-right': 5,
+            'page-top': 5, 'page-bottom': 5,
+            'fit-to-page': True,
+        }
 
     def print_receipt(self, data):
         try:
-            content = self._format_receipt_with_pagination(data).strip()
-            with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".txt") as tmp:
-                tmp.write(content)
-                path = tmp.name
-
-            # Retour aux paramètres EXACTS de ton code d'origine
-            result = subprocess.run(
-                ["lp", "-d", self.printer_name, "-o", f"media={self.paper_format}",
-                 "-o", "cpi=12", "-o", "lpi=8", 
-                 "-o", "page-left=5", "-o", "page-right=5",
-                 "-o", "page-top=5", "-o", "page-bottom=5", 
-                 "-o", "fit-to-page", path],
-                capture_output=True, text=True, timeout=10
-            )
-            os.unlink(path)
-            return (True, "Impression OK") if result.returncode == 0 else (False, result.stderr)
+            return self.spooler.print_now(self.render_document(data), self._print_options(),
+                                          job_name=data.get('receipt_number', 'Reçu'))
         except Exception as e:
-            return False, str(e)
\ No newline at end of file
+            return False, str(e)
+
+    def submit_receipts(self, receipts, callback=None):
+        """Soumettre plusieurs reçus en un seul travail, retourne un Future[PrintJob]"""
+        contents = (self.render_document(data) for data in receipts)
+        # PCL/PostScript : documents simplement mis bout à bout (chacun finit sa dernière page)
+        return self.spooler.submit_batch(contents, self._print_options(), callback=callback,
+                                         separator=b'' if self.renderer else "\f")
+
+    def check_connection(self):
+        """Vérifier que l'imprimante est connue de CUPS"""
+        return self.spooler.check_printer()
+
+    def test_print(self):
+        data = {
+            "receipt_number": "TEST-00001",
+            "date": datetime.now().strftime("%Y-%m-%d"),
+            "client_name": "Client Test",
+            "client_contact": "034 00 000 00\nQuartier Ambodonakanga\nAntananarivo",
+            "items": [
+                {"name": "Produit de test 1", "quantity": 2, "unit_price": 5000, "total": 10000},
+                {"name": "Produit de test 2", "quantity": 1, "unit_price": 15000, "total": 15000},
+            ],
+            "total": 25000,
+            "payment_method": "Espèces"
+        }
+        return self.print_receipt(data)
@@ -0,0 +1,140 @@
+"""
+Rendu direct des reçus laser en PCL 5 ou PostScript
+- Les pages mises en page par LaserPrinter.iter_pages sont converties ligne
+  à ligne dans le langage de l'imprimante, en flux (une page à la fois)
+- Le travail est soumis en « raw » : CUPS le transmet tel quel, sans la
+  chaîne de filtres texte -> PDF -> trame (plusieurs secondes par reçu)
+- Police Courier à chasse fixe, pas et interligne calculés pour que les
+  colonnes et lignes de la page occupent la zone imprimable du format
+"""
+
+MM_PER_INCH = 25.4
+POINTS_PER_MM = 72 / MM_PER_INCH
+MARGIN_MM = 6        # zone non imprimable des laser (≈ 1/4 de pouce)
+
+
+class PageRenderer:
+    """Base commune : géométrie de la page et options CUPS du travail brut"""
+
+    name = None
+    encoding = 'latin-1'
+
+    def __init__(self, width_mm, height_mm, columns, lines):
+        self.width_mm = width_mm
+        self.height_mm = height_mm
+        self.columns = columns
+        self.lines = lines
+
+    def options(self):
+        return {'raw': True}
+
+    def render(self, pages):
+        """Flux d'octets du document (itérable), pages = textes de LaserPrinter.iter_pages"""
+        raise NotImplementedError
+
+    def _encode(self, text):
+        return text.encode(self.encoding, errors='replace')
+
+
+class PclRenderer(PageRenderer):
+    """HP PCL 5 (LaserJet) : police Courier interne, une ligne = texte + CR/LF"""
+
+    name = 'pcl'
+    encoding = 'cp1252'
+    # Codes de format PCL (ESC &l#A)
+    PAGE_SIZES = {(105, 148): 24, (148, 210): 25, (210, 297): 26}
+
+    def _page_size(self):
+        """Plus petit format standard contenant la page (A4 à défaut)"""
+        for (width, height), code in sorted(self.PAGE_SIZES.items()):
+            if round(self.width_mm) <= width and round(self.height_mm) <= height:
+                return code
+        return self.PAGE_SIZES[(210, 297)]
+
+    def _prologue(self):
+        page_size = self._page_size()
+        pitch = self.columns / ((self.width_mm - 2 * MARGIN_MM) / MM_PER_INCH)
+        vmi = 48 * ((self.height_mm - 2 * MARGIN_MM) / MM_PER_INCH) / self.lines
+        commands = [
+            '\x1bE',                            # réinitialisation
+            f'\x1b&l{page_size}A',              # format
+            '\x1b&l0O',                         # portrait
+            '\x1b&l0E',                         # pas de marge haute (la page gère ses lignes)
+            f'\x1b&l{self.lines}F',             # longueur de texte
+            '\x1b&k2G',                         # LF = CR + LF
+            '\x1b(19U',                         # jeu Windows Latin 1 (cp1252)
+            f'\x1b(s0p{pitch:.2f}h0s0b4099T',   # Courier, chasse fixe
+            f'\x1b&l{vmi:.4f}C',                # interligne (1/48 de pouce)
+        ]
+        return ''.join(commands)
+
+    def render(self, pages):
+        yield self._encode(self._prologue())
+        for page_num, page in enumerate(pages):
+            if page_num:
+                yield b'\x0c'
+            yield self._encode(page.rstrip('\n'))
+        yield b'\x0c\x1bE'
+
+
+class PostScriptRenderer(PageRenderer):
+    """PostScript niveau 2 : Courier réencodé en ISO Latin 1, une procédure par ligne"""
+
+    name = 'postscript'
+    ESCAPES = str.maketrans({'\\': '\\\\', '(': '\\(', ')': '\\)'})
+
+    def _prologue(self):
+        width, height = self.width_mm * POINTS_PER_MM, self.height_mm * POINTS_PER_MM
+        margin = MARGIN_MM * POINTS_PER_MM
+        leading = (height - 2 * margin) / self.lines
+        # Courier : 0,6 em par caractère
+        size = min((width - 2 * margin) / self.columns / 0.6, leading)
+        return '\n'.join([
+            '%!PS-Adobe-3.0',
+            '%%Creator: Generateur de Recus Pro',
+            '%%Pages: (atend)',
+            f'%%DocumentMedia: receipt {width:.0f} {height:.0f} 0 () ()',
+            '%%EndComments',
+            '%%BeginProlog',
+            '/Courier findfont dup length dict begin',
+            '  { 1 index /FID ne { def } { pop pop } ifelse } forall',
+            '  /Encoding ISOLatin1Encoding def currentdict end',
+            '/Courier-Latin1 exch definefont pop',
+            f'/lead {leading:.3f} def /left {margin:.3f} def /top {height - margin - size:.3f} def',
+            f'/P {{ /y top def /Courier-Latin1 findfont {size:.3f} scalefont setfont }} def',
+            '/L { left y moveto show /y y lead sub def } def',
+            '/N { /y y lead sub def } def',
+            '%%EndProlog',
+            '%%BeginSetup',
+            f'<< /PageSize [{width:.0f} {height:.0f}] >> setpagedevice',
+            '%%EndSetup',
+            '',
+        ])
+
+    def _line(self, line):
+        if not line.strip():
+            return 'N'
+        text = line.translate(self.ESCAPES)
+        if not text.isascii():
+            # Caractères 8 bits en octal : fichier 7 bits, sûr pour tous les spouleurs
+            text = ''.join(ch if ch < '\x80' else f'\\{ord(ch) if ord(ch) < 256 else 63:03o}'
+                           for ch in text)
+        return f'({text})L'
+
+    def render(self, pages):
+        yield self._encode(self._prologue())
+        count = 0
+        for count, page in enumerate(pages, 1):
+            lines = page.rstrip('\n').split('\n')
+            body = '\n'.join(self._line(line) for line in lines)
+            yield self._encode(f'%%Page: {count} {count}\nsave P\n{body}\nrestore showpage\n')
+        yield self._encode(f'%%Trailer\n%%Pages: {count}\n%%EOF\n')
+
+
+RENDERERS = {renderer.name: renderer for renderer in (PclRenderer, PostScriptRenderer)}
+
+
+def create_renderer(settings, width_mm, height_mm, columns, lines):
+    """Rendu configuré (paramètre laser_output) ou None pour l'envoi en texte filtré par CUPS"""
+    renderer = RENDERERS.get(settings.get('laser_output', 'text'))
+    return renderer(width_mm, height_mm, columns, lines) if renderer else None
@@ -0,0 +1,409 @@
+"""
+Spouleur d'impression pour l'imprimante laser
+- LpSpooler : envoie le contenu à `lp` par l'entrée standard (aucun fichier temporaire)
+- IppSpooler : soumet directement à CUPS en IPP (http://localhost:631), sans processus
+Les travaux sont soumis en tâche de fond ; chaque soumission retourne un Future
+dont le résultat est un PrintJob (numéro de travail CUPS, statut).
+"""
+import abc
+import getpass
+import http.client
+import re
+import shlex
+import struct
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.instrumentation import instrument
+
+
+class PrintJob:
+    """Résultat d'une soumission d'impression"""
+
+    def __init__(self, job_id=None, status='pending', message='', documents=1):
+        self.job_id = job_id
+        self.status = status
+        self.message = message
+        self.documents = documents
+
+    @property
+    def ok(self):
+        return self.status != 'error'
+
+    def __repr__(self):
+        return f"PrintJob(job_id={self.job_id!r}, status={self.status!r})"
+
+
+@instrument('printer', extra=('_run_job',))
+class PrintSpooler(abc.ABC):
+    """Base commune : file d'attente asynchrone et regroupement des travaux"""
+
+    def __init__(self, printer_name, timeout=10):
+        self.printer_name = printer_name
+        self.timeout = timeout
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self):
+        # Un seul worker : les travaux partent dans l'ordre de soumission
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='spooler')
+            return self._executor
+
+    def submit(self, content, options=None, job_name='Reçu', callback=None):
+        """Soumettre un travail en tâche de fond, retourne un Future[PrintJob]"""
+        future = self._get_executor().submit(self._run_job, content, options or {}, job_name, 1)
+        if callback:
+            future.add_done_callback(lambda f: callback(f.result()))
+        return future
+
+    def submit_batch(self, contents, options=None, job_name='Réimpression', callback=None,
+                     separator="\f"):
+        """Regrouper plusieurs documents en un seul travail (séparés par un saut de page)"""
+        contents = list(contents)
+        future = self._get_executor().submit(
+            self._run_job, self._join_pages(contents, separator), options or {}, job_name,
+            len(contents)
+        )
+        if callback:
+            future.add_done_callback(lambda f: callback(f.result()))
+        return future
+
+    def print_now(self, content, options=None, job_name='Reçu'):
+        """Imprimer et attendre la soumission, retourne (succès, message)"""
+        job = self._run_job(content, options or {}, job_name, 1)
+        if job.ok:
+            return True, f"Impression OK (travail {job.job_id})" if job.job_id else "Impression OK"
+        return False, job.message
+
+    def _run_job(self, content, options, job_name, documents):
+        try:
+            job_id = self._send(content, options, job_name)
+            return PrintJob(job_id, 'submitted', documents=documents)
+        except Exception as e:
+            return PrintJob(None, 'error', str(e), documents=documents)
+
+    @staticmethod
+    def _join_pages(contents, separator="\f"):
+        """Concaténer des documents avec un saut de page (ou un autre séparateur), en flux"""
+        for i, content in enumerate(contents):
+            if i and separator:
+                yield separator
+            if isinstance(content, (str, bytes)):
+                yield content
+            else:
+                yield from content
+
+    @staticmethod
+    def _iter_bytes(content):
+        """Accepter une chaîne, des octets ou un itérable de morceaux (pages)"""
+        if isinstance(content, bytes):
+            yield content
+        elif isinstance(content, str):
+            yield content.encode('utf-8')
+        else:
+            for chunk in content:
+                yield chunk if isinstance(chunk, bytes) else chunk.encode('utf-8')
+
+    @abc.abstractmethod
+    def _send(self, content, options, job_name):
+        """Transmettre un travail, retourne le numéro de travail (ou None)"""
+
+    @abc.abstractmethod
+    def get_status(self, job_id):
+        """État d'un travail soumis"""
+
+    @abc.abstractmethod
+    def check_printer(self):
+        """(disponible, message)"""
+
+    def shutdown(self, wait=True):
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+@instrument('printer', extra=('_send',))
+class LpSpooler(PrintSpooler):
+    """Impression via la commande lp, contenu transmis par stdin"""
+
+    REQUEST_ID_RE = re.compile(r'request id is (\S+)')
+
+    def __init__(self, printer_name, command='lp', timeout=10):
+        super().__init__(printer_name, timeout)
+        self.command = shlex.split(command) if isinstance(command, str) else list(command)
+
+    def _build_command(self, options, job_name):
+        cmd = self.command + ['-d', self.printer_name, '-t', job_name]
+        for key, value in options.items():
+            cmd += ['-o', key if value is True else f"{key}={value}"]
+        return cmd
+
+    def _send(self, content, options, job_name):
+        process = subprocess.Popen(
+            self._build_command(options, job_name),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        # Sorties lues pendant l'écriture : lp ne reste pas bloqué sur un tube plein
+        outputs = {}
+        readers = [threading.Thread(target=self._drain, args=(pipe, outputs, name), daemon=True)
+                   for name, pipe in (('stdout', process.stdout), ('stderr', process.stderr))]
+        for reader in readers:
+            reader.start()
+
+        try:
+            for chunk in self._iter_bytes(content):
+                process.stdin.write(chunk)
+        except BrokenPipeError:
+            pass
+        except BaseException:
+            # Document incomplet : lp est arrêté avant que la fermeture de stdin
+            # ne lui fasse soumettre un travail tronqué
+            process.kill()
+            process.wait()
+            raise
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+
+        try:
+            process.wait(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            raise RuntimeError(f"lp ne répond pas après {self.timeout} s")
+        finally:
+            for reader in readers:
+                reader.join()
+
+        if process.returncode != 0:
+            raise RuntimeError(outputs['stderr'].decode('utf-8', errors='replace').strip() or
+                               f"lp a échoué (code {process.returncode})")
+
+        match = self.REQUEST_ID_RE.search(outputs['stdout'].decode('utf-8', errors='replace'))
+        return match.group(1) if match else None
+
+    @staticmethod
+    def _drain(pipe, outputs, name):
+        with pipe:
+            outputs[name] = pipe.read()
+
+    def get_status(self, job_id):
+        """'pending' si le travail est encore dans la file, sinon 'completed'"""
+        result = subprocess.run(['lpstat', '-W', 'not-completed', '-o', self.printer_name],
+                                capture_output=True, text=True, timeout=self.timeout)
+        if result.returncode != 0:
+            return 'unknown'
+        pending = {line.split()[0] for line in result.stdout.splitlines() if line.strip()}
+        return 'pending' if job_id in pending else 'completed'
+
+    def check_printer(self):
+        try:
+            result = subprocess.run(['lpstat', '-p', self.printer_name],
+                                    capture_output=True, text=True, timeout=self.timeout)
+        except FileNotFoundError:
+            return False, "CUPS (lpstat) n'est pas installé"
+        except subprocess.TimeoutExpired:
+            return False, "CUPS ne répond pas"
+        if result.returncode == 0:
+            return True, result.stdout.strip() or f"Imprimante {self.printer_name} disponible"
+        return False, result.stderr.strip() or f"Imprimante {self.printer_name} introuvable"
+
+
+@instrument('printer', extra=('_send',))
+class IppSpooler(PrintSpooler):
+    """Soumission directe au serveur CUPS local en IPP/1.1 (sans lancer de processus)"""
+
+    # Opérations et balises IPP (RFC 8010 / 8011)
+    PRINT_JOB = 0x0002
+    GET_JOB_ATTRIBUTES = 0x0009
+    GET_PRINTER_ATTRIBUTES = 0x000B
+
+    TAG_OPERATION = 0x01
+    TAG_JOB = 0x02
+    TAG_END = 0x03
+    TAG_INTEGER = 0x21
+    TAG_BOOLEAN = 0x22
+    TAG_ENUM = 0x23
+    TAG_NAME = 0x42
+    TAG_KEYWORD = 0x44
+    TAG_URI = 0x45
+    TAG_CHARSET = 0x47
+    TAG_LANGUAGE = 0x48
+    TAG_MIME = 0x49
+
+    JOB_STATES = {3: 'pending', 4: 'pending', 5: 'processing', 6: 'stopped',
+                  7: 'canceled', 8: 'aborted', 9: 'completed'}
+
+    def __init__(self, printer_name, host='localhost', port=631, timeout=10,
+                 document_format='text/plain'):
+        super().__init__(printer_name, timeout)
+        self.host = host
+        self.port = port
+        self.document_format = document_format
+        self._request_id = 0
+
+    @property
+    def printer_uri(self):
+        return f"ipp://{self.host}:{self.port}/printers/{self.printer_name}"
+
+    def _next_request_id(self):
+        self._request_id += 1
+        return self._request_id
+
+    @staticmethod
+    def _attr(tag, name, value):
+        name = name.encode('utf-8')
+        if tag in (IppSpooler.TAG_INTEGER, IppSpooler.TAG_ENUM):
+            value = struct.pack('>i', value)
+        elif tag == IppSpooler.TAG_BOOLEAN:
+            value = b'\x01' if value else b'\x00'
+        else:
+            value = str(value).encode('utf-8')
+        return struct.pack('>bh', tag, len(name)) + name + struct.pack('>h', len(value)) + value
+
+    def _header(self, operation, extra=()):
+        parts = [
+            struct.pack('>bbhi', 1, 1, operation, self._next_request_id()),
+            struct.pack('>b', self.TAG_OPERATION),
+            self._attr(self.TAG_CHARSET, 'attributes-charset', 'utf-8'),
+            self._attr(self.TAG_LANGUAGE, 'attributes-natural-language', 'fr'),
+            self._attr(self.TAG_URI, 'printer-uri', self.printer_uri),
+            self._attr(self.TAG_NAME, 'requesting-user-name', getpass.getuser()),
+        ]
+        parts.extend(extra)
+        return parts
+
+    def _job_attributes(self, options):
+        parts = [struct.pack('>b', self.TAG_JOB)]
+        for key, value in options.items():
+            if value is True:
+                parts.append(self._attr(self.TAG_BOOLEAN, key, True))
+            elif str(value).isdigit():
+                parts.append(self._attr(self.TAG_INTEGER, key, int(value)))
+            else:
+                parts.append(self._attr(self.TAG_KEYWORD, key, value))
+        return parts
+
+    def _post(self, body_chunks):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            connection.putrequest('POST', f"/printers/{self.printer_name}")
+            connection.putheader('Content-Type', 'application/ipp')
+            connection.putheader('Transfer-Encoding', 'chunked')
+            connection.endheaders()
+            for chunk in body_chunks:
+                if chunk:
+                    connection.send(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            connection.send(b'0\r\n\r\n')
+
+            response = connection.getresponse()
+            data = response.read()
+            if response.status != 200:
+                raise RuntimeError(f"CUPS a répondu HTTP {response.status}")
+            return self._parse_response(data)
+        finally:
+            connection.close()
+
+    def _parse_response(self, data):
+        """Décoder une réponse IPP : (code de statut, {nom: valeur})"""
+        status_code = struct.unpack('>h', data[2:4])[0]
+        attributes = {}
+        pos, name = 8, None
+        while pos < len(data):
+            tag = data[pos]
+            pos += 1
+            if tag == self.TAG_END:
+                break
+            if tag < 0x10:
+                continue
+            name_len = struct.unpack('>h', data[pos:pos + 2])[0]
+            pos += 2
+            if name_len:
+                name = data[pos:pos + name_len].decode('utf-8')
+            pos += name_len
+            value_len = struct.unpack('>h', data[pos:pos + 2])[0]
+            pos += 2
+            raw = data[pos:pos + value_len]
+            pos += value_len
+            if tag in (self.TAG_INTEGER, self.TAG_ENUM) and value_len == 4:
+                value = struct.unpack('>i', raw)[0]
+            else:
+                value = raw.decode('utf-8', errors='replace')
+            attributes.setdefault(name, value)
+        return status_code, attributes
+
+    def _send(self, content, options, job_name):
+        header = self._header(self.PRINT_JOB, [
+            self._attr(self.TAG_NAME, 'job-name', job_name),
+            self._attr(self.TAG_MIME, 'document-format',
+                       'application/vnd.cups-raw' if options.get('raw') else self.document_format),
+        ])
+        job_options = {k: v for k, v in options.items() if k != 'raw'}
+        header += self._job_attributes(job_options)
+        header.append(struct.pack('>b', self.TAG_END))
+
+        def body():
+            yield b''.join(header)
+            yield from self._iter_bytes(content)
+
+        status_code, attributes = self._post(body())
+        if status_code >= 0x0400:
+            raise RuntimeError(attributes.get('status-message') or f"Erreur IPP 0x{status_code:04x}")
+        return attributes.get('job-id')
+
+    def get_status(self, job_id):
+        header = self._header(self.GET_JOB_ATTRIBUTES, [
+            self._attr(self.TAG_INTEGER, 'job-id', int(job_id)),
+        ])
+        header.append(struct.pack('>b', self.TAG_END))
+        _, attributes = self._post([b''.join(header)])
+        return self.JOB_STATES.get(attributes.get('job-state'), 'unknown')
+
+    def check_printer(self):
+        header = self._header(self.GET_PRINTER_ATTRIBUTES)
+        header.append(struct.pack('>b', self.TAG_END))
+        try:
+            status_code, attributes = self._post([b''.join(header)])
+        except OSError as e:
+            return False, f"CUPS injoignable sur {self.host}:{self.port}: {e}"
+        if status_code >= 0x0400:
+            return False, attributes.get('status-message') or f"Imprimante {self.printer_name} introuvable"
+        return True, f"Imprimante {self.printer_name} disponible (IPP)"
+
+
+@instrument('printer', extra=('_send',))
+class NullSpooler(PrintSpooler):
+    """Spouleur sans imprimante : le contenu est produit puis jeté (rejeu, mesures)"""
+
+    def __init__(self, printer_name='null', timeout=10):
+        super().__init__(printer_name, timeout)
+        self.jobs = 0
+        self.bytes_sent = 0
+
+    def _send(self, content, options, job_name):
+        # Consommer le flux comme une vraie soumission (pagination paresseuse comprise)
+        self.bytes_sent += sum(len(chunk) for chunk in self._iter_bytes(content))
+        self.jobs += 1
+        return f"null-{self.jobs}"
+
+    def get_status(self, job_id):
+        return 'completed'
+
+    def check_printer(self):
+        return True, "Imprimante factice"
+
+
+def create_spooler(settings):
+    """Créer le spouleur configuré dans les paramètres"""
+    printer_name = settings.get('laser_printer_name', 'HP_LaserJet_1022n')
+
+    if settings.get('laser_spooler', 'lp') == 'ipp':
+        host, _, port = settings.get('cups_server', 'localhost:631').partition(':')
+        return IppSpooler(printer_name, host=host or 'localhost', port=int(port or 631))
+
+    return LpSpooler(printer_name, command=settings.get('laser_lp_command', 'lp'))
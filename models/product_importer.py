@@ -0,0 +1,257 @@
+"""
+Import en masse du catalogue produits (CSV / Excel)
+Lecture en flux par blocs et UPSERT groupé dans une seule transaction
+"""
+import csv
+import io
+import re
+import time
+from decimal import Decimal
+from pathlib import Path
+
+from models.database import Database
+
+
+# Noms de colonnes reconnus (comparaison en minuscules, sans espaces superflus)
+NAME_COLUMNS = ('name', 'nom', 'produit', 'designation', 'désignation', 'article', 'description')
+PRICE_COLUMNS = ('unit_price', 'prix', 'prix unitaire', 'prix_unitaire', 'pu', 'p.u', 'price')
+SKU_COLUMNS = ('sku', 'code', 'code barre', 'code-barre', 'code_barre', 'code barres', 'ean',
+               'barcode', 'référence', 'reference', 'ref')
+
+MAX_NAME_LENGTH = 200
+MAX_REPORTED_ERRORS = 50
+
+
+class ProductImporter:
+    def __init__(self, database, chunk_size=5000):
+        self.db = database
+        self.chunk_size = chunk_size
+    
+    def import_file(self, path, progress_callback=None):
+        """
+        Importer un catalogue CSV ou XLSX dans la table products
+
+        progress_callback(lignes_traitées, fraction) est appelé après chaque bloc,
+        fraction vaut None si la taille totale est inconnue.
+        Retourne un rapport : importés, rejetés, erreurs (ligne, motif), durée.
+        """
+        path = Path(path)
+        suffix = path.suffix.lower()
+        
+        if suffix in ('.csv', '.txt'):
+            rows = self._iter_csv_rows(path)
+        elif suffix in ('.xlsx', '.xlsm'):
+            rows = self._iter_xlsx_rows(path)
+        else:
+            raise ValueError(f"Format non supporté: {path.suffix}")
+        
+        started = time.perf_counter()
+        report = {'imported': 0, 'rejected': 0, 'errors': [], 'duration': 0.0}
+        
+        conn = self.db.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN')
+            
+            name_idx = price_idx = sku_idx = None
+            seen_skus = set()
+            chunk = []
+            processed = 0
+            
+            for line_no, row, fraction in rows:
+                if name_idx is None:
+                    name_idx, price_idx, sku_idx = self._resolve_columns(row)
+                    continue
+                
+                processed += 1
+                try:
+                    name, price, sku = self._validate_row(row, name_idx, price_idx, sku_idx)
+                    if sku is not None:
+                        if sku in seen_skus:
+                            raise ValueError(f"Code-barres en double: {sku}")
+                        seen_skus.add(sku)
+                    chunk.append((name, price, sku))
+                except ValueError as e:
+                    report['rejected'] += 1
+                    if len(report['errors']) < MAX_REPORTED_ERRORS:
+                        report['errors'].append((line_no, str(e)))
+                
+                if len(chunk) >= self.chunk_size:
+                    report['imported'] += self._flush(cursor, chunk)
+                    chunk = []
+                    if progress_callback:
+                        progress_callback(processed, fraction)
+            
+            if name_idx is None:
+                raise ValueError("Fichier vide : aucune ligne d'en-tête trouvée")
+            
+            if chunk:
+                report['imported'] += self._flush(cursor, chunk)
+            
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        
+        if progress_callback:
+            progress_callback(processed, 1.0)
+        
+        report['duration'] = time.perf_counter() - started
+        return report
+    
+    def _flush(self, cursor, chunk):
+        """
+        Écrire un bloc de produits (UPSERT groupé)
+        Le catalogue fait foi : un code-barres porté par un autre produit lui est retiré
+        """
+        cursor.executemany('''
+            UPDATE products SET sku = NULL WHERE sku = ? AND name <> ?
+        ''', [(sku, name) for name, _, sku in chunk if sku is not None])
+        cursor.executemany('''
+            INSERT INTO products (name, unit_price, sku)
+            VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                unit_price = excluded.unit_price,
+                sku = COALESCE(excluded.sku, sku)
+        ''', chunk)
+        return len(chunk)
+    
+    # ========== LECTURE ==========
+    
+    def _iter_csv_rows(self, path):
+        """Lire un CSV en flux : (numéro de ligne, valeurs, fraction lue)"""
+        size = path.stat().st_size or 1
+        
+        with open(path, 'rb') as raw:
+            sample = raw.read(65536)
+            encoding = self._detect_encoding(sample)
+            try:
+                dialect = csv.Sniffer().sniff(sample.decode(encoding, errors='ignore'),
+                                              delimiters=';,\t|')
+            except csv.Error:
+                dialect = csv.excel
+            raw.seek(0)
+            
+            text = io.TextIOWrapper(raw, encoding=encoding, newline='')
+            reader = csv.reader(text, dialect)
+            
+            for row in reader:
+                if not any(cell.strip() for cell in row):
+                    continue
+                yield reader.line_num, row, min(raw.tell() / size, 1.0)
+    
+    def _iter_xlsx_rows(self, path):
+        """Lire un classeur Excel en flux (mode lecture seule d'openpyxl)"""
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("L'import Excel nécessite le paquet openpyxl")
+        
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            max_row = sheet.max_row or None
+            
+            for line_no, values in enumerate(sheet.iter_rows(values_only=True), 1):
+                row = ['' if v is None else str(v) for v in values]
+                if not any(cell.strip() for cell in row):
+                    continue
+                yield line_no, row, (line_no / max_row) if max_row else None
+        finally:
+            workbook.close()
+    
+    @staticmethod
+    def _detect_encoding(sample):
+        """UTF-8 (avec ou sans BOM) sinon Windows-1252 (exports Excel)"""
+        try:
+            sample.decode('utf-8')
+            return 'utf-8-sig'
+        except UnicodeDecodeError as e:
+            # Un caractère multi-octets coupé en fin d'échantillon reste de l'UTF-8
+            if e.start >= len(sample) - 3:
+                return 'utf-8-sig'
+            return 'cp1252'
+    
+    # ========== VALIDATION ==========
+    
+    @staticmethod
+    def _resolve_columns(header):
+        """Trouver les colonnes nom, prix et code-barres (facultatif) dans l'en-tête"""
+        normalized = [' '.join(h.strip().lower().split()) for h in header]
+        
+        name_idx = next((i for i, h in enumerate(normalized) if h in NAME_COLUMNS), None)
+        price_idx = next((i for i, h in enumerate(normalized) if h in PRICE_COLUMNS), None)
+        sku_idx = next((i for i, h in enumerate(normalized) if h in SKU_COLUMNS), None)
+        
+        if name_idx is None or price_idx is None:
+            raise ValueError(
+                "En-tête invalide : colonnes attendues 'nom' et 'prix' "
+                f"(trouvé: {', '.join(h for h in header if h)})"
+            )
+        return name_idx, price_idx, sku_idx
+    
+    @classmethod
+    def _validate_row(cls, row, name_idx, price_idx, sku_idx=None):
+        """Valider une ligne et retourner (nom, prix, code-barres ou None)"""
+        if len(row) <= max(name_idx, price_idx):
+            raise ValueError("Colonnes manquantes")
+        
+        name = ' '.join(row[name_idx].split())
+        if not name:
+            raise ValueError("Nom de produit vide")
+        if len(name) > MAX_NAME_LENGTH:
+            raise ValueError(f"Nom trop long ({len(name)} caractères)")
+        
+        price = cls.parse_price(row[price_idx])
+        if price <= 0:
+            raise ValueError(f"Prix invalide: {row[price_idx]!r}")
+        
+        sku = None
+        if sku_idx is not None and sku_idx < len(row):
+            sku = cls.normalize_sku(row[sku_idx])
+        
+        return name, price, sku
+    
+    @staticmethod
+    def normalize_sku(value):
+        """Code-barres d'un tableur : un EAN lu comme nombre (« .0 », 3.76e12) redevient entier"""
+        text = str(value).strip()
+        if re.fullmatch(r'\d+\.0|\d+(\.\d+)?[eE]\+?\d+', text):
+            text = str(int(Decimal(text)))
+        return Database.normalize_sku(text)
+    
+    @staticmethod
+    def parse_price(value):
+        """
+        Convertir un prix saisi à la française ou à l'anglaise
+
+        Exemples:
+        - "1 500" → 1500.0
+        - "1.500,50 Ar" → 1500.5
+        - "1,500.50" → 1500.5
+        """
+        text = re.sub(r'[^\d,.\-]', '', str(value))
+        if not text:
+            raise ValueError(f"Prix invalide: {value!r}")
+        
+        if ',' in text and '.' in text:
+            # Le dernier séparateur est le séparateur décimal
+            if text.rfind(',') > text.rfind('.'):
+                text = text.replace('.', '').replace(',', '.')
+            else:
+                text = text.replace(',', '')
+        elif ',' in text or '.' in text:
+            # Un seul type de séparateur : groupe de 3 chiffres = milliers
+            sep = ',' if ',' in text else '.'
+            head, _, tail = text.rpartition(sep)
+            if len(tail) == 3 and head:
+                text = text.replace(sep, '')
+            else:
+                text = head.replace(sep, '') + '.' + tail
+        
+        try:
+            return float(text)
+        except ValueError:
+            raise ValueError(f"Prix invalide: {value!r}")
@@ -0,0 +1,374 @@
+"""
+Profileur de requêtes SQL (mode optionnel de Database)
+- Connexions et curseurs chronométrés : durée (exécution + lecture des lignes)
+  et lignes retournées (ou modifiées) par instruction
+- Rappel de trace sqlite3 : instructions exécutées hors curseur (COMMIT des
+  blocs `with conn`)
+- Agrégation par instruction normalisée (littéraux remplacés par ?, listes IN repliées)
+- EXPLAIN QUERY PLAN périodique sur les instructions les plus coûteuses :
+  parcours complets de table et tris temporaires signalés
+- Rapport texte à joindre aux tickets
+"""
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+from utils import instrumentation
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+_FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+def normalize(sql):
+    """Forme canonique d'une instruction (clé d'agrégation)"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _SPACES.sub(' ', sql).strip()
+    return _IN_LIST.sub('IN (?)', sql)
+
+
+class StatementStats:
+    __slots__ = ('sql', 'count', 'rows', 'total', 'max', 'last_sql', 'last_params',
+                 'plan', 'warnings')
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.count = 0
+        self.rows = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last_sql = None
+        self.last_params = None
+        self.plan = None
+        self.warnings = []
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    """
+    Curseur chronométré : le temps de lecture des lignes est compté avec l'exécution
+    Une requête lente est relevée dès qu'elle passe le seuil, puis sa durée et
+    ses lignes sont mises à jour pendant la lecture ; elle n'est journalisée
+    qu'à la fin du cycle (dernière ligne lue, nouvelle exécution ou fermeture)
+    """
+
+    def _begin(self, sql, parameters):
+        self._finish()
+        self._stats = self.connection.profiler.executed(sql, parameters)
+        self._elapsed = 0.0
+        self._rows = 0
+        self._slow_entry = None
+
+    def _account(self, elapsed, rows=0):
+        stats = getattr(self, '_stats', None)
+        if stats is None:
+            return
+        self._elapsed += elapsed
+        self._rows += rows
+        profiler = self.connection.profiler
+        profiler.accumulate(stats, elapsed, rows, self._elapsed)
+        if self._slow_entry is not None:
+            self._slow_entry['ms'] = round(self._elapsed, 3)
+            self._slow_entry['rows'] = self._rows
+        elif self._elapsed >= profiler.slow_ms:
+            self._slow_entry = profiler.slow(stats, self._elapsed, self._rows)
+
+    def _finish(self):
+        """Fin du cycle exécution + lecture : la requête lente est journalisée, lignes comprises"""
+        entry = getattr(self, '_slow_entry', None)
+        if entry is not None:
+            self._slow_entry = None
+            self.connection.profiler.log_slow(entry)
+
+    def _run(self, method, sql, parameters, sample=None):
+        profiler = self.connection.profiler
+        self._begin(sql, sample)
+        profiler._local.active = True
+        started = time.perf_counter()
+        try:
+            return method(sql, parameters) if parameters is not None else method(sql)
+        finally:
+            profiler._local.active = False
+            changed = self.rowcount if self.description is None and self.rowcount > 0 else 0
+            self._account((time.perf_counter() - started) * 1000, changed)
+            if self.description is None:
+                self._finish()
+
+    def execute(self, sql, parameters=()):
+        return self._run(super().execute, sql, parameters, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._run(super().executemany, sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self._run(super().executescript, sql_script, None)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._account((time.perf_counter() - started) * 1000, row is not None)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        started = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._account((time.perf_counter() - started) * 1000, len(rows))
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._account((time.perf_counter() - started) * 1000, len(rows))
+        self._finish()
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._account((time.perf_counter() - started) * 1000)
+            self._finish()
+            raise
+        self._account((time.perf_counter() - started) * 1000, 1)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+
+class ProfilingConnection(sqlite3.Connection):
+    """Connexion dont les raccourcis execute* passent par le curseur chronométré"""
+    profiler = None
+
+    def cursor(self, factory=ProfilingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def commit(self):
+        self.profiler._local.active = True
+        started = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            self.profiler._local.active = False
+            self.profiler.record('COMMIT', (time.perf_counter() - started) * 1000)
+
+
+class QueryProfiler:
+    def __init__(self, db_path, attach=None, slow_ms=50, explain_interval=60, explain_limit=5):
+        """
+        attach : fonction (connexion) -> alias, pour expliquer les requêtes sur les archives
+        slow_ms : seuil du journal des requêtes lentes
+        explain_interval : secondes entre deux passes EXPLAIN QUERY PLAN (0 = jamais)
+        """
+        self.db_path = db_path
+        self.attach = attach
+        self.slow_ms = float(slow_ms)
+        self.explain_interval = explain_interval
+        self.explain_limit = explain_limit
+        self.started_at = datetime.now()
+        self.statements = {}
+        self.slow_queries = deque(maxlen=200)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_explain = time.monotonic()
+        self._explaining = False
+
+    def connect(self):
+        """Nouvelle connexion tracée (remplace sqlite3.connect dans Database)"""
+        conn = sqlite3.connect(self.db_path, factory=ProfilingConnection)
+        conn.profiler = self
+        conn.set_trace_callback(self._on_trace)
+        return conn
+
+    # ========== AGRÉGATION ==========
+
+    def _stats_for(self, sql):
+        key = normalize(sql)
+        stats = self.statements.get(key)
+        if stats is None:
+            stats = self.statements[key] = StatementStats(key)
+        return stats
+
+    def executed(self, sql, parameters):
+        """Nouvelle exécution d'une instruction par un curseur"""
+        with self._lock:
+            stats = self._stats_for(sql)
+            stats.count += 1
+            stats.last_sql = sql
+            stats.last_params = parameters if isinstance(parameters, (tuple, list, dict)) else None
+        return stats
+
+    def accumulate(self, stats, elapsed_ms, rows=0, execution_ms=None):
+        """Ajouter du temps (exécution ou lecture) ; execution_ms : cumul de l'exécution en cours"""
+        execution_ms = elapsed_ms if execution_ms is None else execution_ms
+        with self._lock:
+            stats.total += elapsed_ms
+            stats.rows += rows
+            if execution_ms > stats.max:
+                stats.max = execution_ms
+        if self.explain_interval and not self._explaining \
+                and time.monotonic() - self._last_explain >= self.explain_interval:
+            self._explaining = True
+            threading.Thread(target=self.explain_slowest, name='sql-explain', daemon=True).start()
+
+    def record(self, sql, elapsed_ms=0.0, rows=0):
+        """Instruction isolée (COMMIT, trace hors curseur)"""
+        with self._lock:
+            stats = self._stats_for(sql)
+            stats.count += 1
+        self.accumulate(stats, elapsed_ms, rows)
+
+    def slow(self, stats, elapsed_ms, rows):
+        """Relever une requête lente ; l'entrée retournée est complétée pendant la lecture"""
+        entry = {
+            'at': datetime.now().isoformat(timespec='seconds'),
+            'ms': round(elapsed_ms, 3),
+            'rows': rows,
+            'sql': stats.sql,
+            'params': _short_params(stats.last_params),
+        }
+        self.slow_queries.append(entry)
+        return entry
+
+    def log_slow(self, entry):
+        """Journaliser une requête lente une fois toutes ses lignes lues"""
+        if instrumentation.logger.handlers:
+            instrumentation.logger.warning(json.dumps({'slow_sql': entry}, ensure_ascii=False))
+
+    def _on_trace(self, sql):
+        # Les instructions des curseurs sont déjà comptées (les triggers sont
+        # inclus dans leur durée) ; reste ce qui passe hors curseur
+        if getattr(self._local, 'active', False):
+            return
+        if not sql.startswith('BEGIN'):
+            self.record(sql)
+
+    # ========== PLANS D'EXÉCUTION ==========
+
+    def explain_slowest(self, limit=None):
+        """EXPLAIN QUERY PLAN des lectures les plus coûteuses (temps cumulé)"""
+        try:
+            with self._lock:
+                candidates = sorted(
+                    (stats for stats in self.statements.values()
+                     if stats.last_sql and stats.sql.lstrip('( ').upper().startswith(('SELECT', 'WITH'))),
+                    key=lambda stats: stats.total, reverse=True)[:limit or self.explain_limit]
+
+            conn = sqlite3.connect(self.db_path)
+            try:
+                attached = False
+                for stats in candidates:
+                    if 'archive_' in stats.last_sql and self.attach and not attached:
+                        self.attach(conn)
+                        attached = True
+                    try:
+                        plan = conn.execute('EXPLAIN QUERY PLAN ' + stats.last_sql,
+                                            stats.last_params or ()).fetchall()
+                    except sqlite3.Error as e:
+                        stats.plan, stats.warnings = [f"(plan indisponible : {e})"], []
+                        continue
+                    stats.plan = [detail for _, _, _, detail in plan]
+                    stats.warnings = _plan_warnings(stats.plan)
+            finally:
+                conn.close()
+        finally:
+            self._last_explain = time.monotonic()
+            self._explaining = False
+
+    # ========== RAPPORT ==========
+
+    def snapshot(self):
+        with self._lock:
+            return sorted(self.statements.values(), key=lambda stats: stats.total, reverse=True)
+
+    def report(self, top=25):
+        """Rapport texte : instructions par temps cumulé, requêtes lentes, plans"""
+        self.explain_slowest()
+        statements = self.snapshot()
+        total_ms = sum(stats.total for stats in statements)
+        executions = sum(stats.count for stats in statements)
+        now = datetime.now()
+
+        lines = [
+            f"Rapport SQL — {now:%d/%m/%Y %H:%M:%S}",
+            f"Base : {self.db_path}",
+            f"SQLite {sqlite3.sqlite_version}, profilage depuis {self.started_at:%d/%m/%Y %H:%M:%S} "
+            f"({(now - self.started_at).total_seconds():.0f} s)",
+            f"{executions} exécutions, {len(statements)} instructions distinctes, "
+            f"{total_ms:,.1f} ms au total",
+            "",
+            f"== Instructions par temps cumulé ({min(top, len(statements))} premières) ==",
+            f"{'total ms':>10} {'appels':>7} {'moy ms':>8} {'max ms':>8} {'lignes':>8}  instruction",
+        ]
+        for stats in statements[:top]:
+            mean = stats.total / stats.count if stats.count else 0.0
+            flag = '  ⚠️ ' + ', '.join(stats.warnings) if stats.warnings else ''
+            lines.append(f"{stats.total:>10.1f} {stats.count:>7} {mean:>8.2f} {stats.max:>8.2f} "
+                         f"{stats.rows:>8}  {_shorten(stats.sql, 140)}{flag}")
+
+        lines += ["", f"== Requêtes lentes (≥ {self.slow_ms:g} ms), plus récentes en premier =="]
+        if not self.slow_queries:
+            lines.append("(aucune)")
+        for entry in reversed(self.slow_queries):
+            lines.append(f"[{entry['at']}] {entry['ms']:.1f} ms, {entry['rows']} lignes : "
+                         f"{_shorten(entry['sql'], 200)}  params={entry['params']}")
+
+        lines += ["", "== Plans d'exécution =="]
+        for stats in statements:
+            if not stats.plan:
+                continue
+            lines.append(_shorten(stats.sql, 200))
+            lines += [f"    {detail}" for detail in stats.plan]
+            if stats.warnings:
+                lines.append(f"    ⚠️ {', '.join(stats.warnings)}")
+            lines.append("")
+
+        return '\n'.join(lines) + '\n'
+
+    def write_report(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.report(), encoding='utf-8')
+        return path
+
+
+def _plan_warnings(plan):
+    warnings = []
+    for detail in plan:
+        scan = _FULL_SCAN.match(detail)
+        if scan:
+            warnings.append(f"parcours complet de {scan.group(1)}")
+        elif detail.startswith('USE TEMP B-TREE'):
+            warnings.append("tri temporaire (" + detail[len('USE TEMP B-TREE '):].lower() + ")")
+    return warnings
+
+
+def _shorten(text, width):
+    return text if len(text) <= width else text[:width - 1] + '…'
+
+
+def _short_params(params):
+    return None if params is None else _shorten(repr(params), 120)
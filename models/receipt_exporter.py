@@ -0,0 +1,189 @@
+"""
+Export en flux de l'historique des reçus (CSV, JSONL, colonnaire)
+Lecture par curseur fetchmany et générateurs : mémoire constante
+quelle que soit la taille de l'historique
+"""
+import csv
+import json
+import os
+import struct
+import zlib
+from pathlib import Path
+
+
+RECEIPT_COLUMNS = ('id', 'receipt_number', 'date', 'client_name', 'client_contact',
+                   'total', 'payment_method', 'notes', 'created_at')
+ITEM_COLUMNS = ('receipt_id', 'receipt_number', 'date', 'line', 'name',
+                'quantity', 'unit_price', 'total')
+
+COLUMNAR_MAGIC = b'RCOL1\n'
+
+
+class ReceiptExporter:
+    FORMATS = ('csv', 'jsonl', 'columnar')
+    KINDS = ('receipts', 'items')
+    
+    def __init__(self, database, fetch_size=500, row_group_size=10000):
+        self.db = database
+        self.fetch_size = fetch_size
+        self.row_group_size = row_group_size
+    
+    # ========== LECTURE ==========
+    
+    def iter_receipts(self, date_from=None, date_to=None, since_id=None):
+        """
+        Parcourir les reçus, base courante et archives annuelles
+        (tuples dans l'ordre de RECEIPT_COLUMNS + items JSON)
+        """
+        conditions, params = [], []
+        if date_from:
+            conditions.append('date >= ?')
+            params.append(date_from)
+        if date_to:
+            conditions.append('date <= ?')
+            params.append(date_to)
+        if since_id:
+            conditions.append('id > ?')
+            params.append(since_id)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        
+        conn = self.db.get_connection()
+        try:
+            select = f'''
+                SELECT {', '.join(RECEIPT_COLUMNS)}, items
+                FROM {{schema}}.receipts
+                {where}
+            '''
+            schemas = ['main'] + self.db.attach_archives(conn)
+            sql = ' UNION ALL '.join(select.format(schema=schema) for schema in schemas)
+            
+            cursor = conn.cursor()
+            cursor.execute(sql + ' ORDER BY id', params * len(schemas))
+            
+            while True:
+                rows = cursor.fetchmany(self.fetch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+    
+    def iter_rows(self, kind='receipts', date_from=None, date_to=None, since_id=None):
+        """Parcourir les lignes à exporter : (id du reçu, tuple de valeurs)"""
+        receipts = self.iter_receipts(date_from, date_to, since_id)
+        
+        if kind == 'receipts':
+            for row in receipts:
+                yield row[0], row[:-1]
+        elif kind == 'items':
+            for row in receipts:
+                receipt_id, number, date = row[0], row[1], row[2]
+                for line, item in enumerate(json.loads(row[-1]), 1):
+                    yield receipt_id, (receipt_id, number, date, line, item['name'],
+                                       item['quantity'], item['unit_price'], item['total'])
+        else:
+            raise ValueError(f"Type d'export inconnu: {kind}")
+    
+    # ========== EXPORT ==========
+    
+    def export(self, output_path, fmt='csv', kind='receipts', date_from=None, date_to=None,
+               incremental=False, cursor_name='default'):
+        """
+        Exporter les reçus ou leurs articles vers un fichier
+
+        incremental=True n'exporte que les reçus créés depuis le dernier
+        export incrémental portant le même cursor_name ; le curseur n'avance
+        qu'une fois le fichier entièrement écrit.
+        """
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Format inconnu: {fmt}")
+        
+        columns = RECEIPT_COLUMNS if kind == 'receipts' else ITEM_COLUMNS
+        cursor_key = f'export_cursor_{cursor_name}'
+        since_id = int(self.db.get_setting(cursor_key, '0')) if incremental else None
+        
+        rows = self.iter_rows(kind, date_from, date_to, since_id)
+        state = {'rows': 0, 'last_id': since_id or 0}
+        
+        def tracked():
+            for receipt_id, values in rows:
+                state['rows'] += 1
+                state['last_id'] = max(state['last_id'], receipt_id)
+                yield values
+        
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = output_path.with_name(output_path.name + '.part')
+        
+        writer = getattr(self, f'_write_{fmt}')
+        try:
+            writer(tmp_path, columns, tracked(), kind)
+            os.replace(tmp_path, output_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        
+        if incremental and state['rows']:
+            self.db.set_setting(cursor_key, state['last_id'])
+        
+        return {'path': str(output_path), 'rows': state['rows'], 'last_id': state['last_id']}
+    
+    def reset_cursor(self, cursor_name='default'):
+        """Remettre à zéro un curseur d'export incrémental"""
+        self.db.set_setting(f'export_cursor_{cursor_name}', 0)
+    
+    def _write_csv(self, path, columns, rows, kind):
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f, delimiter=';')
+            writer.writerow(columns)
+            writer.writerows(rows)
+    
+    def _write_jsonl(self, path, columns, rows, kind):
+        with open(path, 'w', encoding='utf-8') as f:
+            for values in rows:
+                f.write(json.dumps(dict(zip(columns, values)), ensure_ascii=False))
+                f.write('\n')
+    
+    def _write_columnar(self, path, columns, rows, kind):
+        """
+        Format colonnaire compact :
+        en-tête magique, ligne JSON de schéma, puis des groupes de lignes
+        (longueur sur 4 octets + JSON compressé zlib, une liste par colonne)
+        """
+        with open(path, 'wb') as f:
+            f.write(COLUMNAR_MAGIC)
+            f.write(json.dumps({'kind': kind, 'columns': list(columns)}).encode('utf-8') + b'\n')
+            
+            group = [[] for _ in columns]
+            for values in rows:
+                for column, value in zip(group, values):
+                    column.append(value)
+                if len(group[0]) >= self.row_group_size:
+                    self._write_row_group(f, group)
+                    group = [[] for _ in columns]
+            
+            if group[0]:
+                self._write_row_group(f, group)
+    
+    @staticmethod
+    def _write_row_group(f, group):
+        payload = zlib.compress(json.dumps(group, ensure_ascii=False).encode('utf-8'))
+        f.write(struct.pack('>I', len(payload)))
+        f.write(payload)
+
+
+def read_columnar(path):
+    """Relire un fichier colonnaire, ligne par ligne (dictionnaires)"""
+    with open(path, 'rb') as f:
+        if f.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError("Fichier colonnaire invalide")
+        columns = json.loads(f.readline())['columns']
+        
+        while True:
+            size = f.read(4)
+            if not size:
+                break
+            group = json.loads(zlib.decompress(f.read(struct.unpack('>I', size)[0])))
+            for values in zip(*group):
+                yield dict(zip(columns, values))
@@ -0,0 +1,205 @@
+"""
+Stock à une date passée (quantités et valorisation)
+- Points de contrôle périodiques (quotidiens ou mensuels) par produit,
+  écrits par la tâche de fond de BackupManager ; prix du point = prix en
+  vigueur à sa date (historique des prix)
+- Une requête historique ne rejoue que les mouvements postérieurs
+  au dernier point de contrôle, soit au plus une période
+"""
+import time
+from datetime import date, datetime
+
+
+class StockManager:
+    PERIODS = ('daily', 'monthly')
+    
+    def __init__(self, database):
+        self.db = database
+    
+    # ========== POINTS DE CONTRÔLE ==========
+    
+    def create_checkpoints(self, period=None, until=None):
+        """
+        Écrire les points de contrôle manquants jusqu'au début de la période en cours
+
+        Les mouvements sont lus une seule fois, dans l'ordre chronologique.
+        Un produit n'est réécrit à un point que si sa quantité a changé
+        pendant la période : son dernier point reste exact, et le rejouer
+        ne coûte rien puisqu'aucun mouvement ne le suit.
+        Retourne le nombre de points de contrôle (dates) créés.
+        """
+        period = period or self.db.get_setting('stock_checkpoint_period', 'monthly')
+        if period not in self.PERIODS:
+            raise ValueError(f"Période inconnue: {period}")
+        until = self._period_start(until or datetime.now(), period)
+        
+        conn = self.db.get_connection()
+        try:
+            last = conn.execute('SELECT MAX(checkpoint_at) FROM stock_checkpoints').fetchone()[0]
+            if last:
+                start = datetime.fromisoformat(last)
+                quantities = dict(conn.execute('''
+                    SELECT product_id, quantity FROM stock_checkpoints
+                    WHERE checkpoint_at = (
+                        SELECT MAX(checkpoint_at) FROM stock_checkpoints AS latest
+                        WHERE latest.product_id = stock_checkpoints.product_id
+                    )
+                '''))
+            else:
+                first = conn.execute('SELECT MIN(created_at) FROM stock_movements').fetchone()[0]
+                if not first:
+                    return 0
+                start = self._period_start(datetime.fromisoformat(first), period)
+                quantities = {}
+            
+            boundaries = []
+            boundary = self._next_period(start, period)
+            while boundary <= until:
+                boundaries.append(boundary.isoformat())
+                boundary = self._next_period(boundary, period)
+            if not boundaries:
+                return 0
+            
+            reader = conn.cursor()
+            reader.execute('''
+                SELECT product_id, quantity, created_at FROM stock_movements
+                WHERE created_at >= ? AND created_at < ?
+                ORDER BY created_at
+            ''', (start.isoformat(), boundaries[-1]))
+            
+            with conn:
+                writer = conn.cursor()
+                changed = set(quantities) if not last else set()
+                index = 0
+                
+                def flush(checkpoint_at):
+                    # Prix en vigueur au point (pas le prix actuel) ; prix du produit
+                    # s'il n'a pas d'historique
+                    writer.executemany('''
+                        INSERT OR REPLACE INTO stock_checkpoints
+                        (product_id, checkpoint_at, quantity, unit_price)
+                        SELECT :product_id, :checkpoint_at, :quantity, COALESCE((
+                            SELECT unit_price FROM price_history
+                            WHERE product_id = :product_id AND effective_from <= :checkpoint_at
+                            ORDER BY effective_from DESC
+                            LIMIT 1
+                        ), (SELECT unit_price FROM products WHERE id = :product_id))
+                    ''', [{'product_id': product_id, 'checkpoint_at': checkpoint_at,
+                           'quantity': quantities[product_id]}
+                          for product_id in changed])
+                    changed.clear()
+                
+                while True:
+                    rows = reader.fetchmany(1000)
+                    if not rows:
+                        break
+                    for product_id, quantity, created_at in rows:
+                        while created_at >= boundaries[index]:
+                            flush(boundaries[index])
+                            index += 1
+                        quantities[product_id] = quantities.get(product_id, 0) + quantity
+                        changed.add(product_id)
+                
+                for checkpoint_at in boundaries[index:]:
+                    flush(checkpoint_at)
+        finally:
+            conn.close()
+        
+        return len(boundaries)
+    
+    def rebuild_checkpoints(self, period=None):
+        """Supprimer puis recalculer tous les points de contrôle"""
+        conn = self.db.get_connection()
+        try:
+            with conn:
+                conn.execute('DELETE FROM stock_checkpoints')
+        finally:
+            conn.close()
+        return self.create_checkpoints(period)
+    
+    # ========== REQUÊTES HISTORIQUES ==========
+    
+    def stock_at(self, as_of, product_id=None):
+        """
+        Quantité de chaque produit à une date (fin de journée) ou un instant
+        Liste de (id, nom, quantité, prix unitaire en vigueur à cet instant)
+        """
+        product_filter = 'WHERE p.id = :product_id' if product_id is not None else ''
+        
+        conn = self.db.get_connection()
+        try:
+            # Dernier point ≤ date, puis mouvements entre ce point et la date
+            return conn.execute(f'''
+                SELECT p.id, p.name,
+                       COALESCE(c.quantity, 0) + COALESCE((
+                           SELECT SUM(m.quantity) FROM stock_movements m
+                           WHERE m.product_id = p.id
+                             AND m.created_at >= COALESCE(c.checkpoint_at, '')
+                             AND m.created_at <= :moment
+                       ), 0) AS quantity,
+                       COALESCE((
+                           SELECT h.unit_price FROM price_history h
+                           WHERE h.product_id = p.id AND h.effective_from <= :moment
+                           ORDER BY h.effective_from DESC
+                           LIMIT 1
+                       ), c.unit_price, p.unit_price) AS unit_price
+                FROM products p
+                LEFT JOIN stock_checkpoints c
+                    ON c.product_id = p.id AND c.checkpoint_at = (
+                        SELECT MAX(checkpoint_at) FROM stock_checkpoints
+                        WHERE product_id = p.id AND checkpoint_at <= :moment
+                    )
+                {product_filter}
+                ORDER BY p.name
+            ''', {'moment': self._as_moment(as_of), 'product_id': product_id}).fetchall()
+        finally:
+            conn.close()
+    
+    def valuation_at(self, as_of):
+        """
+        Valorisation du stock à une date (quantité × prix en vigueur à cette date)
+        Seules les quantités positives sont valorisées ; un solde négatif
+        (ventes sans entrée enregistrée) est une anomalie listée à part
+        """
+        started = time.perf_counter()
+        products, negative = [], []
+        for product_id, name, quantity, price in self.stock_at(as_of):
+            if quantity > 0:
+                products.append((product_id, name, quantity, price, quantity * (price or 0)))
+            elif quantity < 0:
+                negative.append((product_id, name, quantity, price))
+        products.sort(key=lambda row: row[4], reverse=True)
+        negative.sort(key=lambda row: row[2])
+        
+        return {
+            'as_of': self._as_moment(as_of),
+            'products': products,
+            'negative': negative,
+            'quantity': sum(row[2] for row in products),
+            'value': sum(row[4] for row in products),
+            'duration': time.perf_counter() - started,
+        }
+    
+    # ========== DATES ==========
+    
+    @staticmethod
+    def _as_moment(as_of):
+        """Date → fin de journée ; datetime/ISO complet → tel quel"""
+        if isinstance(as_of, datetime):
+            return as_of.isoformat()
+        if isinstance(as_of, date):
+            return f"{as_of.isoformat()}T23:59:59.999999"
+        as_of = str(as_of)
+        return as_of if 'T' in as_of else f"{as_of}T23:59:59.999999"
+    
+    @staticmethod
+    def _period_start(moment, period):
+        if period == 'daily':
+            return datetime(moment.year, moment.month, moment.day)
+        return datetime(moment.year, moment.month, 1)
+    
+    @staticmethod
+    def _next_period(moment, period):
+        if period == 'daily':
+            return datetime.fromordinal(moment.toordinal() + 1)
+        return datetime(moment.year + moment.month // 12, moment.month % 12 + 1, 1)
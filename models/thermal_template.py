@@ -0,0 +1,316 @@
+"""
+Modèles de ticket thermique compilés en ESC/POS
+- Modèle déclaratif (JSON) en quatre blocs : header, item (répété pour chaque
+  article), totals, footer ; chaque bloc est une liste de lignes :
+    {"text": "...", "align": "left|center|right", "size": 1|2, "bold": true, "wrap": true}
+    {"columns": ["gauche", "droite"], "size": 2}     deux textes sur une ligne
+    {"rows": ["company_lines", "client_lines"]}     listes côte à côte, ligne par ligne
+    {"rule": "="}   {"feed": 2}   {"cut": true}
+  Les textes acceptent les champs {nom} / {nom:format} (paramètres, reçu, article)
+- Compilé une fois par version des paramètres qu'il lit (cache) : textes ne
+  dépendant que des paramètres rendus d'avance, codes de contrôle préparés ; render() ne fait
+  plus que formater les champs du reçu et encode le ticket en une fois
+- Colonnes selon le papier (58 mm : 32, 80 mm : 48), divisées par la taille
+  des caractères (double largeur : moitié moins de colonnes) ; mesure et
+  troncature par utils.text_layout (caractères hors CP437 comptés comme « ? »)
+"""
+import codecs
+import encodings.cp437
+import functools
+import json
+import string
+from datetime import datetime
+
+from utils.amount_in_words import amount_in_words
+from utils.text_layout import TextLayout
+
+PAPER_COLUMNS = {58: 32, 80: 48}
+
+# Commandes ESC/POS
+ESC, GS = '\x1b', '\x1d'
+INIT_CODEPAGE = ESC + 't\x00'            # CP437 (accents français)
+CODEPAGE = 'cp437'
+# Table d'encodage compilée : ~6x plus rapide que str.encode('cp437') (dictionnaire Python)
+CP437 = codecs.charmap_build(encodings.cp437.decoding_table)
+BOLD_ON, BOLD_OFF = ESC + 'E\x01', ESC + 'E\x00'
+CUT = ESC + 'd\x06' + GS + 'V\x00'      # avance de 6 lignes puis coupe complète
+
+
+def _size(size):
+    return GS + '!' + chr(((size - 1) << 4) | (size - 1))
+
+
+DEFAULT_TEMPLATE = {
+    'header': [
+        {'columns': ['{company_name}', 'DOIT'], 'bold': True},
+        {'columns': ['{company_phone}', '{client_name}']},
+        {'rows': ['company_lines', 'client_lines']},
+        {'rule': '-'},
+        {'columns': ['No: {receipt_number}', 'Date: {date_fr}'], 'bold': True},
+        {'rule': '='},
+        {'feed': 1},
+        {'text': 'Liste des articles', 'align': 'center', 'bold': True},
+        {'feed': 1},
+    ],
+    'item': [
+        {'text': '{index}. {name}', 'bold': True},
+        {'text': '   {quantity:.0f} x {unit_price:,.0f} {currency} = {total:,.0f} {currency}'},
+    ],
+    'totals': [
+        {'rule': '='},
+        {'text': 'TOTAL A PAYER', 'align': 'center'},
+        {'text': '{total:,.0f} {currency}', 'align': 'center', 'size': 2},
+        {'text': '{total_words} {currency_lower}', 'wrap': True},
+        {'text': 'Paiement: {payment_method}', 'align': 'center'},
+    ],
+    'footer': [
+        {'rule': '='},
+        {'text': 'Merci pour votre achat!', 'align': 'center'},
+        {'text': 'Mankasitraka Tompoko!', 'align': 'center'},
+        {'feed': 2},
+        {'cut': True},
+    ],
+}
+
+BLOCKS = ('header', 'item', 'totals', 'footer')
+
+# Champs disponibles en plus des paramètres (company_name, currency...)
+RECEIPT_FIELDS = {'receipt_number', 'date', 'date_fr', 'client_name', 'client_contact', 'total',
+                  'payment_method', 'notes', 'total_words', 'currency', 'currency_lower',
+                  'item_count'}
+ITEM_FIELDS = {'index', 'name', 'quantity', 'unit_price', 'total', 'currency', 'currency_lower'}
+LIST_SOURCES = ('company_lines', 'client_lines')
+# Paramètres lus par la compilation en plus des champs cités par le modèle ;
+# les autres (receipt_counter, curseurs d'export, date de sauvegarde...) changent
+# à chaque vente ou tâche et ne doivent pas invalider le cache
+COMPILE_SETTINGS = ('thermal_template', 'thermal_paper_width', 'paper_width', 'currency',
+                    'amount_words_language', 'company_address')
+
+
+class TemplateError(ValueError):
+    pass
+
+
+def paper_columns(settings):
+    """Colonnes d'une ligne en taille normale selon la largeur du papier thermique"""
+    try:
+        width_mm = int(float(settings.get('thermal_paper_width') or settings.get('paper_width') or 80))
+    except ValueError:
+        width_mm = 80
+    return PAPER_COLUMNS.get(width_mm, 48)
+
+
+def load_template(settings):
+    """Modèle des paramètres (JSON) complété par le modèle par défaut, bloc par bloc"""
+    source = (settings.get('thermal_template') or '').strip()
+    if not source:
+        return DEFAULT_TEMPLATE
+    try:
+        custom = json.loads(source)
+    except ValueError as e:
+        raise TemplateError(f"Modèle thermique invalide: {e}") from None
+    unknown = set(custom) - set(BLOCKS)
+    if unknown:
+        raise TemplateError(f"Blocs inconnus dans le modèle thermique: {', '.join(sorted(unknown))}")
+    return {block: custom.get(block, DEFAULT_TEMPLATE[block]) for block in BLOCKS}
+
+
+# ========== COMPILATION ==========
+
+class _Dynamic(Exception):
+    pass
+
+
+class _SettingsOnly(dict):
+    def __missing__(self, key):
+        raise _Dynamic(key)
+
+
+def _check_fields(text, allowed, block, settings):
+    for _, field, _, _ in string.Formatter().parse(text):
+        if field is None:
+            continue
+        root = field.split('.', 1)[0].split('[', 1)[0]
+        if root not in allowed and root not in settings:
+            raise TemplateError(f"Champ inconnu {{{root}}} dans le bloc {block}")
+
+
+def _compile_line(line, block, layout, settings):
+    """Une ligne du modèle -> texte fixe (str) ou fonction (champs) -> str"""
+    size = int(line.get('size', 1))
+    if size not in (1, 2):
+        raise TemplateError(f"Taille {size} non prise en charge (1 ou 2)")
+    columns = layout.width // size
+    fit, truncate, side_by_side = layout.fit, layout.truncate, layout.side_by_side
+    prefix = (_size(size) if size > 1 else '') + (BOLD_ON if line.get('bold') else '')
+    suffix = (BOLD_OFF if line.get('bold') else '') + (_size(1) if size > 1 else '')
+    allowed = ITEM_FIELDS if block == 'item' else RECEIPT_FIELDS
+
+    if 'rule' in line:
+        return prefix + (str(line['rule']) or '-')[0] * columns + suffix + '\n'
+    if 'feed' in line:
+        return '\n' * int(line['feed'])
+    if 'cut' in line:
+        return CUT if line['cut'] else ''
+
+    if 'rows' in line:
+        sources = list(line['rows'])
+        if block == 'item' or len(sources) != 2 or not set(sources) <= set(LIST_SOURCES):
+            raise TemplateError(f"rows attend deux listes parmi {', '.join(LIST_SOURCES)}")
+
+        def render_rows(fields):
+            left, right = fields[sources[0]], fields[sources[1]]
+            return ''.join(prefix + side_by_side(l, r, columns) + suffix + '\n'
+                           for l, r in _zip_longest(left, right) if l or r)
+        return render_rows
+
+    if 'columns' in line:
+        left, right = (str(part) for part in line['columns'])
+        for part in (left, right):
+            _check_fields(part, allowed, block, settings)
+        static = _prerender(left, settings), _prerender(right, settings)
+        if None not in static:
+            return prefix + side_by_side(*static, columns) + suffix + '\n'
+
+        def render_columns(fields):
+            return (prefix + side_by_side(left.format_map(fields), right.format_map(fields), columns)
+                    + suffix + '\n')
+        return render_columns
+
+    if 'text' not in line:
+        raise TemplateError(f"Ligne de modèle inconnue: {line}")
+
+    text = str(line['text'])
+    align = line.get('align', 'left')
+    _check_fields(text, allowed, block, settings)
+
+    if line.get('wrap'):
+        def render_wrapped(fields):
+            return ''.join(prefix + fit(part, align, columns) + suffix + '\n'
+                           for part in layout.wrap(text.format_map(fields), columns))
+        static = _prerender(text, settings)
+        return render_wrapped(settings) if static is not None else render_wrapped
+
+    static = _prerender(text, settings)
+    if static is not None:
+        return prefix + fit(static, align, columns) + suffix + '\n'
+
+    if align == 'left':
+        end = suffix + '\n'
+
+        def render_text(fields):
+            value = text.format_map(fields)
+            # ASCII : coupe directe, sans passer par la page de code
+            return prefix + (value[:columns] if value.isascii() else truncate(value, columns)) + end
+    else:
+        def render_text(fields):
+            return prefix + fit(text.format_map(fields), align, columns) + suffix + '\n'
+    return render_text
+
+
+def _prerender(text, settings):
+    """Texte rendu dès la compilation s'il ne dépend que des paramètres, sinon None"""
+    try:
+        return text.format_map(_SettingsOnly(settings))
+    except _Dynamic:
+        return None
+
+
+def _zip_longest(left, right):
+    for i in range(max(len(left), len(right))):
+        yield (left[i] if i < len(left) else '', right[i] if i < len(right) else '')
+
+
+def _compile_block(lines, block, layout, settings):
+    """Fusionner les lignes fixes consécutives : le bloc devient une liste courte"""
+    parts = []
+    for line in lines:
+        part = _compile_line(line, block, layout, settings)
+        if isinstance(part, str) and parts and isinstance(parts[-1], str):
+            parts[-1] += part
+        else:
+            parts.append(part)
+    return parts
+
+
+@functools.lru_cache(maxsize=8)
+def _compile(settings_key):
+    settings = dict(settings_key)
+    template = load_template(settings)
+    layout = TextLayout(paper_columns(settings), codepage=CODEPAGE)
+    currency = settings.get('currency', 'Ar')
+    language = settings.get('amount_words_language', 'fr')
+
+    header = _compile_block(template['header'], 'header', layout, settings)
+    item = _compile_block(template['item'], 'item', layout, settings)
+    totals = _compile_block(template['totals'], 'totals', layout, settings)
+    footer = _compile_block(template['footer'], 'footer', layout, settings)
+    company_lines = settings.get('company_address', '').split('\n')
+    item_base = {'currency': currency, 'currency_lower': currency.lower()}
+
+    def render(receipt_data):
+        try:
+            d = datetime.strptime(receipt_data['date'], "%Y-%m-%d")
+            date_fr = d.strftime('%d/%m/%Y')
+        except (KeyError, TypeError, ValueError):
+            date_fr = receipt_data.get('date', '')
+
+        total = receipt_data['total']
+        items = receipt_data['items']
+        fields = dict(settings)
+        fields.update(
+            receipt_number=receipt_data.get('receipt_number', ''),
+            date=receipt_data.get('date', ''),
+            date_fr=date_fr,
+            client_name=receipt_data.get('client_name') or '(Non spécifié)',
+            client_contact=receipt_data.get('client_contact', ''),
+            total=total,
+            payment_method=receipt_data.get('payment_method') or 'Espèces',
+            notes=receipt_data.get('notes', ''),
+            total_words=amount_in_words(total, language, fallback='').capitalize(),
+            currency=currency,
+            currency_lower=currency.lower(),
+            item_count=len(items),
+            company_lines=company_lines,
+            client_lines=[l.strip() for l in (receipt_data.get('client_contact') or '').split('\n')
+                          if l.strip()][:4],
+        )
+
+        out = [INIT_CODEPAGE]
+        out += [part if part.__class__ is str else part(fields) for part in header]
+        append = out.append
+        for index, entry in enumerate(items, 1):
+            item_fields = {**item_base, **entry, 'index': index}
+            for part in item:
+                append(part if part.__class__ is str else part(item_fields))
+        out += [part if part.__class__ is str else part(fields) for part in totals]
+        out += [part if part.__class__ is str else part(fields) for part in footer]
+        return codecs.charmap_encode(''.join(out), 'replace', CP437)[0]
+
+    render.columns = layout.width
+    return render
+
+
+@functools.lru_cache(maxsize=8)
+def _template_fields(source):
+    """Champs cités par les textes d'un modèle (JSON source)"""
+    template = load_template({'thermal_template': source})
+    names = set()
+    for lines in template.values():
+        for line in lines:
+            texts = list(line.get('columns', ())) + [line.get('text', '')]
+            for text in texts:
+                for _, field, _, _ in string.Formatter().parse(str(text)):
+                    if field:
+                        names.add(field.split('.', 1)[0].split('[', 1)[0])
+    return frozenset(names)
+
+
+def compile_template(settings):
+    """
+    Fonction render(receipt_data) -> bytes ESC/POS, compilée une fois par version
+    des paramètres qu'elle lit (COMPILE_SETTINGS et champs cités par le modèle)
+    """
+    keys = set(COMPILE_SETTINGS) | _template_fields((settings.get('thermal_template') or '').strip())
+    return _compile(tuple(sorted((key, settings[key]) for key in keys
+                                 if isinstance(settings.get(key), str))))
@@ -0,0 +1,137 @@
+"""
+Montants en lettres : propriétés de la conversion (aller-retour, cas limites)
+et repli des documents imprimés sur un montant hors limites
+"""
+import random
+import tempfile
+import unittest
+
+from benchmarks.bench_amount_in_words import legacy_number_to_french
+from models.database import Database
+from models.laser_printer import LaserPrinter
+from models.thermal_template import compile_template
+from utils.amount_in_words import (MAX_AMOUNT, amount_in_words, number_to_french,
+                                   number_to_malagasy)
+
+_FR_WORDS = {
+    'zéro': 0, 'un': 1, 'deux': 2, 'trois': 3, 'quatre': 4, 'cinq': 5, 'six': 6,
+    'sept': 7, 'huit': 8, 'neuf': 9, 'dix': 10, 'onze': 11, 'douze': 12, 'treize': 13,
+    'quatorze': 14, 'quinze': 15, 'seize': 16, 'vingt': 20, 'vingts': 20, 'trente': 30,
+    'quarante': 40, 'cinquante': 50, 'soixante': 60,
+}
+_FR_SCALES = {'mille': 1000, 'million': 10**6, 'millions': 10**6,
+              'milliard': 10**9, 'milliards': 10**9}
+
+
+def french_to_number(text):
+    """Relecture d'un montant en lettres (pour le test aller-retour)"""
+    total = current = 0
+    for token in text.replace('-', ' ').split():
+        if token == 'et':
+            continue
+        if token in ('cent', 'cents'):
+            current = (current or 1) * 100
+        elif token in _FR_SCALES:
+            scale = _FR_SCALES[token]
+            total += (current or 1) * scale
+            current = 0
+        else:
+            value = _FR_WORDS[token]
+            # quatre-vingt(s) : quatre × vingt
+            if value == 20 and current % 100 == 4:
+                current += 76
+            else:
+                current += value
+    return total + current
+
+
+def legacy_known_bug(n):
+    """
+    Écarts attendus avec l'ancien algorithme : 71 (« soixante-onze »),
+    91-99 (« quatre-vingt-un » pour 91) et « cents »/« vingts » devant mille
+    """
+    thousands, units = divmod(n, 1000)
+    return any(part % 100 == 71 or part % 100 >= 90 for part in (thousands, units)) or (
+        thousands > 1 and thousands % 100 in (0, 80))
+
+
+def sample_amounts(samples=5000, seed=7):
+    """Montants aléatoires et cas limites"""
+    rng = random.Random(seed)
+    amounts = list(range(0, 2000)) + [
+        80, 200, 80_000, 200_000, 1_000_000, 2_000_000, 80_000_000,
+        1_000_000_000, MAX_AMOUNT,
+    ]
+    amounts += [rng.randint(0, MAX_AMOUNT) for _ in range(samples)]
+    amounts += [rng.randint(0, 999_999) for _ in range(samples)]
+    return amounts
+
+
+class AmountInWordsTest(unittest.TestCase):
+    def test_french_round_trip(self):
+        for n in sample_amounts():
+            self.assertEqual(french_to_number(number_to_french(n)), n)
+
+    def test_matches_legacy_algorithm(self):
+        for n in sample_amounts():
+            if n < 1_000_000 and not legacy_known_bug(n):
+                self.assertEqual(number_to_french(n), legacy_number_to_french(n))
+
+    def test_spacing_and_zero(self):
+        for n in sample_amounts():
+            for words in (number_to_french(n), number_to_malagasy(n)):
+                self.assertNotIn('  ', words)
+                self.assertEqual(words, words.strip())
+            if n:
+                self.assertNotIn('zéro', number_to_french(n))
+                self.assertNotIn('aotra', number_to_malagasy(n))
+
+    def test_no_plural_before_mille(self):
+        for n in sample_amounts():
+            words = number_to_french(n)
+            self.assertNotIn('cents mille', words)
+            self.assertNotIn('vingts mille', words)
+
+    def test_rounding(self):
+        for n in sample_amounts(samples=500):
+            self.assertEqual(amount_in_words(n + 0.4), number_to_french(n))
+
+    def test_out_of_range(self):
+        for bad in (-1, MAX_AMOUNT + 1):
+            for func in (number_to_french, number_to_malagasy):
+                with self.assertRaises(ValueError):
+                    func(bad)
+            with self.assertRaises(ValueError):
+                amount_in_words(bad)
+            self.assertEqual(amount_in_words(bad, fallback=''), '')
+        self.assertEqual(amount_in_words(float('inf'), fallback=''), '')
+
+
+class OutOfRangeReceiptTest(unittest.TestCase):
+    """Un total hors limites omet la mention en lettres sans empêcher l'impression"""
+
+    @classmethod
+    def setUpClass(cls):
+        # Paramètres par défaut d'une base neuve
+        with tempfile.TemporaryDirectory(prefix='test_amount_') as workdir:
+            cls.settings = Database(f"{workdir}/receipts.db").get_all_settings()
+
+    def receipt(self, total):
+        return {'receipt_number': 'FACT-00001', 'date': '2026-01-15', 'client_name': 'RAKOTO Jean',
+                'items': [{'name': 'Riz', 'quantity': 1, 'unit_price': total, 'total': total}],
+                'total': total, 'payment_method': 'Espèces'}
+
+    def test_laser_footer(self):
+        printer = LaserPrinter(self.settings)
+        for total in (-500, MAX_AMOUNT + 1):
+            footer = ''.join(printer._build_footer(self.receipt(total)))
+            self.assertIn("En lettre:\n", footer)
+
+    def test_thermal_template(self):
+        render = compile_template(self.settings)
+        for total in (-500, MAX_AMOUNT + 1):
+            self.assertTrue(render(self.receipt(total)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Reprise des paniers après un plantage (journal des paniers)
+"""
+import tempfile
+import unittest
+from pathlib import Path
+
+from controllers.receipt_controller import ReceiptController
+from models.database import Database
+from utils.pdf_generator import ReceiptGenerator
+
+
+class CartRecoveryTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory(prefix='test_cart_journal_')
+        self.root = Path(self._tmp.name)
+        self.db = Database(self.root / 'receipts.db')
+        self.journal = self.root / 'cart_journal.jsonl'
+        self.controllers = []
+
+    def tearDown(self):
+        for controller in self.controllers:
+            controller.cart_journal.close()
+        self._tmp.cleanup()
+
+    def start(self):
+        """Lancement de la caisse (rejeu du journal)"""
+        controller = ReceiptController(self.db, ReceiptGenerator(self.db.get_all_settings()),
+                                       cart_journal_path=self.journal,
+                                       exports_dir=self.root / 'exports')
+        self.controllers.append(controller)
+        return controller
+
+    def test_sold_cart_is_not_restored(self):
+        controller = self.start()
+        controller.add_item('Riz', 2, 1500)
+
+        # Plantage entre le commit du reçu et le vidage du panier
+        def crash():
+            raise SystemExit
+        controller.clear_current_items = crash
+        with self.assertRaises(SystemExit):
+            controller.save_receipt('RAKOTO Jean')
+
+        restarted = self.start()
+        self.assertEqual(len(self.db.get_all_receipts()), 1)
+        self.assertFalse(restarted.cart)
+        self.assertEqual(restarted.get_parked_carts(), [])
+
+    def test_failed_save_keeps_cart(self):
+        controller = self.start()
+        controller.add_item('Riz', 2, 1500)
+
+        def fail(receipt_data):
+            raise RuntimeError('disque plein')
+        self.db.save_receipt = fail
+        success, _ = controller.save_receipt('RAKOTO Jean')
+        self.assertFalse(success)
+        del self.db.save_receipt
+
+        restarted = self.start()
+        self.assertEqual([line.name for line in restarted.cart], ['Riz'])
+
+    def test_active_cart_client_is_restored(self):
+        controller = self.start()
+        controller.add_item('Riz', 2, 1500)
+        controller.set_cart_client('RAKOTO Jean', '034 00 000 00')
+
+        restarted = self.start()
+        self.assertEqual(restarted.get_cart_client(), ('RAKOTO Jean', '034 00 000 00'))
+        self.assertEqual(len(restarted.cart), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Rejeu de session (main.py --replay) : la caisse n'est pas touchée
+"""
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import main
+from models.database import Database
+
+
+class ReplayIsolationTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory(prefix='test_replay_')
+        self.root = Path(self._tmp.name)
+        self.db_path = self.root / 'data' / 'receipts.db'
+        self.db_path.parent.mkdir()
+        Database(self.db_path)
+
+        self.session = self.root / 'session.jsonl'
+        records = [
+            {'op': 'add_item', 'args': ['Riz', 2, 1500], 'kwargs': {}},
+            {'op': 'add_item', 'args': ['Savon', 1, 800], 'kwargs': {}},
+            {'op': 'save_and_generate_receipt', 'args': ['RAKOTO Jean'], 'kwargs': {}},
+        ]
+        self.session.write_text(''.join(json.dumps(record) + '\n' for record in records),
+                                encoding='utf-8')
+
+        # Dossier courant de la caisse : c'est là que exports/ serait créé
+        self.cwd = self.root / 'till'
+        self.cwd.mkdir()
+        self._previous_cwd = os.getcwd()
+        os.chdir(self.cwd)
+
+    def tearDown(self):
+        os.chdir(self._previous_cwd)
+        self._tmp.cleanup()
+
+    def _replay(self):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            main.main(['--db', str(self.db_path), '--replay', str(self.session)])
+        return output.getvalue()
+
+    def test_replay_leaves_exports_untouched(self):
+        report = self._replay()
+
+        self.assertIn('save_and_generate_receipt', report)
+        self.assertFalse((self.cwd / 'exports').exists())
+        self.assertFalse((self.db_path.parent / 'cart_journal.jsonl').exists())
+
+    def test_replay_leaves_database_untouched(self):
+        self._replay()
+
+        db = Database(self.db_path)
+        self.assertEqual(db.get_all_receipts(), [])
+        conn = db.get_connection()
+        try:
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM exports').fetchone()[0], 0)
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,198 @@
+"""
+Conversion des montants en toutes lettres (français et malgache)
+Tables précalculées pour 0-999 et cache LRU sur les montants entiers
+Supporte jusqu'à 999 999 999 999 (milliards)
+"""
+from functools import lru_cache
+
+
+MAX_AMOUNT = 999_999_999_999
+
+# ========== FRANÇAIS ==========
+
+_FR_UNITS = ["", "un", "deux", "trois", "quatre", "cinq", "six", "sept", "huit", "neuf",
+             "dix", "onze", "douze", "treize", "quatorze", "quinze", "seize",
+             "dix-sept", "dix-huit", "dix-neuf"]
+_FR_TENS = ["", "", "vingt", "trente", "quarante", "cinquante", "soixante"]
+
+
+def _fr_below_100(n):
+    if n < 20:
+        return _FR_UNITS[n]
+    if n < 70:
+        t, u = divmod(n, 10)
+        if u == 0:
+            return _FR_TENS[t]
+        return f"{_FR_TENS[t]} et un" if u == 1 else f"{_FR_TENS[t]}-{_FR_UNITS[u]}"
+    if n < 80:
+        return "soixante et onze" if n == 71 else f"soixante-{_FR_UNITS[n - 60]}"
+    if n == 80:
+        return "quatre-vingts"
+    return f"quatre-vingt-{_FR_UNITS[n - 80]}"
+
+
+def _fr_below_1000(n, plural=True):
+    """
+    plural=False donne la forme invariable utilisée devant « mille »
+    (deux cent mille, quatre-vingt mille)
+    """
+    h, r = divmod(n, 100)
+    if h == 0:
+        words = _fr_below_100(r)
+    else:
+        hundreds = "cent" if h == 1 else f"{_FR_UNITS[h]} cent"
+        if r == 0:
+            words = hundreds + ("s" if h > 1 else "")
+        else:
+            words = f"{hundreds} {_fr_below_100(r)}"
+    if not plural and words.endswith(("cents", "vingts")):
+        words = words[:-1]
+    return words
+
+
+_FR_BELOW_1000 = tuple(_fr_below_1000(n) for n in range(1000))
+_FR_BEFORE_MILLE = tuple(_fr_below_1000(n, plural=False) for n in range(1000))
+
+
+@lru_cache(maxsize=4096)
+def number_to_french(n):
+    """
+    Convertir un entier positif en lettres (orthographe traditionnelle)
+
+    Exemples:
+    - 71 → "soixante et onze"
+    - 200000 → "deux cent mille"
+    - 2500000 → "deux millions cinq cent mille"
+    """
+    if n < 0 or n > MAX_AMOUNT:
+        raise ValueError(f"Montant hors limites: {n}")
+    if n == 0:
+        return "zéro"
+
+    billions, rest = divmod(n, 1_000_000_000)
+    millions, rest = divmod(rest, 1_000_000)
+    thousands, units = divmod(rest, 1000)
+
+    parts = []
+    if billions:
+        parts.append(f"{_FR_BELOW_1000[billions]} milliard{'s' if billions > 1 else ''}")
+    if millions:
+        parts.append(f"{_FR_BELOW_1000[millions]} million{'s' if millions > 1 else ''}")
+    if thousands:
+        parts.append("mille" if thousands == 1 else f"{_FR_BEFORE_MILLE[thousands]} mille")
+    if units:
+        parts.append(_FR_BELOW_1000[units])
+    return " ".join(parts)
+
+
+# ========== MALGACHE ==========
+# Lecture traditionnelle des unités vers les grands nombres :
+# 1234 → "efatra amby telopolo sy roanjato sy arivo"
+
+_MG_UNITS = ["", "iray", "roa", "telo", "efatra", "dimy", "enina", "fito", "valo", "sivy"]
+_MG_TENS = ["", "folo", "roapolo", "telopolo", "efapolo", "dimampolo",
+            "enimpolo", "fitopolo", "valopolo", "sivifolo"]
+_MG_HUNDREDS = ["", "zato", "roanjato", "telonjato", "efajato", "dimanjato",
+                "eninjato", "fitonjato", "valonjato", "sivinjato"]
+
+_UNIT, _TEN, _OTHER = 0, 1, 2
+
+
+def _mg_below_1000(n):
+    """Composants (mot, nature) de 0 à 999, des unités vers les centaines"""
+    h, r = divmod(n, 100)
+    t, u = divmod(r, 10)
+    parts = []
+    if u:
+        parts.append((u, _UNIT))
+    if t:
+        parts.append((_MG_TENS[t], _TEN))
+    if h:
+        parts.append((_MG_HUNDREDS[h], _OTHER))
+    return tuple(parts)
+
+
+_MG_BELOW_1000 = tuple(_mg_below_1000(n) for n in range(1000))
+
+
+def _mg_join(parts):
+    """Assembler les composants : « amby » après les unités, « sy » ensuite"""
+    words = []
+    last = len(parts) - 1
+    for i, (word, kind) in enumerate(parts):
+        if kind == _UNIT:
+            if i == last:
+                words.append(_MG_UNITS[word])
+            else:
+                words.append("iraika" if word == 1 else _MG_UNITS[word])
+                words.append("ambin'ny" if parts[i + 1] == ("folo", _TEN) else "amby")
+        else:
+            words.append(word)
+            if i != last:
+                words.append("sy")
+    return " ".join(words)
+
+
+def _mg_components(n):
+    """Composants d'un nombre jusqu'à 999 999 (arivo, alina, hetsy)"""
+    thousands, units = divmod(n, 1000)
+    parts = list(_MG_BELOW_1000[units])
+
+    hetsy, rest = divmod(thousands, 100)
+    alina, arivo = divmod(rest, 10)
+    if arivo:
+        parts.append(("arivo" if arivo == 1 else f"{_MG_UNITS[arivo]} arivo", _OTHER))
+    if alina:
+        parts.append((f"{_MG_UNITS[alina]} alina", _OTHER))
+    if hetsy:
+        parts.append((f"{_MG_UNITS[hetsy]} hetsy", _OTHER))
+    return parts
+
+
+@lru_cache(maxsize=4096)
+def number_to_malagasy(n):
+    """
+    Convertir un entier positif en lettres malgaches
+
+    Exemples:
+    - 11 → "iraika ambin'ny folo"
+    - 25000 → "dimy arivo sy roa alina"
+    - 1500000 → "dimy hetsy sy iray tapitrisa"
+    """
+    if n < 0 or n > MAX_AMOUNT:
+        raise ValueError(f"Montant hors limites: {n}")
+    if n == 0:
+        return "aotra"
+
+    billions, rest = divmod(n, 1_000_000_000)
+    millions, rest = divmod(rest, 1_000_000)
+
+    parts = _mg_components(rest)
+    if millions:
+        parts.append((f"{_mg_join(_mg_components(millions))} tapitrisa", _OTHER))
+    if billions:
+        parts.append((f"{_mg_join(_mg_components(billions))} lavitrisa", _OTHER))
+    return _mg_join(parts)
+
+
+# ========== POINT D'ENTRÉE ==========
+
+LANGUAGES = {
+    'fr': number_to_french,
+    'mg': number_to_malagasy,
+}
+
+
+def amount_in_words(amount, language='fr', fallback=None):
+    """
+    Montant (arrondi à l'unité) en toutes lettres dans la langue demandée
+    Hors limites (négatif, au-delà de MAX_AMOUNT) : ValueError, ou fallback
+    s'il est donné (documents imprimés : la mention est omise, pas l'impression)
+    """
+    convert = LANGUAGES.get(language, number_to_french)
+    try:
+        return convert(int(round(amount)))
+    except (ValueError, OverflowError):
+        if fallback is None:
+            raise
+        return fallback
@@ -0,0 +1,248 @@
+"""
+Instrumentation des chemins critiques (latences)
+- Les classes sont simplement enregistrées à l'import (@instrument) : tant que
+  la mesure est désactivée, leurs méthodes restent les fonctions d'origine,
+  aucun surcoût
+- enable() remplace les méthodes enregistrées par des versions chronométrées,
+  disable() remet les originales
+- Par méthode : histogramme de latences à seaux logarithmiques (compteurs fixes,
+  mémoire constante) ; derniers appels dans un tampon circulaire
+- dump() écrit les histogrammes dans un journal à rotation (data/logs/)
+"""
+import bisect
+import functools
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+# Bornes supérieures des seaux (ms), le dernier seau reçoit tout le reste
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+RECENT_SIZE = 500
+
+_registry = []
+_originals = {}
+_histograms = {}
+_recent = deque(maxlen=RECENT_SIZE)
+_lock = threading.Lock()
+_enabled = False
+_slow_ms = 500.0
+
+logger = logging.getLogger('receipts.performance')
+logger.propagate = False
+
+
+class Histogram:
+    __slots__ = ('category', 'count', 'errors', 'total', 'max', 'buckets')
+
+    def __init__(self, category):
+        self.category = category
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, elapsed_ms, ok=True):
+        self.count += 1
+        self.total += elapsed_ms
+        if elapsed_ms > self.max:
+            self.max = elapsed_ms
+        if not ok:
+            self.errors += 1
+        self.buckets[bisect.bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+
+    def percentile(self, fraction):
+        """Estimation par la borne du seau atteint (plafonnée au maximum observé)"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                if index < len(BUCKETS_MS):
+                    return min(BUCKETS_MS[index], self.max)
+                break
+        return self.max
+
+
+# ========== ENREGISTREMENT DES CLASSES ==========
+
+def instrument(category, extra=()):
+    """
+    Décorateur de classe : méthodes publiques (et `extra`) mesurées quand
+    l'instrumentation est activée
+    """
+    def register(cls):
+        names = [name for name, attr in vars(cls).items()
+                 if (not name.startswith('_') or name in extra)
+                 and (callable(attr) or isinstance(attr, (staticmethod, classmethod)))
+                 and not isinstance(attr, type)]
+        _registry.append((cls, category, names))
+        if _enabled:
+            _patch(cls, category, names)
+        return cls
+    return register
+
+
+def _timed(func, name, category):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        ok = True
+        try:
+            return func(*args, **kwargs)
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            record(name, category, (time.perf_counter() - started) * 1000, ok)
+    return wrapper
+
+
+def _patch(cls, category, names):
+    for name in names:
+        attr = vars(cls)[name]
+        label = f"{cls.__name__}.{name}"
+        if isinstance(attr, (staticmethod, classmethod)):
+            wrapped = type(attr)(_timed(attr.__func__, label, category))
+        else:
+            wrapped = _timed(attr, label, category)
+        _originals[(cls, name)] = attr
+        setattr(cls, name, wrapped)
+
+
+def enable():
+    global _enabled
+    with _lock:
+        if _enabled:
+            return
+        _enabled = True
+        for cls, category, names in _registry:
+            _patch(cls, category, names)
+
+
+def disable():
+    global _enabled
+    with _lock:
+        if not _enabled:
+            return
+        _enabled = False
+        for (cls, name), attr in _originals.items():
+            setattr(cls, name, attr)
+        _originals.clear()
+
+
+def is_enabled():
+    return _enabled
+
+
+# ========== MESURES ==========
+
+@contextmanager
+def timed(name, category='app'):
+    """Mesurer un bloc de code (rien n'est fait si l'instrumentation est désactivée)"""
+    if not _enabled:
+        yield
+        return
+    started = time.perf_counter()
+    ok = True
+    try:
+        yield
+    except BaseException:
+        ok = False
+        raise
+    finally:
+        record(name, category, (time.perf_counter() - started) * 1000, ok)
+
+
+def record(name, category, elapsed_ms, ok=True):
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram(category)
+        histogram.add(elapsed_ms, ok)
+        _recent.append((time.time(), name, elapsed_ms, ok,
+                        threading.current_thread().name))
+    if elapsed_ms >= _slow_ms and logger.handlers:
+        logger.warning(json.dumps({'slow': name, 'ms': round(elapsed_ms, 3), 'ok': ok},
+                                  ensure_ascii=False))
+
+
+def snapshot():
+    """Statistiques par méthode, triées par temps cumulé décroissant"""
+    with _lock:
+        items = list(_histograms.items())
+        rows = [{
+            'name': name,
+            'category': hist.category,
+            'count': hist.count,
+            'errors': hist.errors,
+            'total_ms': hist.total,
+            'mean_ms': hist.total / hist.count,
+            'p50_ms': hist.percentile(0.50),
+            'p95_ms': hist.percentile(0.95),
+            'p99_ms': hist.percentile(0.99),
+            'max_ms': hist.max,
+            'buckets': list(hist.buckets),
+        } for name, hist in items]
+    rows.sort(key=lambda row: row['total_ms'], reverse=True)
+    return rows
+
+
+def recent(limit=None):
+    """Derniers appels, du plus récent au plus ancien"""
+    with _lock:
+        calls = list(_recent)
+    calls.reverse()
+    return calls[:limit] if limit else calls
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _recent.clear()
+
+
+# ========== JOURNAL ==========
+
+def configure(log_path, max_bytes=1_000_000, backup_count=5, slow_ms=None):
+    """Journal à rotation des mesures (et seuil des appels lents journalisés immédiatement)"""
+    global _slow_ms
+    if slow_ms is not None:
+        _slow_ms = float(slow_ms)
+
+    log_path = Path(log_path)
+    for handler in list(logger.handlers):
+        if getattr(handler, 'baseFilename', None) == str(log_path.resolve()):
+            return
+        logger.removeHandler(handler)
+        handler.close()
+
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backup_count,
+                                  encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+
+def dump():
+    """Écrire les histogrammes courants dans le journal, retourne le nombre de méthodes"""
+    rows = snapshot()
+    if not logger.handlers or not rows:
+        return 0
+    stamp = datetime.now().isoformat(timespec='seconds')
+    for row in rows:
+        logger.info(json.dumps({
+            'dump': stamp,
+            **{key: round(value, 3) if isinstance(value, float) else value
+               for key, value in row.items()},
+        }, ensure_ascii=False))
+    return len(rows)
@@ -3,6 +3,8 @@ Utilitaire pour formater les noms de clients
 Supporte les personnes et les organisations
 """
 import re
+import unicodedata
+from functools import lru_cache
 
 
 class NameFormatter:
@@ -19,17 +21,42 @@ class NameFormatter:
         'ÉGLISE', 'EGLISE', 'TEMPLE', 'MOSQUÉE', 'MOSQUEE'
     ]
     
+    # Mots-clés ajoutés par l'utilisateur (paramètre organization_keywords)
+    _extra_keywords = ()
+    _keyword_set = frozenset(ORGANIZATION_KEYWORDS)
+    _keyword_pattern = None
+    
+    @classmethod
+    def _build_pattern(cls, keywords):
+        """
+        Une seule expression compilée pour tous les mots-clés
+        Mots entiers uniquement (« SA » ne doit pas reconnaître « RASOA »),
+        pluriel en S accepté (« ÉCOLES », « SAS »)
+        """
+        alternatives = '|'.join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+        return re.compile(rf'(?<!\w)(?:{alternatives})S?(?!\w)')
+    
+    @classmethod
+    def set_extra_keywords(cls, keywords):
+        """
+        Définir les mots-clés d'organisation ajoutés par l'utilisateur
+        Accepte une liste ou une chaîne séparée par des virgules
+        """
+        if isinstance(keywords, str):
+            keywords = keywords.split(',')
+        extra = tuple(sorted({k.strip().upper() for k in keywords if k.strip()}))
+        if extra == cls._extra_keywords and cls._keyword_pattern is not None:
+            return
+        
+        cls._extra_keywords = extra
+        cls._keyword_set = frozenset(cls.ORGANIZATION_KEYWORDS).union(extra)
+        cls._keyword_pattern = cls._build_pattern(cls._keyword_set)
+        cls.format_client_name.cache_clear()
+    
     @staticmethod
     def is_organization(name):
         """Déterminer si le nom est une organisation"""
-        name_upper = name.upper()
-        
-        # Vérifier si un mot-clé d'organisation est présent
-        for keyword in NameFormatter.ORGANIZATION_KEYWORDS:
-            if keyword in name_upper:
-                return True
-        
-        return False
+        return NameFormatter._keyword_pattern.search(name.upper()) is not None
     
     @staticmethod
     def format_person_name(name):
@@ -87,7 +114,7 @@ class NameFormatter:
         
         for word in words:
             # Garder les acronymes en majuscule
-            if word.upper() in NameFormatter.ORGANIZATION_KEYWORDS:
+            if word.upper() in NameFormatter._keyword_set:
                 formatted_words.append(word.upper())
             else:
                 formatted_words.append(word.capitalize())
@@ -95,6 +122,7 @@ class NameFormatter:
         return ' '.join(formatted_words)
     
     @staticmethod
+    @lru_cache(maxsize=4096)
     def format_client_name(name):
         """
         Point d'entrée principal pour formater un nom de client
@@ -111,12 +139,34 @@ class NameFormatter:
             return NameFormatter.format_person_name(name)
 
 
+NameFormatter.set_extra_keywords(())
+
+
 # Fonction helper pour utilisation simple
 def format_client_name(name):
     """Fonction helper pour formater un nom de client"""
     return NameFormatter.format_client_name(name)
 
 
+def fold_name(text):
+    """
+    Forme de comparaison d'un nom : majuscules, sans accents, espaces réduits
+    Sert aussi à normaliser un préfixe tapé pour la recherche de clients
+    """
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(stripped.upper().split())
+
+
+def client_name_key(name):
+    """
+    Clé normalisée d'un client : le nom tel qu'enregistré, replié
+    Sans reformatage : la clé ne dépend pas des mots-clés d'organisation
+    (paramètre modifiable), un même client garde la même fiche
+    """
+    return fold_name(name)
+
+
 if __name__ == "__main__":
     # Tests
     test_cases = [
@@ -129,7 +179,9 @@ if __name__ == "__main__":
         "Association des Parents",
         "RASOANIRINA Paul",
         "Église Catholique",
-        "pharmacie centrale"
+        "pharmacie centrale",
+        "RASOA Hanta",
+        "RANDRIANASOLONGO Jean"
     ]
     
     print("Tests de formatage:")
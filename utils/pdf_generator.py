@@ -11,6 +11,10 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from datetime import datetime
 
+from utils.amount_in_words import amount_in_words
+from utils.instrumentation import instrument
+
+@instrument('printer')
 class ReceiptGenerator:
     def __init__(self, settings):
         self.settings = settings
@@ -38,7 +42,8 @@ class ReceiptGenerator:
             leftMargin=self.margin,
             rightMargin=self.margin,
             topMargin=self.margin,
-            bottomMargin=self.margin
+            bottomMargin=self.margin,
+            invariant=True  # Sortie reproductible : même reçu → même fichier (dédoublonnage des exports)
         )
         
         story = []
@@ -265,6 +270,11 @@ class ReceiptGenerator:
         elements.append(Paragraph("TOTAL À PAYER", styles['CenterBold']))
         elements.append(Paragraph(f"{total:,.0f} {currency}", styles['Total']))
         
+        language = self.settings.get('amount_words_language', 'fr')
+        words = amount_in_words(total, language, fallback='').capitalize()
+        words_line = f"En lettre: {words} {currency.lower()}" if words else "En lettre:"
+        elements.append(Paragraph(words_line, styles['CenterSmall']))
+        
         elements.append(Spacer(1, 1 * mm_unit))
         elements.append(self._create_line())
         elements.append(Spacer(1, 1 * mm_unit))
@@ -324,6 +334,11 @@ class ReceiptGenerator:
         elements.append(Paragraph("TOTAL À PAYER", styles['CenterBold']))
         elements.append(Paragraph(f"{total:,.0f} {currency}", styles['Total']))
         
+        language = self.settings.get('amount_words_language', 'fr')
+        words = amount_in_words(total, language, fallback='').capitalize()
+        words_line = f"En lettre: {words} {currency.lower()}" if words else "En lettre:"
+        elements.append(Paragraph(words_line, styles['CenterSmall']))
+        
         payment_method = receipt_data.get('payment_method', 'Espèces')
         elements.append(Spacer(1, 0.5 * mm_unit))
         elements.append(Paragraph(f"Paiement: {payment_method}", styles['Center']))
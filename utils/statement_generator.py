@@ -0,0 +1,316 @@
+"""
+Relevés de compte clients (PDF multipage) avec balance âgée
+- Reçus du client lus en flux via l'index client_id, cumul ligne par ligne
+- Dessin direct sur le canvas reportlab : une page à la fois, mémoire constante
+- Génération de fin de mois pour tous les clients en parallèle (processus)
+"""
+import multiprocessing
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+from pathlib import Path
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+from utils.amount_in_words import amount_in_words
+from utils.name_formatter import fold_name
+
+
+class StatementGenerator:
+    # Tranches d'ancienneté (jours) : (début, fin incluse, libellé)
+    AGING_BUCKETS = (
+        (0, 30, '0-30 jours'),
+        (31, 60, '31-60 jours'),
+        (61, 90, '61-90 jours'),
+        (91, None, '+90 jours'),
+    )
+
+    # Colonnes du tableau : (titre, position x en mm, alignement)
+    COLUMNS = (
+        ('Date', 0, 'left'),
+        ('N° Reçu', 28, 'left'),
+        ('Paiement', 62, 'left'),
+        ('Montant', 138, 'right'),
+        ('Cumul', 180, 'right'),
+    )
+
+    ROW_HEIGHT = 5.5 * mm
+
+    def __init__(self, database, settings=None, page_size=A4):
+        self.db = database
+        self.settings = settings if settings is not None else database.get_all_settings()
+        self.page_width, self.page_height = page_size
+        self.page_size = page_size
+        self.margin = 15 * mm
+        self.currency = self.settings.get('currency', 'Ar')
+
+    # ========== RELEVÉ D'UN CLIENT ==========
+
+    def generate_statement(self, client, date_from, date_to, output_path):
+        """
+        Générer le relevé d'un client sur une période
+
+        client : dictionnaire (id, name, contact) comme retourné par Database.get_client
+        Retourne un résumé : chemin, nombre de reçus, total, balance âgée
+        """
+        as_of = datetime.strptime(date_to, '%Y-%m-%d').date()
+        aging = [0.0] * len(self.AGING_BUCKETS)
+
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        c = canvas.Canvas(str(output_path), pagesize=self.page_size, invariant=1)
+        c.setTitle(f"Relevé {client['name']} {date_from} - {date_to}")
+
+        page = 1
+        y = self._draw_first_page_header(c, client, date_from, date_to)
+        y = self._draw_table_header(c, y)
+
+        count, running = 0, 0.0
+        for receipt_id, number, receipt_date, total, payment in self.db.iter_client_receipts(
+                client['id'], date_from, date_to):
+            if y - self.ROW_HEIGHT < self.margin + 10 * mm:
+                self._draw_page_number(c, page)
+                c.showPage()
+                page += 1
+                y = self._draw_continuation_header(c, client, date_from, date_to)
+                y = self._draw_table_header(c, y)
+
+            running += total
+            count += 1
+            aging[self._aging_bucket(receipt_date, as_of)] += total
+
+            self._draw_row(c, y, (self._format_date(receipt_date), number, payment or '',
+                                  f"{total:,.0f}", f"{running:,.0f}"))
+            y -= self.ROW_HEIGHT
+
+        # Le pied de relevé (total + balance âgée) doit tenir sur la page
+        if y < self.margin + 60 * mm:
+            self._draw_page_number(c, page)
+            c.showPage()
+            page += 1
+            y = self._draw_continuation_header(c, client, date_from, date_to)
+
+        self._draw_summary(c, y, count, running, aging)
+        self._draw_page_number(c, page)
+        c.save()
+
+        return {
+            'client_id': client['id'],
+            'path': str(output_path),
+            'receipts': count,
+            'total': running,
+            'pages': page,
+            'aging': dict(zip((label for _, _, label in self.AGING_BUCKETS), aging)),
+        }
+
+    def _aging_bucket(self, receipt_date, as_of):
+        try:
+            age = (as_of - datetime.strptime(receipt_date, '%Y-%m-%d').date()).days
+        except ValueError:
+            age = 0
+        for index, (start, end, _) in enumerate(self.AGING_BUCKETS):
+            if end is None or age <= end:
+                return index
+        return len(self.AGING_BUCKETS) - 1
+
+    # ========== DESSIN ==========
+
+    def _draw_first_page_header(self, c, client, date_from, date_to):
+        left = self.margin
+        right = self.page_width - self.margin
+        y = self.page_height - self.margin
+
+        # Société à gauche
+        c.setFont('Helvetica-Bold', 12)
+        c.drawString(left, y, self.settings.get('company_name', ''))
+        c.setFont('Helvetica', 8)
+        lines = self.settings.get('company_address', '').split('\n')
+        lines.append(self.settings.get('company_phone', ''))
+        nif, stat = self.settings.get('company_nif', ''), self.settings.get('company_stat', '')
+        if nif or stat:
+            lines.append(f"NIF: {nif}   STAT: {stat}")
+        line_y = y
+        for line in lines:
+            if line.strip():
+                line_y -= 4 * mm
+                c.drawString(left, line_y, line.strip())
+
+        # Titre et client à droite
+        c.setFont('Helvetica-Bold', 14)
+        c.drawRightString(right, y, "RELEVÉ DE COMPTE")
+        c.setFont('Helvetica', 9)
+        c.drawRightString(right, y - 6 * mm,
+                          f"Période du {self._format_date(date_from)} au {self._format_date(date_to)}")
+        c.setFont('Helvetica-Bold', 10)
+        c.drawRightString(right, y - 12 * mm, client['name'])
+        c.setFont('Helvetica', 8)
+        client_y = y - 12 * mm
+        for line in (client.get('contact') or '').split('\n')[:3]:
+            if line.strip():
+                client_y -= 4 * mm
+                c.drawRightString(right, client_y, line.strip())
+
+        y = min(line_y, client_y) - 6 * mm
+        c.setLineWidth(0.5)
+        c.line(left, y, right, y)
+        return y - 6 * mm
+
+    def _draw_continuation_header(self, c, client, date_from, date_to):
+        y = self.page_height - self.margin
+        c.setFont('Helvetica-Bold', 9)
+        c.drawString(self.margin, y, f"Relevé de compte - {client['name']} (suite)")
+        c.setFont('Helvetica', 8)
+        c.drawRightString(self.page_width - self.margin, y,
+                          f"{self._format_date(date_from)} - {self._format_date(date_to)}")
+        return y - 8 * mm
+
+    def _draw_table_header(self, c, y):
+        c.setFont('Helvetica-Bold', 8)
+        self._draw_row(c, y, [title for title, _, _ in self.COLUMNS], font=None)
+        c.setLineWidth(0.3)
+        c.line(self.margin, y - 1.5 * mm, self.page_width - self.margin, y - 1.5 * mm)
+        c.setFont('Helvetica', 8)
+        return y - self.ROW_HEIGHT
+
+    def _draw_row(self, c, y, values, font='Helvetica'):
+        if font:
+            c.setFont(font, 8)
+        for (_, x, align), value in zip(self.COLUMNS, values):
+            if align == 'right':
+                c.drawRightString(self.margin + x * mm, y, str(value))
+            else:
+                c.drawString(self.margin + x * mm, y, str(value))
+
+    def _draw_summary(self, c, y, count, total, aging):
+        left = self.margin
+        right = self.page_width - self.margin
+
+        c.setLineWidth(0.5)
+        c.line(left, y + 2 * mm, right, y + 2 * mm)
+        y -= 4 * mm
+
+        c.setFont('Helvetica-Bold', 10)
+        c.drawString(left, y, f"Total de la période ({count} reçus)")
+        c.drawRightString(right, y, f"{total:,.0f} {self.currency}")
+
+        language = self.settings.get('amount_words_language', 'fr')
+        words = amount_in_words(total, language, fallback='').capitalize()
+        c.setFont('Helvetica-Oblique', 8)
+        if words:
+            c.drawString(left, y - 5 * mm, f"Arrêté à la somme de : {words} {self.currency.lower()}")
+
+        # Balance âgée
+        y -= 16 * mm
+        c.setFont('Helvetica-Bold', 9)
+        c.drawString(left, y, "Ancienneté des montants facturés")
+        y -= 6 * mm
+
+        width = (right - left) / len(self.AGING_BUCKETS)
+        for index, ((_, _, label), amount) in enumerate(zip(self.AGING_BUCKETS, aging)):
+            x = left + index * width
+            c.setLineWidth(0.3)
+            c.rect(x, y - 9 * mm, width, 13 * mm)
+            c.setFont('Helvetica', 8)
+            c.drawCentredString(x + width / 2, y, label)
+            c.setFont('Helvetica-Bold', 9)
+            c.drawCentredString(x + width / 2, y - 6 * mm, f"{amount:,.0f}")
+
+    def _draw_page_number(self, c, page):
+        c.setFont('Helvetica', 7)
+        c.drawCentredString(self.page_width / 2, self.margin / 2, f"Page {page}")
+
+    @staticmethod
+    def _format_date(value):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').strftime('%d/%m/%Y')
+        except (TypeError, ValueError):
+            return value or ''
+
+    # ========== FIN DE MOIS ==========
+
+    @staticmethod
+    def month_bounds(year, month):
+        """Premier et dernier jour d'un mois (chaînes AAAA-MM-JJ)"""
+        first = date(year, month, 1)
+        following = date(year + month // 12, month % 12 + 1, 1)
+        return first.isoformat(), date.fromordinal(following.toordinal() - 1).isoformat()
+
+    @staticmethod
+    def statement_filename(client, date_from, date_to):
+        slug = re.sub(r'[^A-Z0-9]+', '_', fold_name(client['name'])).strip('_')[:40]
+        return f"RELEVE_{client['id']:05d}_{slug}_{date_from}_{date_to}.pdf"
+
+    def generate_all(self, date_from, date_to, output_dir, workers=None, chunk_size=50,
+                     progress_callback=None):
+        """
+        Générer les relevés de tous les clients actifs sur la période
+
+        workers=1 : génération séquentielle dans le processus courant.
+        Sinon les clients sont répartis par lots sur un pool de processus
+        (la mise en page PDF est du calcul Python pur, les threads n'aident pas).
+        """
+        started = time.perf_counter()
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        clients = [{'id': client_id, 'name': name, 'contact': contact}
+                   for client_id, name, contact in self.db.get_clients_with_receipts(date_from, date_to)]
+        chunks = [clients[i:i + chunk_size] for i in range(0, len(clients), chunk_size)]
+
+        summaries, errors = [], []
+
+        def collect(results):
+            for result in results:
+                (summaries if 'path' in result else errors).append(result)
+            if progress_callback:
+                progress_callback(len(summaries) + len(errors), len(clients))
+
+        if workers == 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                collect(_generate_chunk(self, chunk, date_from, date_to, output_dir))
+        else:
+            # spawn : pas de fork d'une application Tk multi-thread
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                     initializer=_init_worker,
+                                     initargs=(str(self.db.db_path), self.settings)) as pool:
+                futures = [pool.submit(_generate_chunk, None, chunk, date_from, date_to, output_dir)
+                           for chunk in chunks]
+                for future in as_completed(futures):
+                    collect(future.result())
+
+        return {
+            'output_dir': str(output_dir),
+            'statements': len(summaries),
+            'errors': errors,
+            'total': sum(s['total'] for s in summaries),
+            'duration': time.perf_counter() - started,
+        }
+
+
+# ========== PROCESSUS DE TRAVAIL ==========
+
+_worker_generator = None
+
+
+def _init_worker(db_path, settings):
+    """Initialisation d'un processus : une connexion base et un générateur par processus"""
+    global _worker_generator
+    from models.database import Database
+    _worker_generator = StatementGenerator(Database(db_path), settings)
+
+
+def _generate_chunk(generator, clients, date_from, date_to, output_dir):
+    generator = generator or _worker_generator
+    results = []
+    for client in clients:
+        path = Path(output_dir) / generator.statement_filename(client, date_from, date_to)
+        try:
+            results.append(generator.generate_statement(client, date_from, date_to, path))
+        except Exception as e:
+            results.append({'client_id': client['id'], 'error': str(e)})
+    return results
@@ -0,0 +1,251 @@
+"""
+Mise en page texte à chasse fixe, commune aux imprimantes laser et thermique
+- Largeur d'affichage des caractères : accents précomposés = 1 colonne,
+  diacritiques combinants et joints (ZWJ, sélecteurs de variante) = 0,
+  caractères larges (CJK, emoji) = 2 ; chemin rapide pour l'ASCII
+- TextLayout : alignement, troncature, deux textes côte à côte, césure,
+  pour une largeur donnée ; avec une page de code (imprimante thermique),
+  le texte est d'abord ramené aux caractères imprimables (« ? » sinon)
+- ColumnModel : colonnes précalculées (largeur, alignement, limite), une
+  ligne = un seul format (textes étroits) ou un seul join
+- PageBuffer : page de hauteur fixe préallouée, pied de page collé en bas
+"""
+import codecs
+import re
+import unicodedata
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+
+ZERO_WIDTH = {'\u200b', '\u200c', '\u200d', '\u2060', '\ufeff'}
+# Premier caractère dont la largeur n'est plus forcément 1 (diacritiques combinants)
+_NOT_NARROW = re.compile('[\u0300-\U0010ffff]')
+
+
+@lru_cache(maxsize=4096)
+def char_width(ch):
+    """Colonnes occupées par un caractère"""
+    if ch in ZERO_WIDTH or unicodedata.combining(ch):
+        return 0
+    category = unicodedata.category(ch)
+    if category in ('Mn', 'Me', 'Cc', 'Cf') or '\ufe00' <= ch <= '\ufe0f':
+        return 0
+    return 2 if unicodedata.east_asian_width(ch) in ('W', 'F') else 1
+
+
+def is_narrow(text):
+    """Un caractère = une colonne : ASCII et latin précomposé (é, ô, ñ...), avant U+0300"""
+    return text.isascii() or not _NOT_NARROW.search(text)
+
+
+def display_width(text):
+    """Colonnes occupées par un texte"""
+    if is_narrow(text):
+        return len(text)
+    return sum(map(char_width, text))
+
+
+def truncate(text, width):
+    """Texte coupé à width colonnes (un caractère large qui déborde est retiré)"""
+    if is_narrow(text):
+        return text[:width]
+    offsets = list(accumulate(map(char_width, text)))
+    if not offsets or offsets[-1] <= width:
+        return text
+    return text[:bisect_right(offsets, width)]
+
+
+class TextLayout:
+    """Mise en page d'une largeur donnée (colonnes de caractères normaux)"""
+
+    def __init__(self, width, codepage=None):
+        self.width = width
+        self.codepage = codepage
+        if codepage:
+            decoding_table = codecs.lookup(codepage).decode(bytes(range(256)), 'replace')[0]
+            self._encoding_map = codecs.charmap_build(decoding_table)
+            self._decoding_table = decoding_table
+            # Désignations et noms reviennent souvent : conversion mise en cache
+            self._to_codepage = lru_cache(maxsize=4096)(self._to_codepage)
+
+    def printable(self, text):
+        """Texte tel que l'imprimante le restituera (page de code : « ? » pour l'inconnu)"""
+        if not self.codepage or text.isascii():
+            return text
+        return self._to_codepage(text)
+
+    def _to_codepage(self, text):
+        encoded = codecs.charmap_encode(unicodedata.normalize('NFC', text), 'replace',
+                                        self._encoding_map)[0]
+        return codecs.charmap_decode(encoded, 'strict', self._decoding_table)[0]
+
+    def truncate(self, text, width=None):
+        width = self.width if width is None else width
+        if text.isascii():
+            return text[:width]
+        return truncate(self.printable(text), width)
+
+    def fit(self, text, align='left', width=None):
+        """Texte tronqué puis aligné ; à gauche, pas d'espaces de remplissage en fin de ligne"""
+        width = self.width if width is None else width
+        if text.isascii():
+            text = text[:width]
+            free = width - len(text)
+        else:
+            text = truncate(self.printable(text), width)
+            free = width - display_width(text)
+        if align == 'left':
+            return text
+        if align == 'center':
+            return ' ' * (free // 2) + text
+        return ' ' * free + text
+
+    def side_by_side(self, left, right, width=None):
+        """Deux textes aux extrémités d'une ligne, le plus long est tronqué si besoin"""
+        if width is None:
+            width = self.width
+        left, right = str(left).strip(), str(right).strip()
+        # ASCII : ni page de code ni mesure, une colonne par caractère
+        if not (left.isascii() and right.isascii()):
+            if self.codepage:
+                left, right = self.printable(left), self.printable(right)
+            if _NOT_NARROW.search(left + right):
+                return self._side_by_side_wide(left, right, width)
+        room = width - len(left) - len(right)
+        if room < 1:
+            if len(right) > len(left):
+                right = right[:room - 1]
+            else:
+                left = left[:room - 1]
+            room = width - len(left) - len(right)
+        return left + ' ' * room + right
+
+    @staticmethod
+    def _side_by_side_wide(left, right, width):
+        """side_by_side avec caractères larges ou de largeur nulle : mesure colonne par colonne"""
+        left_width, right_width = display_width(left), display_width(right)
+        excess = left_width + right_width - width + 1
+        if excess > 0:
+            if right_width > left_width:
+                right = truncate(right, right_width - excess)
+                right_width = display_width(right)
+            else:
+                left = truncate(left, left_width - excess)
+                left_width = display_width(left)
+        return ''.join((left, ' ' * (width - left_width - right_width), right))
+
+    def wrap(self, text, width=None):
+        """Césure gloutonne aux espaces ; un mot trop long est coupé"""
+        width = self.width if width is None else width
+        lines, current, used = [], [], 0
+        for word in self.printable(text).split():
+            size = display_width(word)
+            while size > width:
+                if current:
+                    lines.append(' '.join(current))
+                    current, used = [], 0
+                head = truncate(word, width)
+                lines.append(head)
+                word = word[len(head):]
+                size = display_width(word)
+            if current and used + 1 + size > width:
+                lines.append(' '.join(current))
+                current, used = [], 0
+            if word:
+                used += size + (1 if current else 0)
+                current.append(word)
+        if current:
+            lines.append(' '.join(current))
+        return lines
+
+    def rule(self, char='='):
+        return char * self.width
+
+    def columns(self, *columns, sep=' '):
+        return ColumnModel(self, columns, sep)
+
+
+class ColumnModel:
+    """
+    Colonnes fixes précalculées : (largeur, alignement[, limite de caractères])
+    La limite reproduit les colonnes dont le texte est coupé avant la largeur
+    (ex. désignation sur 18 colonnes coupée à 17 pour garder une marge) ;
+    limite None : jamais tronqué (montants), la ligne s'allonge si besoin
+    """
+
+    def __init__(self, layout, columns, sep=' '):
+        self.layout = layout
+        self.sep = sep
+        self.columns = []
+        for column in columns:
+            width, align = column[0], column[1] if len(column) > 1 else 'left'
+            limit = column[2] if len(column) > 2 else width
+            self.columns.append((width, align, None if limit is None else min(limit, width)))
+        self.width = sum(width for width, _, _ in self.columns) + len(sep) * (len(self.columns) - 1)
+        # Chemin rapide (textes étroits) : une seule chaîne de format, ex. "{:<18.17} {:>4}"
+        self._format = sep.replace('{', '{{').replace('}', '}}').join(
+            '{:%s%d%s}' % ({'left': '<', 'right': '>', 'center': '^'}[align], width,
+                           '' if limit is None else f'.{limit}')
+            for width, align, limit in self.columns)
+        self._format_row = self._format.format
+
+    def row(self, *values):
+        """Une ligne (sans retour à la ligne), chaque valeur tronquée et alignée dans sa colonne"""
+        # Chemin rapide : textes ASCII, formatés tels quels (ni conversion, ni page de code)
+        try:
+            text = ''.join(values)
+        except TypeError:
+            values = list(map(str, values))
+            text = ''.join(values)
+        if text.isascii():
+            return self._format_row(*values)
+        if self.layout.codepage:
+            values = list(map(self.layout.printable, values))
+            text = ''.join(values)
+        if not _NOT_NARROW.search(text):
+            return self._format_row(*values)
+
+        parts = []
+        for (width, align, limit), text in zip(self.columns, values):
+            if limit is not None:
+                text = truncate(text, limit)
+            free = width - display_width(text)
+            if align == 'right':
+                parts.append(' ' * free + text)
+            elif align == 'center':
+                parts.append(' ' * (free // 2) + text + ' ' * (free - free // 2))
+            else:
+                parts.append(text + ' ' * free)
+        return self.sep.join(parts)
+
+
+class PageBuffer:
+    """
+    Page de hauteur fixe : liste préallouée remplie par le haut, puis le pied
+    est placé en bas (les lignes restantes servent de remplissage). Une page
+    trop pleine s'allonge au lieu de perdre des lignes.
+    """
+
+    def __init__(self, height, blank='\n'):
+        self.height = height
+        self.lines = [blank] * height
+        self.top = 0
+
+    def write(self, line):
+        if self.top < len(self.lines):
+            self.lines[self.top] = line
+        else:
+            self.lines.append(line)
+        self.top += 1
+
+    def extend(self, lines):
+        lines = list(lines)
+        self.lines[self.top:self.top + len(lines)] = lines
+        self.top += len(lines)
+
+    def render(self, bottom=()):
+        """Contenu, remplissage puis lignes du bas, en une seule chaîne"""
+        bottom = list(bottom)
+        start = max(self.top, self.height - len(bottom))
+        self.lines[start:] = bottom
+        return ''.join(self.lines)
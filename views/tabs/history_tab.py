@@ -4,7 +4,7 @@ Affichage et gestion de l'historique des reçus
 """
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
-from tkinter import messagebox
+from tkinter import messagebox, simpledialog
 from datetime import datetime
 import platform
 import os
@@ -21,6 +21,11 @@ class HistoryTab:
         self.history_search_var = ttk.StringVar()
         self.history_search_var.trace('w', lambda *args: self.search_history())
         
+        # Filtre par client (répertoire clients)
+        self.client_filter_var = ttk.StringVar()
+        self.client_filter_id = None
+        self.client_choices = {}
+        
         self.create_widgets()
         self.refresh_history()
         
@@ -75,15 +80,55 @@ class HistoryTab:
             ttk.Button(search_frame, text="🔄 Actualiser", 
                       command=self.refresh_history, bootstyle="info").pack(
                           fill=X, ipady=8, pady=2)
+            
+            ttk.Label(search_frame, text="👤 Client:", 
+                     font=("", font_size, "bold")).pack(anchor=W, pady=2)
+            client_row = ttk.Frame(search_frame)
+            client_row.pack(fill=X, pady=2)
+            self.client_filter_combo = ttk.Combobox(
+                client_row, textvariable=self.client_filter_var, font=("", font_size))
+            self.client_filter_combo.pack(side=LEFT, fill=X, expand=YES, ipady=5)
+            ttk.Button(client_row, text="✖", command=self.clear_client_filter, 
+                      bootstyle="secondary-outline").pack(side=LEFT, padx=(4, 0), ipady=5)
         else:
             # Version normale horizontale
             ttk.Label(search_frame, text="🔍 Rechercher:", 
                      font=("", font_size, "bold")).pack(side=LEFT, padx=5)
             ttk.Entry(search_frame, textvariable=self.history_search_var, 
                      font=("", font_size)).pack(side=LEFT, fill=X, expand=YES, padx=5)
+            ttk.Label(search_frame, text="👤 Client:", 
+                     font=("", font_size, "bold")).pack(side=LEFT, padx=5)
+            self.client_filter_combo = ttk.Combobox(
+                search_frame, textvariable=self.client_filter_var, width=25, 
+                font=("", font_size))
+            self.client_filter_combo.pack(side=LEFT, padx=(5, 0), ipady=4)
+            ttk.Button(search_frame, text="✖", command=self.clear_client_filter, 
+                      bootstyle="secondary-outline").pack(side=LEFT, padx=(2, 5), ipady=4)
             ttk.Button(search_frame, text="🔄 Actualiser", 
                       command=self.refresh_history, bootstyle="info", 
                       width=15).pack(side=LEFT, padx=5, ipady=8)
+        
+        self.client_filter_combo.bind('<KeyRelease>', self.on_client_filter_typed)
+        self.client_filter_combo.bind('<<ComboboxSelected>>', self.on_client_filter_selected)
+    
+    def on_client_filter_typed(self, event):
+        """Proposer les clients dont le nom commence par la saisie"""
+        if event.keysym in ('Return', 'Up', 'Down', 'Escape'):
+            return
+        clients = self.controller.search_clients(self.client_filter_var.get(), limit=15)
+        self.client_choices = {name: client_id for client_id, name, _, _ in clients}
+        self.client_filter_combo.configure(values=list(self.client_choices))
+    
+    def on_client_filter_selected(self, event):
+        """Filtrer l'historique sur le client choisi"""
+        self.client_filter_id = self.client_choices.get(self.client_filter_var.get())
+        self.search_history()
+    
+    def clear_client_filter(self):
+        """Retirer le filtre client"""
+        self.client_filter_id = None
+        self.client_filter_var.set("")
+        self.search_history()
     
     def _create_treeview(self, parent):
         """Créer le treeview"""
@@ -110,6 +155,7 @@ class HistoryTab:
             self.history_tree.column(col, width=widths.get(col, 100), anchor=align, minwidth=50)
         
         self.history_tree.pack(fill=BOTH, expand=YES, side=LEFT)
+        self.history_tree.bind('<Double-1>', lambda e: self.open_receipt_pdf())
         
         scrollbar = ttk.Scrollbar(parent, orient=VERTICAL, command=self.history_tree.yview, 
                                  bootstyle="round")
@@ -128,6 +174,9 @@ class HistoryTab:
             ttk.Button(btn_frame, text="👁️ Voir détails", 
                       command=self.view_receipt_details, bootstyle="primary").pack(
                           fill=X, ipady=12, pady=2)
+            ttk.Button(btn_frame, text="📂 Ouvrir PDF", 
+                      command=self.open_receipt_pdf, bootstyle="primary-outline").pack(
+                          fill=X, ipady=12, pady=2)
             ttk.Button(btn_frame, text="📄 Régénérer PDF", 
                       command=self.regenerate_receipt, bootstyle="success").pack(
                           fill=X, ipady=12, pady=2)
@@ -137,6 +186,9 @@ class HistoryTab:
             ttk.Button(btn_frame, text="🖨️ Réimprimer (Laser A6)", 
                       command=self.reprint_laser_receipt, bootstyle="warning").pack(
                           fill=X, ipady=12, pady=2)
+            ttk.Button(btn_frame, text="📑 Relevé du client", 
+                      command=self.generate_client_statement, bootstyle="secondary").pack(
+                          fill=X, ipady=12, pady=2)
             ttk.Button(btn_frame, text="🗑️ Supprimer", 
                       command=self.delete_receipt, bootstyle="danger").pack(
                           fill=X, ipady=12, pady=2)
@@ -152,6 +204,9 @@ class HistoryTab:
             ttk.Button(row1, text="👁️ Voir détails", 
                       command=self.view_receipt_details, bootstyle="primary", 
                       width=18).pack(side=LEFT, padx=3, ipady=10, fill=X, expand=YES)
+            ttk.Button(row1, text="📂 Ouvrir PDF", 
+                      command=self.open_receipt_pdf, bootstyle="primary-outline", 
+                      width=18).pack(side=LEFT, padx=3, ipady=10, fill=X, expand=YES)
             ttk.Button(row1, text="📄 Régénérer PDF", 
                       command=self.regenerate_receipt, bootstyle="success", 
                       width=18).pack(side=LEFT, padx=3, ipady=10, fill=X, expand=YES)
@@ -166,6 +221,9 @@ class HistoryTab:
             ttk.Button(row2, text="🖨️ Laser (A6)", 
                       command=self.reprint_laser_receipt, bootstyle="warning", 
                       width=18).pack(side=LEFT, padx=3, ipady=10, fill=X, expand=YES)
+            ttk.Button(row2, text="📑 Relevé client", 
+                      command=self.generate_client_statement, bootstyle="secondary", 
+                      width=18).pack(side=LEFT, padx=3, ipady=10, fill=X, expand=YES)
             
             # Ligne 3
             row3 = ttk.Frame(btn_frame)
@@ -180,6 +238,10 @@ class HistoryTab:
     
     def refresh_history(self):
         """Rafraîchir l'historique"""
+        if self.client_filter_id:
+            self.search_history()
+            return
+        
         for item in self.history_tree.get_children():
             self.history_tree.delete(item)
         
@@ -225,7 +287,12 @@ class HistoryTab:
         for item in self.history_tree.get_children():
             self.history_tree.delete(item)
         
-        if query:
+        if self.client_filter_id:
+            # Index client_id, puis filtre sur le numéro de reçu
+            receipts = self.controller.get_receipts_by_client(self.client_filter_id)
+            if query:
+                receipts = [r for r in receipts if query.lower() in r[1].lower()]
+        elif query:
             receipts = self.controller.search_receipts(query)
         else:
             receipts = self.controller.get_all_receipts()
@@ -282,6 +349,22 @@ class HistoryTab:
             
             messagebox.showinfo("Détails du reçu", details, parent=self.frame)
     
+    def open_receipt_pdf(self):
+        """Ouvrir le PDF existant d'un reçu (régénéré seulement s'il n'existe plus)"""
+        selection = self.history_tree.selection()
+        if not selection:
+            messagebox.showwarning("Attention", "Veuillez sélectionner un reçu", 
+                                 parent=self.frame)
+            return
+        
+        receipt_id = self.history_tree.item(selection[0])['tags'][0]
+        success, result = self.controller.get_receipt_pdf(receipt_id)
+        
+        if success:
+            self.open_file(result)
+        else:
+            messagebox.showerror("Erreur", result, parent=self.frame)
+    
     def regenerate_receipt(self):
         """Régénérer un reçu"""
         selection = self.history_tree.selection()
@@ -332,6 +415,10 @@ class HistoryTab:
                                  parent=self.frame)
             return
         
+        if len(selection) > 1:
+            self.reprint_laser_batch(selection)
+            return
+        
         receipt_id = self.history_tree.item(selection[0])['tags'][0]
         
         if messagebox.askyesno("Confirmation", 
@@ -344,6 +431,69 @@ class HistoryTab:
             else:
                 messagebox.showerror("Erreur", message, parent=self.frame)
     
+    def reprint_laser_batch(self, selection):
+        """Réimprimer plusieurs reçus en un seul travail laser"""
+        receipt_ids = [self.history_tree.item(row)['tags'][0] for row in selection]
+        
+        if not messagebox.askyesno("Confirmation", 
+                                   f"Réimprimer {len(receipt_ids)} reçus sur l'imprimante laser ?", 
+                                   parent=self.frame):
+            return
+        
+        success, result = self.controller.reprint_laser_receipts(receipt_ids)
+        if not success:
+            messagebox.showerror("Erreur", result, parent=self.frame)
+            return
+        
+        # Suivre le travail sans bloquer l'interface
+        def poll():
+            if not result.done():
+                self.frame.after(200, poll)
+                return
+            job = result.result()
+            if job.ok:
+                messagebox.showinfo("Succès", 
+                                  f"{job.documents} reçus envoyés (travail {job.job_id or '?'})", 
+                                  parent=self.frame)
+            else:
+                messagebox.showerror("Erreur", job.message, parent=self.frame)
+        
+        poll()
+    
+    def generate_client_statement(self):
+        """Relevé de compte du client filtré sur un mois"""
+        if not self.client_filter_id:
+            messagebox.showwarning("Attention", 
+                                 "Choisissez d'abord un client dans le filtre 👤 Client", 
+                                 parent=self.frame)
+            return
+        
+        period = simpledialog.askstring("Relevé de compte", "Mois du relevé (AAAA-MM) :", 
+                                        initialvalue=datetime.now().strftime('%Y-%m'), 
+                                        parent=self.frame)
+        if not period:
+            return
+        
+        try:
+            year, month = (int(part) for part in period.strip().split('-'))
+            from utils.statement_generator import StatementGenerator
+            date_from, date_to = StatementGenerator.month_bounds(year, month)
+        except ValueError:
+            messagebox.showerror("Erreur", "Format attendu : AAAA-MM (ex: 2026-01)", 
+                               parent=self.frame)
+            return
+        
+        success, result = self.controller.generate_client_statement(
+            self.client_filter_id, date_from, date_to)
+        
+        if success:
+            if messagebox.askyesno("Relevé généré", 
+                                  f"{result['receipts']} reçus, total {result['total']:,.0f}\n\n"
+                                  "Voulez-vous ouvrir le relevé PDF ?", parent=self.frame):
+                self.open_file(result['path'])
+        else:
+            messagebox.showerror("Erreur", result, parent=self.frame)
+    
     def delete_receipt(self):
         """Supprimer un reçu"""
         selection = self.history_tree.selection()
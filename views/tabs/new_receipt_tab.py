@@ -5,7 +5,7 @@ Interface responsive avec formatage intelligent des noms
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from ttkbootstrap.scrolled import ScrolledFrame, ScrolledText
-from tkinter import messagebox
+from tkinter import messagebox, simpledialog
 from datetime import datetime
 import platform
 import os
@@ -26,17 +26,31 @@ class NewReceiptTab:
         self.receipt_number_var = ttk.StringVar()
         self.date_var = ttk.StringVar(value=datetime.now().strftime('%d/%m/%Y'))
         self.client_name_var = ttk.StringVar()
+        self.client_name_var.trace('w', self.on_client_search)
+        self.client_name_var.trace('w', self.on_client_changed)
         self.client_contact_var = ttk.StringVar()
         self.quantity_var = ttk.StringVar(value="1")
         self.unit_price_var = ttk.StringVar()
         self.total_var = ttk.StringVar(value="0 Ar")
         
         self.autocomplete_listbox = None
+        self.client_listbox = None
+        self.client_matches = {}
+        self.pending_search = None
+        self.item_rows = []
+        self.currency = controller.db.get_setting('currency', 'Ar')
         self.is_compact_mode = False
+        self._restoring_client = False
         
         # Créer l'interface
         self.create_widgets()
         
+        # Client de la vente restaurée depuis le journal des paniers
+        self._restore_client()
+        
+        # Le tableau des articles suit le panier ligne par ligne
+        self.controller.subscribe_cart(self.on_cart_changed)
+        
         # Détecter le redimensionnement
         self.frame.bind('<Configure>', self.on_resize)
     
@@ -54,7 +68,12 @@ class NewReceiptTab:
         """Réorganiser le layout"""
         for widget in self.frame.winfo_children():
             widget.destroy()
+        self.autocomplete_listbox = None
+        self.client_listbox = None
+        self.pending_search = None
         self.create_widgets()
+        self._restore_client()
+        self.refresh_current_items()
     
     def create_widgets(self):
         """Créer les widgets"""
@@ -122,6 +141,10 @@ class NewReceiptTab:
                               parent=self.frame)
         info_label.bind("<Button-1>", show_info)
         
+        # Suggestions de clients connus
+        self.client_autocomplete_frame = ttk.Frame(header_frame)
+        self.client_autocomplete_frame.pack(fill=X)
+        
         # Ligne 3: Contact (téléphone OU adresse)
         row3 = ttk.Frame(header_frame)
         row3.pack(fill=X, pady=4)
@@ -132,6 +155,8 @@ class NewReceiptTab:
         self.client_contact_text = ScrolledText(row3, height=2, width=50, 
                                                font=("", 11), autohide=True)
         self.client_contact_text.pack(side=LEFT, fill=X, expand=YES)
+        self.client_contact_text.text.bind('<KeyRelease>', self.on_client_changed)
+        self.client_contact_text.text.bind('<FocusOut>', self.on_client_changed)
         
         ttk.Label(row3, text="📱/🏠", font=("", 10)).pack(side=LEFT, padx=5)
     
@@ -174,6 +199,9 @@ class NewReceiptTab:
         ttk.Entry(header_frame, textvariable=self.client_name_var, 
                  font=("", font_size)).pack(fill=X, ipady=5)
         
+        self.client_autocomplete_frame = ttk.Frame(header_frame)
+        self.client_autocomplete_frame.pack(fill=X)
+        
         # Contact
         contact_row = ttk.Frame(header_frame)
         contact_row.pack(fill=X, pady=1)
@@ -185,6 +213,8 @@ class NewReceiptTab:
         self.client_contact_text = ScrolledText(header_frame, height=2, 
                                                font=("", font_size), autohide=True)
         self.client_contact_text.pack(fill=X, ipady=2)
+        self.client_contact_text.text.bind('<KeyRelease>', self.on_client_changed)
+        self.client_contact_text.text.bind('<FocusOut>', self.on_client_changed)
     
     def _create_product_section_normal(self, parent):
         """Section produit normale"""
@@ -203,6 +233,7 @@ class NewReceiptTab:
         self.product_name_entry = ttk.Entry(row1, textvariable=self.search_var, 
                                             font=("", 12))
         self.product_name_entry.pack(side=LEFT, fill=X, expand=YES, padx=(0, 8))
+        self.product_name_entry.bind('<Return>', self.on_product_return)
         
         self.autocomplete_frame = ttk.Frame(product_frame)
         self.autocomplete_frame.pack(fill=X, pady=4)
@@ -237,6 +268,7 @@ class NewReceiptTab:
         self.product_name_entry = ttk.Entry(product_frame, textvariable=self.search_var, 
                                             font=("", font_size))
         self.product_name_entry.pack(fill=X, ipady=5, pady=2)
+        self.product_name_entry.bind('<Return>', self.on_product_return)
         
         self.autocomplete_frame = ttk.Frame(product_frame)
         self.autocomplete_frame.pack(fill=X, pady=2)
@@ -271,6 +303,7 @@ class NewReceiptTab:
         
         self.items_tree = ttk.Treeview(items_frame, columns=columns, 
                                        show='headings', height=height, bootstyle="info")
+        self.item_rows = []
         
         style.configure("Treeview", font=("", font_size), rowheight=32)
         style.configure("Treeview.Heading", font=("", font_size, "bold"))
@@ -295,11 +328,22 @@ class NewReceiptTab:
                       bootstyle="danger").pack(fill=X, ipady=8, pady=1)
             ttk.Button(items_btn_frame, text="🔄 Vider", command=self.clear_items, 
                       bootstyle="warning").pack(fill=X, ipady=8, pady=1)
+            ttk.Button(items_btn_frame, text="⏸️ En attente", command=self.park_cart, 
+                      bootstyle="secondary").pack(fill=X, ipady=8, pady=1)
+            self.resume_button = ttk.Button(items_btn_frame, text="▶️ Reprendre", 
+                                            command=self.resume_cart, bootstyle="secondary-outline")
+            self.resume_button.pack(fill=X, ipady=8, pady=1)
         else:
             ttk.Button(items_btn_frame, text="🗑️ Retirer l'Article", command=self.remove_item, 
                       bootstyle="danger", width=18).pack(side=LEFT, padx=3, ipady=8)
             ttk.Button(items_btn_frame, text="🔄 Vider Tout", command=self.clear_items, 
                       bootstyle="warning", width=18).pack(side=LEFT, padx=3, ipady=8)
+            self.resume_button = ttk.Button(items_btn_frame, text="▶️ Reprendre", 
+                                            command=self.resume_cart, 
+                                            bootstyle="secondary-outline", width=18)
+            self.resume_button.pack(side=RIGHT, padx=3, ipady=8)
+            ttk.Button(items_btn_frame, text="⏸️ Mettre en attente", command=self.park_cart, 
+                      bootstyle="secondary", width=18).pack(side=RIGHT, padx=3, ipady=8)
     
     def _create_fixed_footer(self, parent):
         """Footer fixe"""
@@ -362,7 +406,22 @@ class NewReceiptTab:
                     width=18).pack(side=LEFT, padx=3, ipady=10, fill=X, expand=YES)
     
     def on_product_search(self, *args):
+        """
+        Recherche produit différée : une douchette tape le code entier en
+        quelques millisecondes, inutile d'interroger la base à chaque caractère
+        """
+        if self.pending_search:
+            self.frame.after_cancel(self.pending_search)
+        self.pending_search = self.frame.after(150, self._run_product_search)
+    
+    def _cancel_product_search(self):
+        if self.pending_search:
+            self.frame.after_cancel(self.pending_search)
+            self.pending_search = None
+    
+    def _run_product_search(self):
         """Recherche produit avec autocomplétion"""
+        self.pending_search = None
         query = self.search_var.get()
         
         if not query:
@@ -420,6 +479,7 @@ class NewReceiptTab:
             price_text = values[1].replace(' Ar', '')
             
             self.search_var.set(product_name)
+            self._cancel_product_search()
             self.unit_price_var.set(price_text)
             self.suggestion_label.config(text=f"💡 Prix: {price_text} Ar")
             
@@ -429,6 +489,94 @@ class NewReceiptTab:
             
             self.quantity_var.set("1")
     
+    def on_client_search(self, *args):
+        """Autocomplétion du client depuis le répertoire clients"""
+        query = self.client_name_var.get().strip()
+        clients = self.controller.search_clients(query, limit=5) if len(query) >= 2 else []
+        
+        if not clients:
+            self._close_client_suggestions()
+            return
+        
+        if not self.client_listbox:
+            self.client_listbox = ttk.Treeview(
+                self.client_autocomplete_frame, columns=('name', 'contact'),
+                show='headings', height=min(3, len(clients)), bootstyle="info")
+            
+            font_size = 10 if self.is_compact_mode else 11
+            style = ttk.Style()
+            style.configure("autocomplete.Treeview", font=("", font_size), rowheight=35)
+            self.client_listbox.configure(style="autocomplete.Treeview")
+            
+            self.client_listbox.heading('name', text='Client')
+            self.client_listbox.heading('contact', text='Contact')
+            width1 = 200 if self.is_compact_mode else 300
+            width2 = 120 if self.is_compact_mode else 200
+            self.client_listbox.column('name', width=width1)
+            self.client_listbox.column('contact', width=width2)
+            self.client_listbox.pack(fill=X, pady=3)
+            self.client_listbox.bind('<<TreeviewSelect>>', self.on_client_select)
+        
+        self.client_listbox.delete(*self.client_listbox.get_children())
+        self.client_matches = {}
+        for client_id, name, contact, receipt_count in clients:
+            first_line = (contact or '').split('\n')[0]
+            iid = self.client_listbox.insert('', 'end', values=(name, first_line))
+            self.client_matches[iid] = (name, contact or '')
+    
+    def on_client_select(self, event):
+        """Sélection d'un client : nom et contact préremplis"""
+        selection = self.client_listbox.selection()
+        if not selection or selection[0] not in self.client_matches:
+            return
+        
+        name, contact = self.client_matches[selection[0]]
+        self.client_name_var.set(name)
+        self.client_contact_text.delete("1.0", "end")
+        self.client_contact_text.insert("1.0", contact)
+        self.on_client_changed()
+        self._close_client_suggestions()
+    
+    def _close_client_suggestions(self):
+        if self.client_listbox:
+            self.client_listbox.destroy()
+            self.client_listbox = None
+        self.client_matches = {}
+    
+    def on_product_return(self, event=None):
+        """
+        Entrée dans le champ produit : code-barres scanné (ajout immédiat au
+        prix appris, quantité incrémentée si l'article est déjà sur le reçu),
+        sinon ajout classique par nom
+        """
+        code = self.search_var.get().strip()
+        if not code:
+            return "break"
+        
+        self._cancel_product_search()
+        success, result = self.controller.scan_item(code) if ' ' not in code else (False, None)
+        
+        if success:
+            line, _ = result
+            self.search_var.set("")
+            self._cancel_product_search()
+            self._close_product_suggestions()
+            self.quantity_var.set("1")
+            self.suggestion_label.config(text=f"🔖 {line.name} × {line.quantity:g}")
+        elif self.unit_price_var.get().strip():
+            self.add_item()
+        else:
+            # Nom saisi sans prix : suggestions ; code numérique inconnu : avertir
+            self._run_product_search()
+            if result and code.isdigit():
+                self.suggestion_label.config(text=f"⚠️ {result}")
+        return "break"
+    
+    def _close_product_suggestions(self):
+        if self.autocomplete_listbox:
+            self.autocomplete_listbox.destroy()
+            self.autocomplete_listbox = None
+    
     def add_item(self):
         """Ajouter un article"""
         name = self.search_var.get().strip()
@@ -449,7 +597,6 @@ class NewReceiptTab:
         success, result = self.controller.add_item(name, quantity, unit_price)
         
         if success:
-            self.refresh_current_items()
             self.search_var.set("")
             self.quantity_var.set("1")
             self.unit_price_var.set("")
@@ -468,33 +615,133 @@ class NewReceiptTab:
         
         index = self.items_tree.index(selection[0])
         self.controller.remove_item(index)
-        self.refresh_current_items()
     
     def clear_items(self):
         """Vider tous les articles"""
         if messagebox.askyesno("Confirmation", "Voulez-vous vraiment vider tous les articles ?", 
                               parent=self.frame):
             self.controller.clear_current_items()
-            self.refresh_current_items()
     
     def refresh_current_items(self):
-        """Rafraîchir l'affichage des articles"""
-        for item in self.items_tree.get_children():
-            self.items_tree.delete(item)
+        """Reconstruire tout le tableau des articles (changement de disposition)"""
+        self.currency = self.controller.db.get_setting('currency', 'Ar')
+        self.items_tree.delete(*self.items_tree.get_children())
+        self.item_rows = [self.items_tree.insert('', 'end', values=self._item_values(line))
+                          for line in self.controller.cart]
+        self._update_total()
+        self._update_resume_button()
+    
+    def _update_resume_button(self):
+        """Nombre de ventes en attente sur le bouton Reprendre"""
+        parked = len(self.controller.get_parked_carts())
+        label = "▶️ Reprendre" if self.is_compact_mode else "▶️ Reprendre une vente"
+        self.resume_button.config(text=f"{label} ({parked})" if parked else label,
+                                  state=NORMAL if parked else DISABLED)
+    
+    def park_cart(self):
+        """Mettre la vente en cours en attente (le client revient plus tard)"""
+        if not self.controller.cart:
+            messagebox.showwarning("Attention", "Aucun article à mettre en attente", 
+                                 parent=self.frame)
+            return
         
-        items = self.controller.get_current_items()
-        currency = self.controller.db.get_setting('currency', 'Ar')
+        label = simpledialog.askstring("Mettre en attente", "Repère de la vente (client, table...) :", 
+                                       initialvalue=self.client_name_var.get().strip(), 
+                                       parent=self.frame)
+        if label is None:
+            return
         
-        for item in items:
-            self.items_tree.insert('', 'end', values=(
-                item['name'],
-                f"{item['quantity']:.0f}",
-                f"{item['unit_price']:,.0f}",
-                f"{item['total']:,.0f}"
-            ))
+        success, result = self.controller.park_cart(label, self.client_name_var.get(), 
+                                                    self.get_client_contact())
+        if success:
+            self.suggestion_label.config(text=f"⏸️ Vente « {result} » mise en attente")
+        else:
+            messagebox.showerror("Erreur", result, parent=self.frame)
+    
+    def resume_cart(self):
+        """Choisir une vente en attente et la reprendre"""
+        parked = self.controller.get_parked_carts()
+        if not parked:
+            return
         
-        total = self.controller.get_current_total()
-        self.total_var.set(f"{total:,.0f} {currency}")
+        dialog = ttk.Toplevel(title="Ventes en attente")
+        dialog.transient(self.frame.winfo_toplevel())
+        dialog.grab_set()
+        
+        tree = ttk.Treeview(dialog, columns=('Vente', 'Lignes', 'Total'), show='headings', 
+                            height=min(8, len(parked)), bootstyle="info")
+        for col, width, anchor in (('Vente', 260, W), ('Lignes', 70, CENTER), ('Total', 120, E)):
+            tree.heading(col, text=col)
+            tree.column(col, width=width, anchor=anchor)
+        for cart_id, label, lines, total in parked:
+            tree.insert('', 'end', iid=str(cart_id), 
+                        values=(label, lines, f"{total:,.0f} {self.currency}"))
+        tree.pack(fill=BOTH, expand=YES, padx=10, pady=10)
+        
+        def resume(event=None):
+            selection = tree.selection()
+            if not selection:
+                return
+            dialog.destroy()
+            success, label = self.controller.resume_cart(int(selection[0]), self.client_name_var.get(), 
+                                                         self.get_client_contact())
+            if success:
+                self.suggestion_label.config(text=f"▶️ Vente « {label} » reprise")
+        
+        tree.bind('<Double-1>', resume)
+        ttk.Button(dialog, text="▶️ Reprendre", command=resume, 
+                  bootstyle="success").pack(fill=X, padx=10, pady=(0, 10), ipady=8)
+    
+    def on_cart_changed(self, event, index, line):
+        """Répercuter un changement du panier sur la seule ligne concernée"""
+        cart = self.controller.cart
+        if event == cart.ADDED:
+            row = self.items_tree.insert('', 'end', values=self._item_values(line))
+            self.item_rows.append(row)
+            self.items_tree.see(row)
+        elif event == cart.UPDATED:
+            self.items_tree.item(self.item_rows[index], values=self._item_values(line))
+        elif event == cart.REMOVED:
+            self.items_tree.delete(self.item_rows.pop(index))
+        elif event == cart.SWITCHED:
+            # Client de la vente reprise (vide pour un nouveau panier)
+            self._restore_client()
+            self.refresh_current_items()
+            return
+        else:
+            self.items_tree.delete(*self.item_rows)
+            self.item_rows = []
+        self._update_total()
+    
+    @staticmethod
+    def _item_values(line):
+        return (
+            line.name,
+            f"{line.quantity:.0f}",
+            f"{line.unit_price:,.0f}",
+            f"{line.total:,.0f}"
+        )
+    
+    def _update_total(self):
+        self.total_var.set(f"{self.controller.get_current_total():,.0f} {self.currency}")
+    
+    def on_client_changed(self, *args):
+        """Client saisi : journalisé avec le panier (restauré après un plantage)"""
+        if self._restoring_client:
+            return
+        self.controller.set_cart_client(self.client_name_var.get(), self.get_client_contact())
+    
+    def _restore_client(self):
+        """Afficher le client du panier actif"""
+        name, contact = self.controller.get_cart_client()
+        self._restoring_client = True
+        try:
+            self.client_name_var.set(name)
+            self.client_contact_text.delete("1.0", "end")
+            self.client_contact_text.insert("1.0", contact)
+        finally:
+            self._restoring_client = False
+        self._close_client_suggestions()
     
     def get_client_contact(self):
         """Récupérer le contact (peut contenir des retours à la ligne)"""
@@ -502,7 +749,7 @@ class NewReceiptTab:
     
     def print_thermal(self):
         """Imprimer thermique"""
-        if not self.controller.get_current_items():
+        if not self.controller.cart:
             messagebox.showwarning("Attention", "Veuillez ajouter au moins un article", 
                                  parent=self.frame)
             return
@@ -530,7 +777,7 @@ class NewReceiptTab:
             
     def print_laser(self):
         """Imprimer laser"""
-        if not self.controller.get_current_items():
+        if not self.controller.cart:
             messagebox.showwarning("Attention", "Veuillez ajouter au moins un article", 
                                 parent=self.frame)
             return
@@ -582,13 +829,13 @@ class NewReceiptTab:
     def reset_form(self):
         """Réinitialiser le formulaire"""
         self.controller.clear_current_items()
-        self.client_name_var.set("")
-        self.client_contact_text.delete("1.0", "end")
+        self._restore_client()
         self.search_var.set("")
         self.quantity_var.set("1")
         self.unit_price_var.set("")
         self.suggestion_label.config(text="")
-        self.refresh_current_items()
+        self.currency = self.controller.db.get_setting('currency', 'Ar')
+        self._update_total()
         self.update_receipt_number()
     
     def update_receipt_number(self):
@@ -4,7 +4,7 @@ Gestion de la base de données des produits
 """
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
-from tkinter import messagebox
+from tkinter import messagebox, filedialog, simpledialog
 from datetime import datetime
 
 
@@ -54,13 +54,24 @@ class ProductsTab:
                  text="📦 Base de données des produits - Apprentissage automatique",
                  font=("", font_size, "bold"), bootstyle="info").pack()
         
+        # Alerte de stock bas (masquée s'il n'y a rien à signaler)
+        self.low_stock_label = ttk.Label(info_frame, text="", bootstyle="danger", 
+                                         font=("", font_size, "bold"))
+        
+        # Progression de l'import (masquée hors import)
+        self.import_progress_var = ttk.DoubleVar(value=0)
+        self.import_progress = ttk.Progressbar(info_frame, variable=self.import_progress_var,
+                                               maximum=100, bootstyle="success-striped")
+        
         # Treeview
         if self.is_compact_mode:
-            columns = ('Produit', 'Prix', 'Qté')
-            widths = {'Produit': 200, 'Prix': 90, 'Qté': 60}
+            columns = ('Produit', 'Prix', 'Stock')
+            widths = {'Produit': 200, 'Prix': 90, 'Stock': 70}
         else:
-            columns = ('Produit', 'Prix moyen', 'Utilisé', 'Dernière utilisation')
-            widths = {'Produit': 350, 'Prix moyen': 130, 'Utilisé': 100, 'Dernière utilisation': 160}
+            columns = ('Produit', 'Code-barres', 'Prix moyen', 'Stock', 'Utilisé', 
+                       'Dernière utilisation')
+            widths = {'Produit': 290, 'Code-barres': 140, 'Prix moyen': 120, 'Stock': 90, 
+                      'Utilisé': 90, 'Dernière utilisation': 150}
         
         self.products_tree = ttk.Treeview(scroll_container, columns=columns, 
                                           show='headings', height=15, bootstyle="info")
@@ -76,12 +87,13 @@ class ProductsTab:
             self.products_tree.heading(col, text=col)
             if col == 'Produit':
                 align = W
-            elif col in ['Utilisé', 'Qté']:
+            elif col in ['Utilisé', 'Qté', 'Stock', 'Code-barres']:
                 align = CENTER
             else:
                 align = E
             self.products_tree.column(col, width=widths.get(col, 100), anchor=align, minwidth=50)
         
+        self.products_tree.tag_configure('low_stock', foreground='#d9534f')
         self.products_tree.pack(fill=BOTH, expand=YES, side=LEFT)
         
         # Scrollbar tactile
@@ -105,14 +117,47 @@ class ProductsTab:
             ttk.Button(btn_frame, text="🔄 Actualiser", 
                       command=self.refresh_products, bootstyle="info").pack(
                           fill=X, ipady=12, pady=2)
+            ttk.Button(btn_frame, text="📥 Importer", 
+                      command=self.import_catalog, bootstyle="success").pack(
+                          fill=X, ipady=12, pady=2)
+            ttk.Button(btn_frame, text="📦 Entrée de stock", 
+                      command=self.receive_stock, bootstyle="primary").pack(
+                          fill=X, ipady=12, pady=2)
+            ttk.Button(btn_frame, text="✏️ Inventaire", 
+                      command=self.adjust_stock, bootstyle="primary-outline").pack(
+                          fill=X, ipady=12, pady=2)
+            ttk.Button(btn_frame, text="⚠️ Seuil d'alerte", 
+                      command=self.set_min_stock, bootstyle="warning-outline").pack(
+                          fill=X, ipady=12, pady=2)
+            ttk.Button(btn_frame, text="🏷️ Code-barres", 
+                      command=self.set_sku, bootstyle="info-outline").pack(
+                          fill=X, ipady=12, pady=2)
             ttk.Button(btn_frame, text="🗑️ Supprimer", 
                       command=self.delete_product, bootstyle="danger").pack(
                           fill=X, ipady=12, pady=2)
         else:
-            # Boutons côte à côte
+            # Boutons côte à côte (2 lignes)
+            stock_row = ttk.Frame(btn_frame)
+            stock_row.pack(fill=X, pady=(0, 4))
+            ttk.Button(stock_row, text="📦 Entrée de stock", 
+                      command=self.receive_stock, bootstyle="primary", 
+                      width=20).pack(side=LEFT, padx=3, ipady=10, fill=X, expand=YES)
+            ttk.Button(stock_row, text="✏️ Inventaire (ajuster)", 
+                      command=self.adjust_stock, bootstyle="primary-outline", 
+                      width=20).pack(side=LEFT, padx=3, ipady=10, fill=X, expand=YES)
+            ttk.Button(stock_row, text="⚠️ Seuil d'alerte", 
+                      command=self.set_min_stock, bootstyle="warning-outline", 
+                      width=20).pack(side=LEFT, padx=3, ipady=10, fill=X, expand=YES)
+            ttk.Button(stock_row, text="🏷️ Code-barres", 
+                      command=self.set_sku, bootstyle="info-outline", 
+                      width=20).pack(side=LEFT, padx=3, ipady=10, fill=X, expand=YES)
+            
             ttk.Button(btn_frame, text="🔄 Actualiser", 
                       command=self.refresh_products, bootstyle="info", 
                       width=20).pack(side=LEFT, padx=3, ipady=10, fill=X, expand=YES)
+            ttk.Button(btn_frame, text="📥 Importer un catalogue", 
+                      command=self.import_catalog, bootstyle="success", 
+                      width=20).pack(side=LEFT, padx=3, ipady=10, fill=X, expand=YES)
             ttk.Button(btn_frame, text="🗑️ Supprimer le produit", 
                       command=self.delete_product, bootstyle="danger", 
                       width=20).pack(side=LEFT, padx=3, ipady=10, fill=X, expand=YES)
@@ -126,7 +171,9 @@ class ProductsTab:
         currency = self.controller.db.get_setting('currency', 'Ar')
         
         for product in products:
-            product_id, name, avg_price, count, total_sold, last_used = product
+            product_id, name, avg_price, count, total_sold, last_used, stock, min_stock, sku = product
+            stock = stock or 0
+            low = bool(min_stock) and stock <= min_stock
             
             try:
                 last_used_obj = datetime.fromisoformat(last_used)
@@ -138,17 +185,116 @@ class ProductsTab:
                 values = (
                     name,
                     f"{avg_price:,.0f}",
-                    f"{count}"
+                    f"{stock:g}"
                 )
             else:
                 values = (
                     name,
+                    sku or "",
                     f"{avg_price:,.0f} {currency}",
+                    f"{stock:g}" + (" ⚠️" if low else ""),
                     f"{count} fois",
                     formatted_last
                 )
             
-            self.products_tree.insert('', 'end', values=values, tags=(product_id,))
+            tags = (product_id, 'low_stock') if low else (product_id,)
+            self.products_tree.insert('', 'end', values=values, tags=tags)
+        
+        self.refresh_stock_alerts()
+    
+    def refresh_stock_alerts(self):
+        """Bandeau d'alerte des produits sous leur seuil (index partiel, sans parcours complet)"""
+        low_stock = self.controller.get_low_stock_products()
+        if not low_stock:
+            self.low_stock_label.pack_forget()
+            return
+        
+        names = ", ".join(name for _, name, _, _ in low_stock[:5])
+        more = f" (+{len(low_stock) - 5})" if len(low_stock) > 5 else ""
+        self.low_stock_label.config(text=f"⚠️ Stock bas: {names}{more}")
+        self.low_stock_label.pack(pady=(4, 0))
+    
+    def _selected_product(self):
+        """(id, nom) du produit sélectionné, ou None après avertissement"""
+        selection = self.products_tree.selection()
+        if not selection:
+            messagebox.showwarning("Attention", "Veuillez sélectionner un produit", 
+                                 parent=self.frame)
+            return None
+        item = self.products_tree.item(selection[0])
+        return item['tags'][0], item['values'][0]
+    
+    def receive_stock(self):
+        """Entrée de stock (achat / réception de marchandise)"""
+        selected = self._selected_product()
+        if not selected:
+            return
+        product_id, name = selected
+        
+        quantity = simpledialog.askfloat("Entrée de stock", f"Quantité reçue pour {name} :", 
+                                         minvalue=0, parent=self.frame)
+        if not quantity:
+            return
+        
+        success, result = self.controller.receive_stock(product_id, quantity, "Réception")
+        if success:
+            self.refresh_products()
+        else:
+            messagebox.showerror("Erreur", result, parent=self.frame)
+    
+    def adjust_stock(self):
+        """Inventaire : aligner le stock sur la quantité comptée"""
+        selected = self._selected_product()
+        if not selected:
+            return
+        product_id, name = selected
+        
+        counted = simpledialog.askfloat("Inventaire", f"Quantité comptée pour {name} :", 
+                                        minvalue=0, parent=self.frame)
+        if counted is None:
+            return
+        
+        success, result = self.controller.adjust_stock(product_id, counted)
+        if success:
+            self.refresh_products()
+            messagebox.showinfo("Inventaire", f"Stock ajusté ({result:+g})", parent=self.frame)
+        else:
+            messagebox.showerror("Erreur", result, parent=self.frame)
+    
+    def set_min_stock(self):
+        """Définir le seuil d'alerte de stock bas (0 = pas d'alerte)"""
+        selected = self._selected_product()
+        if not selected:
+            return
+        product_id, name = selected
+        
+        threshold = simpledialog.askfloat("Seuil d'alerte", 
+                                          f"Alerter quand le stock de {name} descend à :", 
+                                          minvalue=0, parent=self.frame)
+        if threshold is None:
+            return
+        
+        self.controller.set_min_stock(product_id, threshold)
+        self.refresh_products()
+    
+    def set_sku(self):
+        """Associer un code-barres au produit (scanner ou saisir, vide pour retirer)"""
+        selected = self._selected_product()
+        if not selected:
+            return
+        product_id, name = selected
+        
+        sku = simpledialog.askstring("Code-barres", 
+                                     f"Scannez ou saisissez le code-barres de {name} :", 
+                                     parent=self.frame)
+        if sku is None:
+            return
+        
+        success, result = self.controller.set_product_sku(product_id, sku)
+        if success:
+            self.refresh_products()
+        else:
+            messagebox.showerror("Erreur", result, parent=self.frame)
     
     def delete_product(self):
         """Supprimer un produit"""
@@ -164,4 +310,41 @@ class ProductsTab:
             self.controller.delete_product(product_id)
             self.refresh_products()
             self.main_window.statistics_tab.refresh_statistics()
-            messagebox.showinfo("Succès", "Produit supprimé avec succès", parent=self.frame)
\ No newline at end of file
+            messagebox.showinfo("Succès", "Produit supprimé avec succès", parent=self.frame)
+    
+    def import_catalog(self):
+        """Importer un catalogue produits (CSV ou Excel)"""
+        path = filedialog.askopenfilename(
+            parent=self.frame,
+            title="Importer un catalogue",
+            filetypes=[("Catalogue", "*.csv *.xlsx"), ("CSV", "*.csv"), 
+                       ("Excel", "*.xlsx"), ("Tous les fichiers", "*.*")]
+        )
+        if not path:
+            return
+        
+        self.import_progress_var.set(0)
+        self.import_progress.pack(fill=X, pady=(6, 0))
+        
+        def on_progress(rows_done, fraction):
+            if fraction is not None:
+                self.import_progress_var.set(fraction * 100)
+            self.frame.update_idletasks()
+        
+        success, result = self.controller.import_products(path, on_progress)
+        self.import_progress.pack_forget()
+        
+        if not success:
+            messagebox.showerror("Erreur", result, parent=self.frame)
+            return
+        
+        self.refresh_products()
+        self.main_window.statistics_tab.refresh_statistics()
+        
+        message = (f"{result['imported']} produits importés "
+                   f"en {result['duration']:.1f} s")
+        if result['rejected']:
+            message += f"\n{result['rejected']} lignes rejetées :\n"
+            message += "\n".join(f"• Ligne {line}: {reason}" 
+                                  for line, reason in result['errors'][:10])
+        messagebox.showinfo("Import terminé", message, parent=self.frame)
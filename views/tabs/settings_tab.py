@@ -5,7 +5,8 @@ Gestion des paramètres de l'application
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from ttkbootstrap.scrolled import ScrolledFrame
-from tkinter import messagebox
+from tkinter import messagebox, simpledialog
+from datetime import date, datetime
 
 
 class SettingsTab:
@@ -22,6 +23,10 @@ class SettingsTab:
         
         # Détecter le redimensionnement
         self.frame.bind('<Configure>', self.on_resize)
+        
+        # Panneau de diagnostic caché (Ctrl+Maj+D)
+        self.diagnostics_window = None
+        self.frame.bind_all('<Control-Shift-D>', self.open_diagnostics)
     
     def on_resize(self, event):
         """Détecter le redimensionnement"""
@@ -60,6 +65,9 @@ class SettingsTab:
         # Section imprimante LASER (NOUVEAU)
         self._create_laser_printer_section(content)
         
+        # Sauvegarde et maintenance
+        self._create_maintenance_section(content)
+        
         # Zone dangereuse
         self._create_danger_zone(content)
         
@@ -136,6 +144,24 @@ class SettingsTab:
                         values=['Ar', '€', '$', 'FCFA'], width=20, 
                         state="readonly", font=("", font_size)).pack(side=LEFT, padx=5, ipady=4)
         
+        # Langue du montant en lettres
+        if self.is_compact_mode:
+            ttk.Label(pref_frame, text="Montant en lettres:", 
+                     font=("", font_size, "bold")).pack(anchor=W, pady=1)
+            self.settings_vars['amount_words_language'] = ttk.StringVar()
+            ttk.Combobox(pref_frame, textvariable=self.settings_vars['amount_words_language'],
+                        values=['fr', 'mg'], font=("", font_size), 
+                        state="readonly").pack(fill=X, ipady=5, pady=2)
+        else:
+            words_frame = ttk.Frame(pref_frame)
+            words_frame.pack(fill=X, pady=4)
+            ttk.Label(words_frame, text="Montant en lettres (fr/mg):", width=30, anchor=W, 
+                     font=("", font_size)).pack(side=LEFT, padx=5)
+            self.settings_vars['amount_words_language'] = ttk.StringVar()
+            ttk.Combobox(words_frame, textvariable=self.settings_vars['amount_words_language'],
+                        values=['fr', 'mg'], width=20, state="readonly", 
+                        font=("", font_size)).pack(side=LEFT, padx=5, ipady=4)
+        
         # Largeur papier
         if self.is_compact_mode:
             ttk.Label(pref_frame, text="Largeur papier (mm):", 
@@ -154,6 +180,24 @@ class SettingsTab:
                         values=['58', '80'], width=20, state="readonly", 
                         font=("", font_size)).pack(side=LEFT, padx=5, ipady=4)
         
+        # Largeur papier du ticket thermique (colonnes du modèle ESC/POS)
+        if self.is_compact_mode:
+            ttk.Label(pref_frame, text="Papier thermique (mm):", 
+                     font=("", font_size, "bold")).pack(anchor=W, pady=1)
+            self.settings_vars['thermal_paper_width'] = ttk.StringVar()
+            ttk.Combobox(pref_frame, textvariable=self.settings_vars['thermal_paper_width'],
+                        values=['58', '80'], font=("", font_size), 
+                        state="readonly").pack(fill=X, ipady=5, pady=2)
+        else:
+            thermal_frame = ttk.Frame(pref_frame)
+            thermal_frame.pack(fill=X, pady=4)
+            ttk.Label(thermal_frame, text="Papier thermique (mm):", width=30, anchor=W, 
+                     font=("", font_size)).pack(side=LEFT, padx=5)
+            self.settings_vars['thermal_paper_width'] = ttk.StringVar()
+            ttk.Combobox(thermal_frame, textvariable=self.settings_vars['thermal_paper_width'],
+                        values=['58', '80'], width=20, state="readonly", 
+                        font=("", font_size)).pack(side=LEFT, padx=5, ipady=4)
+        
         # Type de reçu
         if self.is_compact_mode:
             ttk.Label(pref_frame, text="Type de vente:", 
@@ -169,6 +213,22 @@ class SettingsTab:
             self.settings_vars['receipt_type'] = ttk.StringVar()
             ttk.Entry(type_frame, textvariable=self.settings_vars['receipt_type'], 
                      font=("", font_size)).pack(side=LEFT, padx=5, fill=X, expand=YES, ipady=4)
+        
+        # Mots-clés d'organisation supplémentaires
+        if self.is_compact_mode:
+            ttk.Label(pref_frame, text="Mots-clés organisation (virgules):", 
+                     font=("", font_size, "bold")).pack(anchor=W, pady=1)
+            self.settings_vars['organization_keywords'] = ttk.StringVar()
+            ttk.Entry(pref_frame, textvariable=self.settings_vars['organization_keywords'], 
+                     font=("", font_size)).pack(fill=X, ipady=5, pady=2)
+        else:
+            keywords_frame = ttk.Frame(pref_frame)
+            keywords_frame.pack(fill=X, pady=4)
+            ttk.Label(keywords_frame, text="Mots-clés organisation (virgules):", width=30, 
+                     anchor=W, font=("", font_size)).pack(side=LEFT, padx=5)
+            self.settings_vars['organization_keywords'] = ttk.StringVar()
+            ttk.Entry(keywords_frame, textvariable=self.settings_vars['organization_keywords'], 
+                     font=("", font_size)).pack(side=LEFT, padx=5, fill=X, expand=YES, ipady=4)
     
     def _create_thermal_printer_section(self, parent):
         """Section imprimante thermique"""
@@ -261,6 +321,63 @@ class SettingsTab:
                         values=["A6", "A5", "A4"], state="readonly",
                         font=("", font_size)).pack(side=LEFT, padx=5, fill=X, expand=YES, ipady=4)
         
+        # Lignes par désignation (pagination selon la hauteur réelle des articles)
+        if self.is_compact_mode:
+            ttk.Label(laser_frame, text="Lignes par désignation:", 
+                     font=("", font_size, "bold")).pack(anchor=W, pady=1)
+            self.settings_vars['laser_name_lines'] = ttk.StringVar()
+            ttk.Combobox(laser_frame, textvariable=self.settings_vars['laser_name_lines'],
+                        values=["1", "2", "3"], state="readonly",
+                        font=("", font_size)).pack(fill=X, ipady=5, pady=2)
+        else:
+            name_lines_frame = ttk.Frame(laser_frame)
+            name_lines_frame.pack(fill=X, pady=5)
+            
+            ttk.Label(name_lines_frame, text="Lignes par désignation:", 
+                     width=30, anchor=W, font=("", font_size)).pack(side=LEFT, padx=5)
+            self.settings_vars['laser_name_lines'] = ttk.StringVar()
+            ttk.Combobox(name_lines_frame, textvariable=self.settings_vars['laser_name_lines'],
+                        values=["1", "2", "3"], state="readonly",
+                        font=("", font_size)).pack(side=LEFT, padx=5, fill=X, expand=YES, ipady=4)
+        
+        # Mode d'envoi au spouleur CUPS
+        if self.is_compact_mode:
+            ttk.Label(laser_frame, text="Envoi à CUPS:", 
+                     font=("", font_size, "bold")).pack(anchor=W, pady=1)
+            self.settings_vars['laser_spooler'] = ttk.StringVar()
+            ttk.Combobox(laser_frame, textvariable=self.settings_vars['laser_spooler'],
+                        values=["lp", "ipp"], state="readonly",
+                        font=("", font_size)).pack(fill=X, ipady=5, pady=2)
+        else:
+            spooler_frame = ttk.Frame(laser_frame)
+            spooler_frame.pack(fill=X, pady=5)
+            
+            ttk.Label(spooler_frame, text="Envoi à CUPS (lp / ipp):", 
+                     width=30, anchor=W, font=("", font_size)).pack(side=LEFT, padx=5)
+            self.settings_vars['laser_spooler'] = ttk.StringVar()
+            ttk.Combobox(spooler_frame, textvariable=self.settings_vars['laser_spooler'],
+                        values=["lp", "ipp"], state="readonly",
+                        font=("", font_size)).pack(side=LEFT, padx=5, fill=X, expand=YES, ipady=4)
+        
+        # Langage envoyé à l'imprimante (pcl / postscript : travail brut, sans filtres CUPS)
+        if self.is_compact_mode:
+            ttk.Label(laser_frame, text="Langage imprimante:", 
+                     font=("", font_size, "bold")).pack(anchor=W, pady=1)
+            self.settings_vars['laser_output'] = ttk.StringVar()
+            ttk.Combobox(laser_frame, textvariable=self.settings_vars['laser_output'],
+                        values=["text", "pcl", "postscript"], state="readonly",
+                        font=("", font_size)).pack(fill=X, ipady=5, pady=2)
+        else:
+            output_frame = ttk.Frame(laser_frame)
+            output_frame.pack(fill=X, pady=5)
+            
+            ttk.Label(output_frame, text="Langage (text / pcl / postscript):", 
+                     width=30, anchor=W, font=("", font_size)).pack(side=LEFT, padx=5)
+            self.settings_vars['laser_output'] = ttk.StringVar()
+            ttk.Combobox(output_frame, textvariable=self.settings_vars['laser_output'],
+                        values=["text", "pcl", "postscript"], state="readonly",
+                        font=("", font_size)).pack(side=LEFT, padx=5, fill=X, expand=YES, ipady=4)
+        
         # Boutons de test
         if self.is_compact_mode:
             ttk.Button(laser_frame, text="🔍 Tester connexion laser",
@@ -282,6 +399,90 @@ class SettingsTab:
                       command=self.test_laser_print, 
                       bootstyle="warning", width=25).pack(side=LEFT, padx=5, ipady=8)
     
+    def _create_maintenance_section(self, parent):
+        """Section sauvegarde et maintenance de la base"""
+        maint_frame = ttk.Labelframe(parent, text="🗄️ Sauvegarde & maintenance", 
+                                     bootstyle="secondary", padding=10)
+        maint_frame.pack(fill=X, pady=(0, 10))
+        
+        font_size = 10 if self.is_compact_mode else 11
+        
+        # Activer les sauvegardes automatiques
+        backup_enabled_frame = ttk.Frame(maint_frame)
+        backup_enabled_frame.pack(fill=X, pady=5)
+        self.backup_enabled_var = ttk.BooleanVar()
+        
+        if self.is_compact_mode:
+            ttk.Label(backup_enabled_frame, text="Sauvegardes automatiques:", 
+                     font=("", font_size, "bold")).pack(anchor=W, pady=1)
+            ttk.Checkbutton(backup_enabled_frame, variable=self.backup_enabled_var, 
+                           bootstyle="secondary-round-toggle").pack(anchor=W, pady=2)
+        else:
+            ttk.Label(backup_enabled_frame, text="Sauvegardes automatiques:", 
+                     font=("", font_size)).pack(side=LEFT, padx=(0, 10))
+            ttk.Checkbutton(backup_enabled_frame, variable=self.backup_enabled_var, 
+                           bootstyle="secondary-round-toggle").pack(side=LEFT)
+        
+        # Rétention des exports PDF (désactivée tant que l'utilisateur ne l'a pas confirmée)
+        retention_frame = ttk.Frame(maint_frame)
+        retention_frame.pack(fill=X, pady=5)
+        self.exports_retention_var = ttk.BooleanVar()
+        
+        if self.is_compact_mode:
+            ttk.Label(retention_frame, text="Rétention des PDF exportés:", 
+                     font=("", font_size, "bold")).pack(anchor=W, pady=1)
+            ttk.Checkbutton(retention_frame, variable=self.exports_retention_var, 
+                           bootstyle="secondary-round-toggle").pack(anchor=W, pady=2)
+        else:
+            ttk.Label(retention_frame, text="Rétention des PDF exportés:", 
+                     font=("", font_size)).pack(side=LEFT, padx=(0, 10))
+            ttk.Checkbutton(retention_frame, variable=self.exports_retention_var, 
+                           bootstyle="secondary-round-toggle").pack(side=LEFT)
+        
+        maintenance_fields = [
+            ('backup_interval_hours', 'Intervalle des sauvegardes (heures)'),
+            ('backup_keep', 'Nombre de sauvegardes conservées'),
+            ('archive_after_months', 'Archiver les reçus de plus de (mois)'),
+            ('exports_max_age_days', 'Archiver les PDF de plus de (jours)'),
+            ('exports_max_size_mb', 'Taille maximale des exports (Mo)')
+        ]
+        
+        for key, label in maintenance_fields:
+            var = ttk.StringVar()
+            self.settings_vars[key] = var
+            frame = ttk.Frame(maint_frame)
+            
+            if self.is_compact_mode:
+                frame.pack(fill=X, pady=3)
+                ttk.Label(frame, text=label + ":", font=("", font_size, "bold")).pack(
+                    anchor=W, pady=1)
+                ttk.Entry(frame, textvariable=var, font=("", font_size)).pack(
+                    fill=X, ipady=5)
+            else:
+                frame.pack(fill=X, pady=4)
+                ttk.Label(frame, text=label + ":", width=30, anchor=W, 
+                         font=("", font_size)).pack(side=LEFT, padx=5)
+                ttk.Entry(frame, textvariable=var, width=10, font=("", font_size)).pack(
+                    side=LEFT, padx=5, ipady=4)
+        
+        actions = [
+            ("💾 Sauvegarder maintenant", self.backup_now, "secondary"),
+            ("🧹 Compacter la base", self.compact_database, "secondary-outline"),
+            ("📦 Archiver les anciens reçus", self.archive_receipts, "secondary-outline"),
+            ("📑 Relevés de fin de mois", self.generate_month_end_statements, "secondary-outline"),
+        ]
+        
+        if self.is_compact_mode:
+            for text, command, style in actions:
+                ttk.Button(maint_frame, text=text, command=command, 
+                          bootstyle=style).pack(fill=X, ipady=8, pady=2)
+        else:
+            btn_frame = ttk.Frame(maint_frame)
+            btn_frame.pack(fill=X, pady=(10, 0))
+            for text, command, style in actions:
+                ttk.Button(btn_frame, text=text, command=command, 
+                          bootstyle=style, width=25).pack(side=LEFT, padx=5, ipady=8)
+    
     def _create_danger_zone(self, parent):
         """Zone dangereuse"""
         danger_frame = ttk.Labelframe(parent, text="🗑️ Zone dangereuse", 
@@ -342,6 +543,8 @@ class SettingsTab:
         
         # Charger les paramètres laser (NOUVEAU)
         self.laser_enabled_var.set(settings.get('laser_enabled', 'true') == 'true')
+        self.backup_enabled_var.set(settings.get('backup_enabled', 'true') == 'true')
+        self.exports_retention_var.set(settings.get('exports_retention_enabled', 'false') == 'true')
     
     def save_settings(self):
         """Sauvegarder les paramètres"""
@@ -355,8 +558,24 @@ class SettingsTab:
         
         # Ajouter les paramètres laser (NOUVEAU)
         settings_dict['laser_enabled'] = 'true' if self.laser_enabled_var.get() else 'false'
+        settings_dict['backup_enabled'] = 'true' if self.backup_enabled_var.get() else 'false'
+        
+        # Première activation de la rétention : les anciens PDF vont quitter exports/
+        retention = self.exports_retention_var.get()
+        if retention and self.controller.db.get_setting('exports_retention_enabled', 'false') != 'true':
+            compress = self.controller.db.get_setting('exports_compress', 'true') == 'true'
+            retention = messagebox.askyesno(
+                "Rétention des exports",
+                f"Au prochain démarrage, les PDF de plus de {settings_dict.get('exports_max_age_days')} jours "
+                f"(ou au-delà de {settings_dict.get('exports_max_size_mb')} Mo) seront "
+                + ("déplacés dans des archives ZIP mensuelles." if compress else "supprimés.")
+                + "\n\nActiver la rétention ?",
+                parent=self.frame)
+            self.exports_retention_var.set(retention)
+        settings_dict['exports_retention_enabled'] = 'true' if retention else 'false'
         
         self.controller.save_settings(settings_dict)
+        self.controller.start_backup_schedule()
         messagebox.showinfo("Succès", "Paramètres enregistrés avec succès !", 
                           parent=self.frame)
     
@@ -395,6 +614,191 @@ class SettingsTab:
             messagebox.showerror("Erreur", f"Erreur de test: {str(e)}", 
                                parent=self.frame)
     
+    def backup_now(self):
+        """Sauvegarder la base immédiatement"""
+        success, result = self.controller.backup_database()
+        
+        if success:
+            messagebox.showinfo("Succès", 
+                              f"Sauvegarde créée ({result['size'] / 1024:,.0f} Ko)\n\n{result['path']}", 
+                              parent=self.frame)
+        else:
+            messagebox.showerror("Erreur", result, parent=self.frame)
+    
+    def compact_database(self):
+        """Compacter la base de données"""
+        success, result = self.controller.compact_database()
+        
+        if success:
+            messagebox.showinfo("Succès", 
+                              f"Base compactée : {result['size_before'] / 1024:,.0f} Ko → "
+                              f"{result['size_after'] / 1024:,.0f} Ko", 
+                              parent=self.frame)
+        else:
+            messagebox.showerror("Erreur", result, parent=self.frame)
+    
+    def archive_receipts(self):
+        """Archiver les reçus anciens"""
+        try:
+            months = int(self.settings_vars['archive_after_months'].get())
+        except ValueError:
+            messagebox.showerror("Erreur", "Le nombre de mois doit être un entier", 
+                               parent=self.frame)
+            return
+        
+        if not messagebox.askyesno("Confirmation", 
+                                  f"Archiver les reçus de plus de {months} mois ?\n\n"
+                                  "Ils resteront dans l'historique, les statistiques et les exports.", 
+                                  parent=self.frame):
+            return
+        
+        success, result = self.controller.archive_old_receipts(months)
+        
+        if success:
+            self.main_window.history_tab.refresh_history()
+            self.main_window.statistics_tab.refresh_statistics()
+            message = f"{result['archived']} reçus archivés (avant le {result['cutoff']})"
+            if result['kept']:
+                message += (f"\n\n{result['kept']} reçus déjà présents dans une archive "
+                            "sous un autre numéro sont restés dans la base courante.")
+            if result['refused']:
+                message += (f"\n\nAnnées non archivées (limite de {self.controller.db.MAX_ATTACHED_ARCHIVES} "
+                            f"archives consultables) : {', '.join(result['refused'])}")
+            messagebox.showinfo("Succès", message, parent=self.frame)
+        else:
+            messagebox.showerror("Erreur", result, parent=self.frame)
+    
+    def generate_month_end_statements(self):
+        """Relevés de compte de tous les clients actifs sur un mois"""
+        today = date.today()
+        previous = date(today.year - (today.month == 1), (today.month - 2) % 12 + 1, 1)
+        period = simpledialog.askstring("Relevés de fin de mois", "Mois (AAAA-MM) :", 
+                                        initialvalue=previous.strftime('%Y-%m'), 
+                                        parent=self.frame)
+        if not period:
+            return
+        
+        try:
+            year, month = (int(part) for part in period.strip().split('-'))
+            date(year, month, 1)
+        except ValueError:
+            messagebox.showerror("Erreur", "Format attendu : AAAA-MM (ex: 2026-01)", 
+                               parent=self.frame)
+            return
+        
+        success, result = self.controller.generate_month_end_statements(year, month)
+        if not success:
+            messagebox.showerror("Erreur", result, parent=self.frame)
+            return
+        
+        # Suivre la génération sans bloquer l'interface
+        def poll():
+            if not result.done():
+                self.frame.after(500, poll)
+                return
+            try:
+                report = result.result()
+            except Exception as e:
+                messagebox.showerror("Erreur", f"Erreur de génération des relevés: {e}", 
+                                   parent=self.frame)
+                return
+            message = (f"{report['statements']} relevés générés en {report['duration']:.1f} s\n\n"
+                       f"{report['output_dir']}")
+            if report['errors']:
+                message += f"\n\n⚠️ {len(report['errors'])} erreur(s)"
+            messagebox.showinfo("Relevés de fin de mois", message, parent=self.frame)
+        
+        poll()
+    
+    # ========== DIAGNOSTICS (CACHÉ) ==========
+    
+    def open_diagnostics(self, event=None):
+        """Latences mesurées par méthode (contrôleur, base, imprimantes)"""
+        if self.diagnostics_window and self.diagnostics_window.winfo_exists():
+            self.diagnostics_window.lift()
+            return
+        
+        dialog = ttk.Toplevel(title="Diagnostics - latences")
+        dialog.transient(self.frame.winfo_toplevel())
+        dialog.geometry("900x560")
+        self.diagnostics_window = dialog
+        
+        top = ttk.Frame(dialog)
+        top.pack(fill=X, padx=10, pady=(10, 5))
+        
+        state = self.controller.get_diagnostics(0)
+        enabled_var = ttk.BooleanVar(value=state['enabled'])
+        ttk.Checkbutton(top, text="Mesurer les latences", variable=enabled_var, 
+                       bootstyle="info-round-toggle", 
+                       command=lambda: self.controller.set_instrumentation(enabled_var.get())
+                       ).pack(side=LEFT)
+        sql_var = ttk.BooleanVar(value=state['sql_enabled'])
+        ttk.Checkbutton(top, text="Tracer les requêtes SQL", variable=sql_var, 
+                       bootstyle="info-round-toggle", 
+                       command=lambda: self.controller.set_query_profiling(sql_var.get())
+                       ).pack(side=LEFT, padx=(15, 0))
+        
+        def dump():
+            success, message = self.controller.dump_diagnostics()
+            show = messagebox.showinfo if success else messagebox.showwarning
+            show("Diagnostics", message, parent=dialog)
+        
+        def sql_report():
+            success, message = self.controller.write_query_report()
+            if success:
+                messagebox.showinfo("Rapport SQL", f"Rapport écrit :\n{message}", parent=dialog)
+            else:
+                messagebox.showwarning("Rapport SQL", message, parent=dialog)
+        
+        def reset():
+            self.controller.reset_diagnostics()
+            refresh()
+        
+        ttk.Button(top, text="📝 Écrire le journal", command=dump, 
+                  bootstyle="info-outline").pack(side=RIGHT, padx=3)
+        ttk.Button(top, text="🧹 Remettre à zéro", command=reset, 
+                  bootstyle="secondary-outline").pack(side=RIGHT, padx=3)
+        ttk.Button(top, text="🧾 Rapport SQL", command=sql_report, 
+                  bootstyle="info-outline").pack(side=RIGHT, padx=3)
+        
+        columns = ('Méthode', 'Appels', 'Moyenne', 'p50', 'p95', 'p99', 'Max', 'Total')
+        methods_tree = ttk.Treeview(dialog, columns=columns, show='headings', height=14, 
+                                    bootstyle="info")
+        for col in columns:
+            methods_tree.heading(col, text=col)
+            methods_tree.column(col, width=300 if col == 'Méthode' else 80, 
+                                anchor=W if col == 'Méthode' else E)
+        methods_tree.pack(fill=BOTH, expand=YES, padx=10, pady=5)
+        
+        ttk.Label(dialog, text="Derniers appels", font=("", 10, "bold")).pack(anchor=W, padx=10)
+        recent_tree = ttk.Treeview(dialog, columns=('Heure', 'Méthode', 'Durée', 'Thread'), 
+                                   show='headings', height=6, bootstyle="secondary")
+        for col, width, anchor in (('Heure', 100, W), ('Méthode', 380, W), 
+                                   ('Durée', 100, E), ('Thread', 180, W)):
+            recent_tree.heading(col, text=col)
+            recent_tree.column(col, width=width, anchor=anchor)
+        recent_tree.pack(fill=X, padx=10, pady=(0, 10))
+        
+        def refresh():
+            if not dialog.winfo_exists():
+                return
+            diagnostics = self.controller.get_diagnostics()
+            methods_tree.delete(*methods_tree.get_children())
+            for row in diagnostics['methods']:
+                name = row['name'] + (f"  ⚠️ {row['errors']}" if row['errors'] else '')
+                methods_tree.insert('', 'end', values=(
+                    name, row['count'], f"{row['mean_ms']:.2f}", f"{row['p50_ms']:.2f}", 
+                    f"{row['p95_ms']:.2f}", f"{row['p99_ms']:.2f}", f"{row['max_ms']:.1f}", 
+                    f"{row['total_ms']:,.0f}"))
+            recent_tree.delete(*recent_tree.get_children())
+            for moment, name, elapsed_ms, ok, thread in diagnostics['recent']:
+                recent_tree.insert('', 'end', values=(
+                    datetime.fromtimestamp(moment).strftime('%H:%M:%S'), 
+                    name if ok else f"{name} ❌", f"{elapsed_ms:.2f} ms", thread))
+            dialog.after(2000, refresh)
+        
+        refresh()
+    
     def clear_history(self):
         """Effacer l'historique"""
         if messagebox.askyesno("Confirmation", 
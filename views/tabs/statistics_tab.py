@@ -2,6 +2,9 @@
 Onglet Statistiques - Version tactile optimisée
 Affichage des statistiques et analyses
 """
+from datetime import date, datetime
+from tkinter import messagebox
+
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from ttkbootstrap.scrolled import ScrolledFrame
@@ -21,6 +24,11 @@ class StatisticsTab:
         self.avg_sale_var = ttk.StringVar(value="0 Ar")
         self.unique_products_var = ttk.StringVar(value="0")
         
+        # Valorisation du stock à une date
+        self.valuation_date_var = ttk.StringVar(value=date.today().strftime('%d/%m/%Y'))
+        self.valuation_quantity_var = ttk.StringVar(value="-")
+        self.valuation_value_var = ttk.StringVar(value="-")
+        
         self.create_widgets()
         self.refresh_statistics()
         
@@ -110,9 +118,97 @@ class StatisticsTab:
         
         self.top_products_tree.pack(fill=BOTH, expand=YES)
         
+        self._create_valuation_section(content)
+        
         # Zone FIXE pour le bouton actualiser
         self._create_fixed_button()
     
+    def _create_valuation_section(self, parent):
+        """Créer la section de valorisation du stock à une date"""
+        valuation_frame = ttk.Labelframe(parent, text="📦 Valorisation du stock", 
+                                         bootstyle="primary", padding=10)
+        valuation_frame.pack(fill=BOTH, expand=YES, pady=(0, 10))
+        
+        date_row = ttk.Frame(valuation_frame)
+        date_row.pack(fill=X, pady=(0, 8))
+        
+        ttk.Label(date_row, text="Au (JJ/MM/AAAA):", font=("", 10)).pack(side=LEFT, padx=(0, 5))
+        date_entry = ttk.Entry(date_row, textvariable=self.valuation_date_var, 
+                               width=12, font=("", 11))
+        date_entry.pack(side=LEFT, padx=(0, 5), ipady=4)
+        date_entry.bind('<Return>', lambda e: self.refresh_valuation())
+        
+        ttk.Button(date_row, text="📊 Calculer", command=self.refresh_valuation, 
+                  bootstyle="info").pack(side=LEFT, fill=X, expand=YES, ipady=4)
+        
+        if self.is_compact_mode:
+            ttk.Label(valuation_frame, textvariable=self.valuation_quantity_var, 
+                     font=("", 10)).pack(anchor=W)
+            ttk.Label(valuation_frame, textvariable=self.valuation_value_var, 
+                     font=("", 12, "bold"), bootstyle="primary").pack(anchor=W, pady=(0, 8))
+            columns = ('Produit', 'Qté', 'Valeur')
+            widths = {'Produit': 150, 'Qté': 50, 'Valeur': 90}
+        else:
+            totals_row = ttk.Frame(valuation_frame)
+            totals_row.pack(fill=X, pady=(0, 8))
+            ttk.Label(totals_row, textvariable=self.valuation_quantity_var, 
+                     font=("", 11)).pack(side=LEFT)
+            ttk.Label(totals_row, textvariable=self.valuation_value_var, 
+                     font=("", 14, "bold"), bootstyle="primary").pack(side=RIGHT)
+            columns = ('Produit', 'Quantité', 'Prix unitaire', 'Valeur')
+            widths = {'Produit': 320, 'Quantité': 100, 'Prix unitaire': 130, 'Valeur': 150}
+        
+        self.valuation_tree = ttk.Treeview(valuation_frame, columns=columns, 
+                                           show='headings', height=6, bootstyle="info")
+        self.valuation_tree.configure(style="stats.Treeview")
+        
+        for col in columns:
+            self.valuation_tree.heading(col, text=col)
+            align = W if col == 'Produit' else (CENTER if col in ['Quantité', 'Qté'] else E)
+            self.valuation_tree.column(col, width=widths.get(col, 100), anchor=align, minwidth=40)
+        
+        self.valuation_tree.pack(fill=BOTH, expand=YES)
+    
+    def refresh_valuation(self):
+        """Calculer la valorisation du stock à la date saisie"""
+        try:
+            as_of = datetime.strptime(self.valuation_date_var.get().strip(), '%d/%m/%Y').date()
+        except ValueError:
+            messagebox.showerror("Erreur", "Date invalide (format JJ/MM/AAAA)", parent=self.frame)
+            return
+        
+        success, result = self.controller.get_stock_valuation(as_of)
+        if not success:
+            messagebox.showerror("Erreur", result, parent=self.frame)
+            return
+        
+        currency = self.controller.db.get_setting('currency', 'Ar')
+        summary = f"{len(result['products'])} produits en stock, {result['quantity']:g} unités"
+        if result['negative']:
+            summary += f" ({len(result['negative'])} en stock négatif, à vérifier)"
+        self.valuation_quantity_var.set(summary)
+        self.valuation_value_var.set(f"Valeur: {result['value']:,.0f} {currency}")
+        
+        for item in self.valuation_tree.get_children():
+            self.valuation_tree.delete(item)
+        
+        for _, name, quantity, price, value in result['products']:
+            if self.is_compact_mode:
+                values = (name, f"{quantity:g}", f"{value:,.0f}")
+            else:
+                values = (name, f"{quantity:g}", f"{price or 0:,.0f} {currency}", 
+                          f"{value:,.0f} {currency}")
+            self.valuation_tree.insert('', 'end', values=values)
+        
+        # Anomalies : soldes négatifs, non valorisés
+        for _, name, quantity, price in result['negative']:
+            if self.is_compact_mode:
+                values = (f"⚠️ {name}", f"{quantity:g}", "-")
+            else:
+                values = (f"⚠️ {name}", f"{quantity:g}", f"{price or 0:,.0f} {currency}", "négatif")
+            self.valuation_tree.insert('', 'end', values=values, tags=('negative',))
+        self.valuation_tree.tag_configure('negative', foreground='#d9534f')
+    
     def _create_fixed_button(self):
         """Créer le bouton fixe"""
         ttk.Separator(self.frame, orient=HORIZONTAL).pack(fill=X, padx=8)
@@ -164,21 +260,23 @@ class StatisticsTab:
         top_products = self.controller.get_top_products(5)
         
         for i, product in enumerate(top_products, 1):
-            name, count, revenue = product
+            name, quantity, revenue = product
             
             if self.is_compact_mode:
                 values = (
                     f"#{i}",
                     name,
-                    count,
+                    f"{quantity or 0:g}",
                     f"{revenue:,.0f}"
                 )
             else:
                 values = (
                     f"#{i}",
                     name,
-                    count,
+                    f"{quantity or 0:g}",
                     f"{revenue:,.0f} {currency}"
                 )
             
-            self.top_products_tree.insert('', 'end', values=values)
\ No newline at end of file
+            self.top_products_tree.insert('', 'end', values=values)
+        
+        self.refresh_valuation()
\ No newline at end of file